@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from urllib.parse import quote
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'dashboard.perf.PerfMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,7 +60,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for the perf panel
+        'BACKEND': 'dashboard.perf.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,11 +80,51 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are kept for CONN_MAX_AGE seconds instead of being opened
+# per request. Write transactions start IMMEDIATE so they wait on
+# busy_timeout for the write lock rather than failing with "database is
+# locked" when a read transaction tries to upgrade. Report pages read
+# through a second, read-only connection to the same file (see
+# dashboard/db.py); with WAL journaling those reads never block writers.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    'reports': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # Quoted so a path containing ?, # or % stays part of the file name
+        'NAME': f"file:{quote(str(BASE_DIR / 'db.sqlite3'))}?mode=ro",
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'uri': True,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['dashboard.db.ReportsRouter']
+
+REPORTS_DATABASE = 'reports'
+
+# PRAGMAs run on every new SQLite connection (dashboard/db.py).
+# cache_size is negative to mean KiB.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
 }
 
 
@@ -128,4 +171,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Login settings
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
-LOGOUT_REDIRECT_URL = 'login'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'login'
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Dashboard and balance-sheet KPIs are cached here, keyed on per-model
+# change versions stored in the database (see dashboard/kpis.py). The
+# cache is a database table so every worker process and management
+# command shares it; the table is created by the dashboard migrations.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dashboard_cache',
+    }
+}
+
+
+# Uploaded imports and finished exports for background data jobs.
+# Served only through the login-protected download view, never directly.
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
+
+# Request timing (dashboard/perf.py), shown to staff at /dashboard/_perf/.
+# Lower the sample rate to cut overhead on busy workers; 0 turns it off.
+# PERF_LOG_FILE, if set, receives one JSON line per sampled request.
+
+PERF_SAMPLE_RATE = 1.0
+PERF_WINDOW = 500
+PERF_DUPLICATE_THRESHOLD = 3
+PERF_LOG_FILE = None
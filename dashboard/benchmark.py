@@ -0,0 +1,165 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from finance.models import Employee, Expense, PeriodSnapshot, SalaryPayment, SundryCreditor, SundryDebtor
+from inventory.models import InventoryItem
+from rooms.models import Room
+from sales.models import FoodItem, SalesBill
+
+from .db import reports_database
+from .models import DataJob
+
+BENCHMARK_URLCONFS = ('dashboard.urls', 'finance.urls')
+
+# Endpoints that end the session, stream a whole-database download or only accept POST
+SKIP = {
+	'logout', 'settings_export', 'settings_job_download', 'settings_export_job',
+	'period_close', 'period_reopen',
+}
+
+# URL name prefix -> model whose newest row fills a <pk> argument
+PK_MODELS = [
+	('inventory_', InventoryItem),
+	('room_', Room),
+	('food_item_', FoodItem),
+	('sales_bill_', SalesBill),
+	('settings_job_', DataJob),
+	('period_', PeriodSnapshot),
+	('expense_', Expense),
+	('employee_', Employee),
+	('salary_payment_', SalaryPayment),
+	('debtor_', SundryDebtor),
+	('creditor_', SundryCreditor),
+]
+
+
+def _stay_query():
+	check_in = timezone.localdate() + timedelta(days=7)
+	return {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=3)).isoformat()}
+
+
+# URL name -> function giving the query string a page needs
+QUERIES = {
+	'room_availability': _stay_query,
+}
+
+# A page may take this many times its baseline latency, plus a fixed
+# allowance for timer noise on fast pages, before the budget is exceeded.
+DEFAULT_TOLERANCE = 1.5
+DEFAULT_SLACK_MS = 20.0
+
+
+def benchmark_urls(urlconfs=BENCHMARK_URLCONFS):
+	"""
+	(name, url) for every GET page in `urlconfs`.
+
+	Detail pages use the newest row of their model; pages whose model is
+	empty are left out.
+	"""
+	urls = []
+	for urlconf in urlconfs:
+		for pattern in import_module(urlconf).urlpatterns:
+			name = pattern.name
+			if not name or name in SKIP:
+				continue
+			kwargs = {}
+			if 'pk' in pattern.pattern.converters:
+				model = next((model for prefix, model in PK_MODELS if name.startswith(prefix)), None)
+				pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() if model else None
+				if pk is None:
+					continue
+				kwargs['pk'] = pk
+			url = reverse(name, kwargs=kwargs)
+			if name in QUERIES:
+				url = f'{url}?{urlencode(QUERIES[name]())}'
+			urls.append((name, url))
+	return urls
+
+
+def _capture_queries(stack):
+	"""Capture contexts for every connection a page can query: default and the reports alias"""
+	aliases = dict.fromkeys([DEFAULT_DB_ALIAS, reports_database()])
+	return [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in aliases]
+
+
+def measure(client, url, repeat):
+	"""
+	GET `url` `repeat` times and time each response.
+
+	The first request fills the caches, so it is reported separately as
+	`cold_ms`; `ms` is the median of the others. `queries` counts the
+	queries on the default and the reports connections together.
+	"""
+	timings = []
+	queries = []
+	status = None
+	for _ in range(max(repeat, 1)):
+		with ExitStack() as stack:
+			contexts = _capture_queries(stack)
+			start = time.perf_counter()
+			response = client.get(url)
+			elapsed = (time.perf_counter() - start) * 1000
+		status = response.status_code
+		timings.append(elapsed)
+		queries.append(sum(len(context.captured_queries) for context in contexts))
+	warm = timings[1:] or timings
+	return {
+		'url': url,
+		'status': status,
+		'cold_ms': round(timings[0], 2),
+		'ms': round(statistics.median(warm), 2),
+		'queries': max(queries),
+	}
+
+
+def run_benchmarks(client, repeat=5, urls=None):
+	"""{name: measure()} for every benchmark URL, using a logged-in test client"""
+	return {name: measure(client, url, repeat) for name, url in (urls or benchmark_urls())}
+
+
+def over_budget(results, baseline, tolerance=DEFAULT_TOLERANCE, slack_ms=DEFAULT_SLACK_MS):
+	"""
+	Messages for each page that did worse than `baseline`.
+
+	A page fails when it errors, runs more queries than its baseline, or
+	takes longer than baseline * tolerance + slack_ms. Pages missing from
+	the baseline are not judged.
+	"""
+	problems = []
+	for name, result in sorted(results.items()):
+		if result['status'] >= 400:
+			problems.append(f"{name}: HTTP {result['status']}")
+		budget = baseline.get(name)
+		if budget is None:
+			continue
+		if result['queries'] > budget['queries']:
+			problems.append(f"{name}: {result['queries']} queries, budget {budget['queries']}")
+		limit = budget['ms'] * tolerance + slack_ms
+		if result['ms'] > limit:
+			problems.append(f"{name}: {result['ms']:.1f} ms, budget {limit:.1f} ms")
+	return problems
+
+
+def load_baseline(path):
+	try:
+		with open(path, encoding='utf-8') as f:
+			return json.load(f)['pages']
+	except FileNotFoundError:
+		return {}
+
+
+def save_baseline(path, results):
+	pages = {name: {'ms': result['ms'], 'queries': result['queries']} for name, result in results.items()}
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump({'pages': pages}, f, indent=2, sort_keys=True)
+		f.write('\n')
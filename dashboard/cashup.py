@@ -0,0 +1,105 @@
+import csv
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from sales.models import PaymentDetail, SalesBill
+
+CENTS = Decimal('0.01')
+
+# Shift name -> (start, end, label); a shift ending at or before it starts
+# runs past midnight into the next day
+SHIFTS = {
+	'morning': (time(6), time(14), 'Morning (06:00-14:00)'),
+	'evening': (time(14), time(22), 'Evening (14:00-22:00)'),
+	'night': (time(22), time(6), 'Night (22:00-06:00)'),
+	'day': (time(0), time(0), 'Whole day'),
+}
+
+
+def shift_window(day, shift):
+	"""Aware (start, end) datetimes for `shift` beginning on `day`"""
+	start_time, end_time, _label = SHIFTS[shift]
+	start = timezone.make_aware(datetime.combine(day, start_time))
+	end_day = day + timedelta(days=1) if end_time <= start_time else day
+	return start, timezone.make_aware(datetime.combine(end_day, end_time))
+
+
+def cash_up(start, end):
+	"""
+	Payment-method totals and mismatched bills for bills raised in [start, end).
+
+	Method totals come from one grouped query over PaymentDetail joined to
+	the bill's created_at; the bill count and the underpaid/overpaid lists
+	read the stored paid_total/balance_due columns through the created_at
+	index, so no step touches rows outside the window.
+	"""
+	by_method = {
+		row['payment_method']: row
+		for row in PaymentDetail.objects.filter(sales_bill__created_at__gte=start, sales_bill__created_at__lt=end)
+		.values('payment_method')
+		.annotate(total=Sum('amount'), bill_count=Count('sales_bill', distinct=True), payment_count=Count('id'))
+		.order_by()
+	}
+	methods = [
+		{
+			'method': method,
+			'label': label,
+			'total': (by_method.get(method, {}).get('total') or Decimal(0)).quantize(CENTS),
+			'bill_count': by_method.get(method, {}).get('bill_count', 0),
+			'payment_count': by_method.get(method, {}).get('payment_count', 0),
+		}
+		for method, label in PaymentDetail.PAYMENT_METHODS
+	]
+
+	bills = SalesBill.objects.filter(created_at__gte=start, created_at__lt=end)
+	totals = bills.aggregate(bill_count=Count('id'), billed=Sum('total_amount'), paid=Sum('paid_total'))
+	mismatched = list(
+		bills.exclude(balance_due=0)
+		.order_by('created_at', 'id')
+		.only('created_at', 'guest_name', 'total_amount', 'paid_total', 'balance_due', 'payment_summary')
+	)
+	billed = (totals['billed'] or Decimal(0)).quantize(CENTS)
+	paid = (totals['paid'] or Decimal(0)).quantize(CENTS)
+	return {
+		'start': start,
+		'end': end,
+		'methods': methods,
+		'bill_count': totals['bill_count'],
+		'billed': billed,
+		'collected': sum((row['total'] for row in methods), Decimal('0.00')),
+		'outstanding': billed - paid,
+		'underpaid': [bill for bill in mismatched if bill.balance_due > 0],
+		'overpaid': [bill for bill in mismatched if bill.balance_due < 0],
+	}
+
+
+def write_cash_up_csv(report, out):
+	"""Write `report` to the file-like `out` as CSV"""
+	writer = csv.writer(out)
+	start = timezone.localtime(report['start']).strftime('%Y-%m-%d %H:%M')
+	end = timezone.localtime(report['end']).strftime('%Y-%m-%d %H:%M')
+	writer.writerow(['Cash-up', start, end])
+	writer.writerow([])
+	writer.writerow(['Payment method', 'Bills', 'Payments', 'Total'])
+	for row in report['methods']:
+		writer.writerow([row['label'], row['bill_count'], row['payment_count'], row['total']])
+	writer.writerow(['Collected', '', '', report['collected']])
+	writer.writerow(['Billed', report['bill_count'], '', report['billed']])
+	writer.writerow(['Outstanding', '', '', report['outstanding']])
+	writer.writerow([])
+	writer.writerow(['Status', 'Bill #', 'Created', 'Guest', 'Total', 'Paid', 'Balance due', 'Payments'])
+	for status in ('underpaid', 'overpaid'):
+		for bill in report[status]:
+			writer.writerow([
+				status,
+				bill.pk,
+				timezone.localtime(bill.created_at).strftime('%Y-%m-%d %H:%M'),
+				bill.guest_name,
+				bill.total_amount,
+				bill.paid_total,
+				bill.balance_due,
+				bill.payment_summary,
+			])
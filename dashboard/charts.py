@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from sales.models import DailySalesSummary
+
+# Window name -> (number of days, chart title)
+CHART_WINDOWS = {
+	'week': (7, 'Last 7 Days'),
+	'month': (30, 'Last 30 Days'),
+	'quarter': (90, 'Last 90 Days'),
+	'year': (365, 'Last 365 Days'),
+}
+CHART_BUCKETS = ('day', 'week', 'month')
+DEFAULT_BUCKETS = {'week': 'day', 'month': 'day', 'quarter': 'week', 'year': 'month'}
+
+
+def _bucket_start(day, bucket):
+	if bucket == 'week':
+		return day - timedelta(days=day.weekday())
+	if bucket == 'month':
+		return day.replace(day=1)
+	return day
+
+
+def _next_bucket(start, bucket):
+	if bucket == 'week':
+		return start + timedelta(days=7)
+	if bucket == 'month':
+		return (start + timedelta(days=32)).replace(day=1)
+	return start + timedelta(days=1)
+
+
+def _bucket_label(start, bucket):
+	if bucket == 'week':
+		return f"Wk {start.strftime('%b %d')}"
+	if bucket == 'month':
+		return start.strftime('%b %Y')
+	return start.strftime('%b %d')
+
+
+def chart_options(window, bucket):
+	"""(window, bucket) from request values, falling back to the week window and its default bucket"""
+	if window not in CHART_WINDOWS:
+		window = 'week'
+	if bucket not in CHART_BUCKETS:
+		bucket = DEFAULT_BUCKETS[window]
+	return window, bucket
+
+
+def sales_chart(today, window, bucket):
+	"""
+	Return (labels, amounts) of net sales for `window` ending on `today`.
+
+	`window` and `bucket` are already checked by chart_options(). The window
+	starts at the boundary of the bucket holding its first day, so the first
+	bar is a whole week or month rather than just its last few days. The
+	whole window is answered by one grouped aggregate over the daily rollup;
+	buckets with no sales are filled with zero here.
+	"""
+	days, _title = CHART_WINDOWS[window]
+	start = _bucket_start(today - timedelta(days=days - 1), bucket)
+
+	rows = DailySalesSummary.objects.filter(day__gte=start, day__lte=today)
+	if bucket == 'day':
+		totals = dict(rows.values_list('day', 'net_amount'))
+	else:
+		trunc = TruncWeek('day') if bucket == 'week' else TruncMonth('day')
+		totals = dict(
+			rows.annotate(bucket=trunc)
+			.values('bucket')
+			.annotate(total=Sum('net_amount'))
+			.order_by()
+			.values_list('bucket', 'total')
+		)
+
+	labels = []
+	amounts = []
+	current = start
+	while current <= today:
+		labels.append(_bucket_label(current, bucket))
+		amounts.append(float(totals.get(current, 0)))
+		current = _next_bucket(current, bucket)
+	return labels, amounts
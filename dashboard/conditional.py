@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .kpis import model_versions, pinned_versions
+
+
+def versions_etag(request, models):
+	"""
+	ETag for a page built from `models`, as seen by this request's session.
+
+	Only the change versions are read (one small query), so answering 304
+	never touches the data tables. The session key and today's date are mixed
+	in so a new login (fresh CSRF token) or a new day (default report
+	dates) renders afresh. Pages with a flash message waiting get no ETag,
+	so the message is shown.
+	"""
+	if len(get_messages(request)):
+		return None
+	parts = [
+		request.user.pk,
+		request.session.session_key,
+		timezone.localdate().isoformat(),
+		*model_versions(models),
+	]
+	return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def conditional_on(*models):
+	"""
+	Answer GETs with 304 Not Modified until one of `models` is written.
+
+	Put it under @login_required so anonymous requests are redirected
+	before any ETag is worked out.
+	"""
+	def decorator(view):
+		@condition(etag_func=lambda request, *args, **kwargs: versions_etag(request, models))
+		@wraps(view)
+		def conditional_view(request, *args, **kwargs):
+			response = view(request, *args, **kwargs)
+			# Make browsers revalidate instead of reusing the page blindly
+			patch_cache_control(response, private=True, no_cache=True)
+			return response
+
+		@wraps(view)
+		def wrapped(request, *args, **kwargs):
+			if request.method not in ('GET', 'HEAD'):
+				return conditional_view(request, *args, **kwargs)
+			# The ETag and the page's cached KPIs read the versions once
+			with pinned_versions():
+				return conditional_view(request, *args, **kwargs)
+		return wrapped
+	return decorator
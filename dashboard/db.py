@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_reporting = ContextVar('reporting', default=False)
+
+
+def reports_database():
+	"""
+	Alias that report reads should use: REPORTS_DATABASE, or default.
+
+	A test mirror of default is the same database behind a second
+	connection, which cannot see the test's open transaction, so reads
+	then stay on default.
+	"""
+	alias = getattr(settings, 'REPORTS_DATABASE', None)
+	if alias not in connections.settings:
+		return DEFAULT_DB_ALIAS
+	if connections[alias].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+		return DEFAULT_DB_ALIAS
+	return alias
+
+
+@receiver(connection_created, dispatch_uid='configure_sqlite')
+def configure_sqlite(sender, connection, **kwargs):
+	if connection.vendor != 'sqlite':
+		return
+	# journal_mode is a property of the database file, so it is only set
+	# from writable connections
+	read_only = connection.alias == getattr(settings, 'REPORTS_DATABASE', None)
+	with connection.cursor() as cursor:
+		for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+			if read_only and name == 'journal_mode':
+				continue
+			cursor.execute(f'PRAGMA {name} = {value}')
+		if read_only:
+			cursor.execute('PRAGMA query_only = ON')
+
+
+@contextmanager
+def reading_reports():
+	"""Send the ORM reads made inside the block to the reports connection"""
+	token = _reporting.set(True)
+	try:
+		yield
+	finally:
+		_reporting.reset(token)
+
+
+def reads_from_reports(view):
+	"""
+	Run a read-only view's queries on the reports connection, so a long
+	report never holds a read transaction on the connection writers use.
+	"""
+	@wraps(view)
+	def wrapped(request, *args, **kwargs):
+		with reading_reports():
+			return view(request, *args, **kwargs)
+	return wrapped
+
+
+class ReportsRouter:
+	"""Reads inside reading_reports() go to reports_database(); every write goes to default"""
+
+	def db_for_read(self, model, **hints):
+		if _reporting.get():
+			return reports_database()
+		return None
+
+	def db_for_write(self, model, **hints):
+		# Rows read from the reports connection are saved through default
+		return DEFAULT_DB_ALIAS
+
+	def allow_relation(self, obj1, obj2, **hints):
+		# Both aliases are the same database file
+		return True
+
+	def allow_migrate(self, db, app_label, model_name=None, **hints):
+		return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,137 @@
+import datetime
+import json
+import zlib
+
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+
+from finance.models import Employee, Expense, SalaryPayment, SundryCreditor, SundryDebtor
+from inventory.models import InventoryItem, StockCheckpoint, StockMovement
+from rooms.models import Guest, Room
+from sales.models import FoodItem, PaymentDetail, RecipeIngredient, SalesBill, SalesBillItem
+
+from .db import reports_database
+
+# Export section name -> model, in an order that satisfies foreign keys
+EXPORT_TABLES = [
+	('inventory_items', InventoryItem),
+	('rooms', Room),
+	('guests', Guest),
+	('food_items', FoodItem),
+	('recipe_ingredients', RecipeIngredient),
+	('sales_bills', SalesBill),
+	('sales_bill_items', SalesBillItem),
+	('payment_details', PaymentDetail),
+	# Recipe issues point at their sales bill, so the ledger follows the sales
+	('stock_movements', StockMovement),
+	('stock_checkpoints', StockCheckpoint),
+	('expenses', Expense),
+	('employees', Employee),
+	('salary_payments', SalaryPayment),
+	('sundry_debtors', SundryDebtor),
+	('sundry_creditors', SundryCreditor),
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_records(model, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+	"""
+	Yield serialized records of `model` without loading the whole table.
+
+	Rows are read through the reports connection, so a long export does
+	not hold a read transaction on the connection writers use.
+	`progress`, if given, is called with the size of each chunk.
+	"""
+	batch = []
+	for obj in model.objects.using(reports_database()).order_by('pk').iterator(chunk_size=chunk_size):
+		batch.append(obj)
+		if len(batch) >= chunk_size:
+			yield from serializers.serialize('python', batch)
+			if progress:
+				progress(len(batch))
+			batch = []
+	if batch:
+		yield from serializers.serialize('python', batch)
+		if progress:
+			progress(len(batch))
+
+
+class _ExportEncoder(DjangoJSONEncoder):
+	"""DjangoJSONEncoder, but keeping microseconds so timestamps round-trip exactly"""
+
+	def default(self, o):
+		if isinstance(o, (datetime.datetime, datetime.time)):
+			return o.isoformat()
+		return super().default(o)
+
+
+def _dumps(record):
+	return json.dumps(record, cls=_ExportEncoder)
+
+
+def iter_json(tables=EXPORT_TABLES, progress=None):
+	"""
+	Stream a single JSON document of {section: [records]}.
+
+	The layout matches what settings_import has always read.
+	"""
+	yield '{'
+	for index, (name, model) in enumerate(tables):
+		yield '{}"{}": ['.format(', ' if index else '', name)
+		first = True
+		for record in iter_records(model, progress=progress):
+			yield ('' if first else ', ') + _dumps(record)
+			first = False
+		yield ']'
+	yield '}\n'
+
+
+def iter_ndjson(tables=EXPORT_TABLES, progress=None):
+	"""Stream one JSON object per line, each tagged with its export section"""
+	for name, model in tables:
+		for record in iter_records(model, progress=progress):
+			record['table'] = name
+			yield _dumps(record) + '\n'
+
+
+def iter_chunks(pieces, chunk_bytes=64 * 1024):
+	"""Group small text pieces into byte chunks of roughly `chunk_bytes`"""
+	buffer = []
+	size = 0
+	for piece in pieces:
+		data = piece.encode('utf-8')
+		buffer.append(data)
+		size += len(data)
+		if size >= chunk_bytes:
+			yield b''.join(buffer)
+			buffer = []
+			size = 0
+	if buffer:
+		yield b''.join(buffer)
+
+
+def iter_gzip(chunks):
+	"""Gzip a byte stream incrementally"""
+	compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+	for chunk in chunks:
+		data = compressor.compress(chunk)
+		if data:
+			yield data
+	yield compressor.flush()
+
+
+def export_stream(fmt='json', compress=False, progress=None):
+	"""
+	Return (byte iterator, content type, filename) for a full data export.
+
+	`fmt` is 'json' or 'ndjson'. `progress` is passed on to iter_records.
+	"""
+	if fmt == 'ndjson':
+		pieces, content_type, filename = iter_ndjson(progress=progress), 'application/x-ndjson', 'hotel_data_export.ndjson'
+	else:
+		pieces, content_type, filename = iter_json(progress=progress), 'application/json', 'hotel_data_export.json'
+	stream = iter_chunks(pieces)
+	if compress:
+		stream, content_type, filename = iter_gzip(stream), 'application/gzip', filename + '.gz'
+	return stream, content_type, filename
@@ -0,0 +1,306 @@
+import gzip
+import io
+import json
+import re
+
+from django.core import serializers
+from django.core.exceptions import ValidationError
+from django.core.serializers.base import DeserializationError
+from django.db import DatabaseError, transaction
+
+from .exports import EXPORT_TABLES
+from .kpis import bump_version
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class ImportReport:
+	"""Row counts and errors collected over one import run"""
+
+	def __init__(self, dry_run=False):
+		self.dry_run = dry_run
+		self.counts = {}
+		self.rows_processed = 0
+		self.error_count = 0
+		self.errors = []
+
+	def add_error(self, section, pk, message):
+		self.error_count += 1
+		if len(self.errors) < MAX_REPORTED_ERRORS:
+			self.errors.append(f'{section} #{pk}: {message}')
+
+	@property
+	def rows_written(self):
+		return sum(self.counts.values())
+
+	def summary(self):
+		verb = 'Validated' if self.dry_run else 'Imported'
+		parts = ', '.join(f'{count} {section}' for section, count in self.counts.items() if count)
+		text = f'{verb} {self.rows_written} row(s)' + (f' ({parts})' if parts else '')
+		if self.error_count:
+			text += f'; {self.error_count} row(s) rejected'
+		return text + '.'
+
+
+class _JSONStreamReader:
+	"""
+	Incremental reader for the {section: [records]} export document.
+
+	Only one record is held in memory at a time, so the upload can be far
+	larger than the worker's memory.
+	"""
+
+	def __init__(self, stream, read_size=64 * 1024):
+		self.stream = stream
+		self.read_size = read_size
+		self.decoder = json.JSONDecoder()
+		self.buffer = ''
+		self.pos = 0
+		self.eof = False
+
+	def _fill(self):
+		chunk = self.stream.read(self.read_size)
+		if not chunk:
+			self.eof = True
+		self.buffer = self.buffer[self.pos:] + chunk
+		self.pos = 0
+
+	def _peek(self):
+		while True:
+			self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+			if self.pos < len(self.buffer) or self.eof:
+				return self.buffer[self.pos:self.pos + 1]
+			self._fill()
+
+	def _expect(self, char):
+		if self._peek() != char:
+			raise ValueError(f'Malformed import file: expected {char!r} at offset {self.pos}')
+		self.pos += 1
+
+	def _value(self):
+		while True:
+			self._peek()
+			try:
+				value, end = self.decoder.raw_decode(self.buffer, self.pos)
+			except json.JSONDecodeError:
+				if self.eof:
+					raise
+				self._fill()
+				continue
+			self.pos = end
+			return value
+
+	def __iter__(self):
+		"""Yield (section, record) pairs in file order"""
+		self._expect('{')
+		if self._peek() == '}':
+			return
+		while True:
+			section = self._value()
+			self._expect(':')
+			if self._peek() == '[':
+				self.pos += 1
+				if self._peek() == ']':
+					self.pos += 1
+				else:
+					while True:
+						yield section, self._value()
+						if self._peek() == ',':
+							self.pos += 1
+							continue
+						self._expect(']')
+						break
+			else:
+				self._value()
+			if self._peek() == ',':
+				self.pos += 1
+				continue
+			self._expect('}')
+			return
+
+
+def _iter_ndjson(stream):
+	for line in stream:
+		line = line.strip()
+		if line:
+			record = json.loads(line)
+			yield record.pop('table', None), record
+
+
+def open_import_file(fileobj):
+	"""Wrap a binary upload as text, transparently un-gzipping it"""
+	head = fileobj.read(2)
+	fileobj.seek(0)
+	if head == b'\x1f\x8b':
+		fileobj = gzip.GzipFile(fileobj=fileobj, mode='rb')
+	return io.TextIOWrapper(fileobj, encoding='utf-8')
+
+
+def iter_import_records(fileobj, filename=''):
+	"""Yield (section, record) pairs from a JSON or NDJSON export, gzipped or not"""
+	stream = open_import_file(fileobj)
+	name = filename.lower()
+	if name.endswith('.gz'):
+		name = name[:-3]
+	if name.endswith(('.ndjson', '.jsonl')):
+		return _iter_ndjson(stream)
+	return iter(_JSONStreamReader(stream))
+
+
+def bulk_create_keeping_timestamps(model, objects, batch_size=None, **kwargs):
+	"""
+	bulk_create() `objects` without losing their auto_now/auto_now_add values.
+
+	The insert's pre_save stamps those fields with the current time, so the
+	values each object carried are put back afterwards with one bulk_update.
+	The model's Field objects are left alone, so saves running in other
+	threads meanwhile still get their timestamps.
+	"""
+	fields = [
+		field for field in model._meta.concrete_fields
+		if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+	]
+	carried = [[getattr(obj, field.attname) for field in fields] for obj in objects]
+	model.objects.bulk_create(objects, batch_size=batch_size, **kwargs)
+	restored = []
+	for obj, values in zip(objects, carried):
+		if any(value is not None for value in values):
+			for field, value in zip(fields, values):
+				if value is not None:
+					setattr(obj, field.attname, value)
+			restored.append(obj)
+	if restored:
+		model.objects.bulk_update(restored, [field.name for field in fields], batch_size=batch_size)
+
+
+class _Importer:
+	def __init__(self, report, chunk_size):
+		self.report = report
+		self.chunk_size = chunk_size
+		self.models = dict(EXPORT_TABLES)
+		# Primary keys accepted so far per model, so FKs to rows earlier in
+		# the same file resolve even when nothing is written (dry run)
+		self.seen = {model: set() for model in self.models.values()}
+
+	def section_model(self, section, record):
+		if section in self.models:
+			return section, self.models[section]
+		label = record.get('model')
+		for name, model in EXPORT_TABLES:
+			if model._meta.label_lower == label:
+				return name, model
+		return section, None
+
+	def _missing_references(self, model, objects):
+		"""Map object index -> error for foreign keys that point nowhere, one query per FK"""
+		problems = {}
+		for field in model._meta.concrete_fields:
+			if not field.is_relation:
+				continue
+			related = field.related_model
+			known = self.seen.get(related, set())
+			wanted = {getattr(obj, field.attname) for obj in objects} - known - {None}
+			if not wanted:
+				continue
+			found = set(related.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+			# Rows the export cannot carry (e.g. users) are optional links: drop them
+			clear = field.null and related not in self.seen
+			for index, obj in enumerate(objects):
+				value = getattr(obj, field.attname)
+				if value is not None and value not in known and value not in found:
+					if clear:
+						setattr(obj, field.attname, None)
+					else:
+						problems.setdefault(index, f'{field.name} {value} does not exist')
+		return problems
+
+	def process_chunk(self, section, model, records):
+		objects = []
+		for record in records:
+			try:
+				deserialized = next(serializers.deserialize('python', [record], ignorenonexistent=True))
+			except (DeserializationError, ValidationError, StopIteration, KeyError, TypeError, ValueError) as e:
+				self.report.add_error(section, record.get('pk'), str(e))
+				continue
+			objects.append(deserialized.object)
+
+		problems = self._missing_references(model, objects)
+		for index, message in problems.items():
+			self.report.add_error(section, objects[index].pk, message)
+		objects = [obj for index, obj in enumerate(objects) if index not in problems]
+
+		if objects and not self.report.dry_run:
+			update_fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+			try:
+				with transaction.atomic():
+					bulk_create_keeping_timestamps(
+						model,
+						objects,
+						update_conflicts=True,
+						unique_fields=[model._meta.pk.name],
+						update_fields=update_fields,
+					)
+			except DatabaseError as e:
+				# The chunk's transaction rolled back; report it and carry on
+				self.report.add_error(section, f'{objects[0].pk}-{objects[-1].pk}', f'chunk rejected: {e}')
+				self.report.error_count += len(objects) - 1
+				self.report.rows_processed += len(records)
+				return
+
+		self.seen[model].update(obj.pk for obj in objects)
+		self.report.counts[section] = self.report.counts.get(section, 0) + len(objects)
+		self.report.rows_processed += len(records)
+
+
+def run_import(fileobj, filename='', dry_run=False, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+	"""
+	Upsert every record in an export file, one transaction per chunk.
+
+	Foreign keys are checked with one query per chunk rather than per row.
+	With `dry_run` the file is fully validated but nothing is written.
+	`progress`, if given, is called with the report after each chunk.
+	"""
+	report = ImportReport(dry_run=dry_run)
+	importer = _Importer(report, chunk_size)
+
+	def flush(section, model, records):
+		if model is None:
+			report.rows_processed += len(records)
+			for record in records:
+				report.add_error(section, record.get('pk'), 'unknown section')
+			return
+		importer.process_chunk(section, model, records)
+		if progress:
+			progress(report)
+
+	current = (None, None)
+	chunk = []
+	for section, record in iter_import_records(fileobj, filename):
+		key = importer.section_model(section, record)
+		if chunk and (key != current or len(chunk) >= chunk_size):
+			flush(*current, chunk)
+			chunk = []
+		current = key
+		chunk.append(record)
+	if chunk:
+		flush(*current, chunk)
+
+	if not dry_run and report.rows_written:
+		# bulk_create bypasses the signals that keep these up to date
+		from sales.rollups import rebuild_daily_summaries, rebuild_item_sales
+		from sales.totals import reconcile_bill_totals
+		from inventory.valuation import verify_valuation
+		from inventory.stock import post_opening_balances
+		rebuild_daily_summaries()
+		rebuild_item_sales()
+		reconcile_bill_totals()
+		verify_valuation()
+		# Exports made before the stock ledger existed carry quantities only
+		post_opening_balances()
+		for section, model in EXPORT_TABLES:
+			if report.counts.get(section):
+				bump_version(model)
+	return report
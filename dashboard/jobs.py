@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import export_stream
+from .imports import run_import
+from .models import DataJob
+
+# Minimum seconds between progress writes to the job row
+PROGRESS_INTERVAL = 1.0
+
+# A running job that has written no progress for this long lost its worker
+STALE_AFTER = timedelta(minutes=30)
+
+
+class _ProgressWriter:
+	"""Throttled writer of a job's progress counters"""
+
+	def __init__(self, job):
+		self.job = job
+		self.last_write = 0
+
+	def write(self, force=False, **fields):
+		for name, value in fields.items():
+			setattr(self.job, name, value)
+		now = time.monotonic()
+		if force or now - self.last_write >= PROGRESS_INTERVAL:
+			DataJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now(), **fields)
+			self.last_write = now
+
+
+def fail_stale_jobs(stale_after=STALE_AFTER):
+	"""
+	Fail running jobs whose worker stopped writing progress `stale_after` ago.
+
+	They are not re-queued: an import may have written part of its rows,
+	so the user decides whether to run it again. Returns the number failed.
+	"""
+	now = timezone.now()
+	cutoff = now - stale_after
+	return DataJob.objects.filter(
+		Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+		status='running',
+	).update(
+		status='failed',
+		finished_at=now,
+		message=f'The worker stopped responding for over {int(stale_after.total_seconds() // 60)} minute(s); run the job again.',
+	)
+
+
+def claim_next_job():
+	"""Fail stale jobs, then mark the oldest pending job as running and return it, or None"""
+	fail_stale_jobs()
+	while True:
+		job = DataJob.objects.filter(status='pending').order_by('created_at', 'id').first()
+		if job is None:
+			return None
+		# Another worker may have taken it since the SELECT
+		now = timezone.now()
+		claimed = DataJob.objects.filter(pk=job.pk, status='pending').update(
+			status='running', started_at=now, heartbeat_at=now,
+		)
+		if claimed:
+			job.refresh_from_db()
+			return job
+
+
+def _run_export(job, writer):
+	rows = 0
+
+	def progress(count):
+		nonlocal rows
+		rows += count
+		writer.write(rows_processed=rows)
+
+	stream, _content_type, filename = export_stream(
+		job.options.get('format', 'json'), job.options.get('gzip', False), progress=progress
+	)
+	# Write to a temporary file first so a half-written export is never offered
+	with tempfile.NamedTemporaryFile(delete=False) as tmp:
+		for chunk in stream:
+			tmp.write(chunk)
+	try:
+		with open(tmp.name, 'rb') as f:
+			job.output_file.save(f'{job.pk}_{filename}', File(f), save=False)
+	finally:
+		os.unlink(tmp.name)
+	job.rows_written = rows
+	job.message = f'Exported {rows} row(s).'
+
+
+def _run_import(job, writer):
+	def progress(report):
+		writer.write(
+			rows_processed=report.rows_processed,
+			rows_written=report.rows_written,
+			error_count=report.error_count,
+		)
+
+	with job.input_file.open('rb') as f:
+		report = run_import(
+			f,
+			filename=job.input_file.name,
+			dry_run=job.options.get('dry_run', False),
+			progress=progress,
+		)
+	job.rows_processed = report.rows_processed
+	job.rows_written = report.rows_written
+	job.error_count = report.error_count
+	job.errors = report.errors
+	job.message = report.summary()
+	# The upload can be several gigabytes; it is of no use once imported
+	job.input_file.delete(save=False)
+
+
+def run_job(job):
+	"""Run a claimed job to completion, recording the outcome on the row"""
+	writer = _ProgressWriter(job)
+	try:
+		if job.kind == 'export':
+			_run_export(job, writer)
+		else:
+			_run_import(job, writer)
+		job.status = 'done'
+	except Exception as e:
+		job.status = 'failed'
+		job.message = f'{type(e).__name__}: {e}'
+	job.finished_at = timezone.now()
+	job.save()
+	return job
@@ -0,0 +1,108 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+# Cached KPIs are keyed on the version of every model they read, so a write
+# to any of those models makes the old entry unreachable. Versions live in
+# the database and entries in the shared cache (see CACHES), so every
+# process sees a write as soon as it commits. The timeout only lets
+# unreachable entries expire.
+KPI_CACHE_TIMEOUT = 60 * 15
+
+_MISSING = object()
+
+_pinned = ContextVar('kpi_versions', default=None)
+
+
+def _label(model):
+	return model._meta.label_lower
+
+
+@contextmanager
+def pinned_versions():
+	"""
+	Read the version table at most once inside the block.
+
+	Wrap one request's reads in it: the ETag and every cached KPI on the
+	page then share a single query and agree on the versions they saw.
+	"""
+	token = _pinned.set({})
+	try:
+		yield
+	finally:
+		_pinned.reset(token)
+
+
+def model_versions(models):
+	"""Current version number for each model, seeding any that are unset"""
+	from .models import ModelVersion
+
+	labels = [_label(model) for model in models]
+	pinned = _pinned.get()
+	if pinned is not None and all(label in pinned for label in labels):
+		return [pinned[label] for label in labels]
+
+	rows = ModelVersion.objects.all() if pinned is not None else ModelVersion.objects.filter(label__in=labels)
+	versions = dict(rows.values_list('label', 'version'))
+	missing = [label for label in labels if label not in versions]
+	if missing:
+		# Seed from the clock so a recreated row never reuses an old number
+		ModelVersion.objects.bulk_create(
+			[ModelVersion(label=label, version=time.time_ns()) for label in missing],
+			ignore_conflicts=True,
+		)
+		versions.update(ModelVersion.objects.filter(label__in=missing).values_list('label', 'version'))
+	if pinned is not None:
+		pinned.update(versions)
+	return [versions[label] for label in labels]
+
+
+def bump_version(model):
+	"""Invalidate every KPI computed from `model`, in every process"""
+	from .models import ModelVersion
+
+	rows = ModelVersion.objects.filter(label=_label(model))
+	if rows.update(version=F('version') + 1):
+		return
+	try:
+		with transaction.atomic():
+			ModelVersion.objects.create(label=_label(model), version=time.time_ns())
+	except IntegrityError:
+		# Another process created it first
+		rows.update(version=F('version') + 1)
+
+
+def bump_on_commit(*models):
+	"""
+	bump_version() each of `models` once the current transaction commits.
+
+	Waiting for the commit stops a concurrent reader caching pre-commit data
+	under the new version. Queryset updates and bulk writes skip the model
+	signals, so code using them calls this itself.
+	"""
+	transaction.on_commit(lambda: [bump_version(model) for model in models])
+
+
+def cached_kpi(name, models, compute, *args):
+	"""
+	Return compute(*args), cached until one of `models` is written.
+
+	`args` are part of the cache key, so they must have stable string forms.
+	"""
+	versions = model_versions(models)
+	# Hashed, so the key stays short however many models and arguments it covers
+	variant = '{}:{}'.format(
+		'.'.join(str(version) for version in versions),
+		':'.join(str(arg) for arg in args),
+	)
+	key = f"kpi:{name}:{hashlib.sha1(variant.encode('utf-8')).hexdigest()}"
+	value = cache.get(key, _MISSING)
+	if value is _MISSING:
+		value = compute(*args)
+		cache.set(key, value, KPI_CACHE_TIMEOUT)
+	return value
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from dashboard.benchmark import (
+    DEFAULT_SLACK_MS, DEFAULT_TOLERANCE, load_baseline, over_budget, run_benchmarks, save_baseline,
+)
+
+BENCHMARK_USER = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Time every dashboard and finance page against the current database and compare with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'benchmarks.json'), help='Baseline JSON file')
+        parser.add_argument('--update-baseline', action='store_true', help='Write this run as the new baseline instead of checking it')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per page')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed slowdown factor')
+        parser.add_argument('--slack-ms', type=float, default=DEFAULT_SLACK_MS, help='Allowed slowdown in ms on top of the factor')
+
+    def handle(self, *args, **options):
+        user, _created = get_user_model().objects.get_or_create(
+            username=BENCHMARK_USER,
+            defaults={'is_staff': True, 'is_superuser': True, 'password': make_password(None)},
+        )
+        if user.has_usable_password():
+            raise CommandError(f'User "{BENCHMARK_USER}" already exists and can log in; refusing to use it.')
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+
+        results = run_benchmarks(client, repeat=options['repeat'])
+        for name, result in sorted(results.items(), key=lambda item: item[1]['ms'], reverse=True):
+            self.stdout.write(
+                f"{name:<24} {result['ms']:>9.1f} ms  (cold {result['cold_ms']:.1f} ms)  "
+                f"{result['queries']:>3} queries  HTTP {result['status']}"
+            )
+
+        if options['update_baseline']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if not baseline:
+            self.stdout.write(self.style.WARNING('No baseline yet; run with --update-baseline to record one.'))
+        problems = over_budget(results, baseline, options['tolerance'], options['slack_ms'])
+        if problems:
+            raise CommandError('Over budget:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} page(s) within budget.'))
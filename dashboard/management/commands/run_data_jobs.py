@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background import/export jobs (DataJob) outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every pending job, then exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            self.stdout.write(f'Running {job}...')
+            job = run_job(job)
+            style = self.style.SUCCESS if job.status == 'done' else self.style.ERROR
+            self.stdout.write(style(f'{job}: {job.message}'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.seeding import SEED_BATCH_SIZE, seed
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with generated rooms, guests, sales and finance records for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bills', type=int, default=10000, help='Sales bills to create')
+        parser.add_argument('--rooms', type=int, default=50)
+        parser.add_argument('--years', type=int, default=2, help='Years of history to spread guests and bills over')
+        parser.add_argument('--food-items', type=int, default=60)
+        parser.add_argument('--inventory-items', type=int, default=200)
+        parser.add_argument('--employees', type=int, default=30)
+        parser.add_argument('--expenses', type=int, default=5000)
+        parser.add_argument('--debtors', type=int, default=1000)
+        parser.add_argument('--creditors', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} bills')
+
+        counts = seed(
+            bills=options['bills'],
+            rooms=options['rooms'],
+            years=options['years'],
+            food_items=options['food_items'],
+            inventory_items=options['inventory_items'],
+            employees=options['employees'],
+            expenses=options['expenses'],
+            debtors=options['debtors'],
+            creditors=options['creditors'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        summary = ', '.join(f'{count} {label}' for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}.'))
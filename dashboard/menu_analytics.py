@@ -0,0 +1,70 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+
+from sales.models import DailyItemSales, FoodItem
+
+DEFAULT_TOP_ITEMS = 10
+
+
+def _percent(part, whole):
+	if not whole:
+		return None
+	return (Decimal(100) * part / whole).quantize(Decimal('0.1'))
+
+
+def menu_analytics(start, end, top=DEFAULT_TOP_ITEMS):
+	"""
+	Quantity, revenue, share and trend for every menu item from `start` to `end`.
+
+	Read entirely from the DailyItemSales rollup: one grouped query covers
+	the range and the equally long period before it (for the trend), and a
+	second lists the menu so unsold items show up too.
+	"""
+	length = (end - start).days + 1
+	previous_start = start - timedelta(days=length)
+	current, previous = Q(day__gte=start), Q(day__lt=start)
+	totals = {
+		row['food_item']: row
+		for row in DailyItemSales.objects.filter(day__range=(previous_start, end))
+		.values('food_item')
+		.annotate(
+			current_quantity=Sum('quantity', filter=current),
+			current_revenue=Sum('revenue', filter=current),
+			previous_quantity=Sum('quantity', filter=previous),
+			previous_revenue=Sum('revenue', filter=previous),
+		)
+		.order_by()
+	}
+
+	items = []
+	for food in FoodItem.objects.order_by('name').only('name', 'price', 'available'):
+		row = totals.get(food.pk, {})
+		revenue = row.get('current_revenue') or Decimal('0.00')
+		previous_revenue = row.get('previous_revenue') or Decimal('0.00')
+		items.append({
+			'food_item': food,
+			'quantity': row.get('current_quantity') or 0,
+			'revenue': revenue,
+			'previous_quantity': row.get('previous_quantity') or 0,
+			'previous_revenue': previous_revenue,
+			'trend': _percent(revenue - previous_revenue, previous_revenue),
+		})
+
+	total_revenue = sum((item['revenue'] for item in items), Decimal('0.00'))
+	total_quantity = sum(item['quantity'] for item in items)
+	for item in items:
+		item['share'] = _percent(item['revenue'], total_revenue)
+	items.sort(key=lambda item: (-item['revenue'], -item['quantity'], item['food_item'].name))
+
+	return {
+		'start': start,
+		'end': end,
+		'previous_start': previous_start,
+		'items': items,
+		'top': [item for item in items if item['quantity'] > 0][:top],
+		'dead': [item for item in items if item['quantity'] <= 0 and item['food_item'].available],
+		'total_quantity': total_quantity,
+		'total_revenue': total_revenue,
+	}
@@ -1,3 +1,95 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class DataJob(models.Model):
+	"""An import or export run by the `run_data_jobs` worker instead of a web request"""
+	KIND_CHOICES = [
+		("import", "Import"),
+		("export", "Export"),
+	]
+	STATUS_CHOICES = [
+		("pending", "Pending"),
+		("running", "Running"),
+		("done", "Done"),
+		("failed", "Failed"),
+	]
+	kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+	options = models.JSONField(default=dict, blank=True)
+	input_file = models.FileField(upload_to="jobs/imports/", blank=True)
+	output_file = models.FileField(upload_to="jobs/exports/", blank=True)
+	rows_processed = models.PositiveIntegerField(default=0)
+	rows_written = models.PositiveIntegerField(default=0)
+	error_count = models.PositiveIntegerField(default=0)
+	errors = models.JSONField(default=list, blank=True)
+	message = models.TextField(blank=True)
+	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(null=True, blank=True)
+	# Touched with every progress write; a running job whose heartbeat goes stale lost its worker
+	heartbeat_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ["-created_at"]
+		indexes = [
+			models.Index(fields=["status", "created_at"], name="datajob_status_created_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.get_kind_display()} job #{self.id} ({self.status})"
+
+	@classmethod
+	def visible_to(cls, user):
+		"""Jobs `user` may follow and download: their own, or every job for a superuser"""
+		if user.is_superuser:
+			return cls.objects.all()
+		return cls.objects.filter(created_by=user)
+
+	@property
+	def is_finished(self):
+		return self.status in ("done", "failed")
+
+	@property
+	def elapsed_seconds(self):
+		if not self.started_at:
+			return 0
+		end = self.finished_at or timezone.now()
+		return max((end - self.started_at).total_seconds(), 0)
+
+	@property
+	def rows_per_second(self):
+		elapsed = self.elapsed_seconds
+		return round(self.rows_processed / elapsed, 1) if elapsed else 0
+
+	def progress(self):
+		"""JSON-ready snapshot polled by the settings page"""
+		return {
+			"id": self.id,
+			"kind": self.kind,
+			"status": self.status,
+			"rows_processed": self.rows_processed,
+			"rows_written": self.rows_written,
+			"rows_per_second": self.rows_per_second,
+			"elapsed_seconds": round(self.elapsed_seconds, 1),
+			"error_count": self.error_count,
+			"errors": self.errors[:20],
+			"message": self.message,
+			"download_ready": self.kind == "export" and self.status == "done" and bool(self.output_file),
+		}
+
+
+class ModelVersion(models.Model):
+	"""
+	Change counter for one model, bumped after every committed write.
+
+	Kept in the database rather than the cache so a write made by any
+	process (web worker, data job, management command) is seen by all.
+	"""
+	label = models.CharField(max_length=100, primary_key=True)
+	version = models.BigIntegerField()
+
+	def __str__(self):
+		return f"{self.label} v{self.version}"
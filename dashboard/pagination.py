@@ -0,0 +1,77 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+	"""One page of a keyset-paginated queryset."""
+
+	def __init__(self, object_list, next_cursor, is_first):
+		self.object_list = object_list
+		self.next_cursor = next_cursor
+		self.is_first = is_first
+
+	def __iter__(self):
+		return iter(self.object_list)
+
+	def __len__(self):
+		return len(self.object_list)
+
+	@property
+	def has_next(self):
+		return self.next_cursor is not None
+
+
+def _cursor_value(value):
+	# Full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds
+	return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def encode_cursor(value, pk):
+	"""Pack a (sort value, id) key into an opaque URL-safe token"""
+	raw = json.dumps([value, pk], default=_cursor_value).encode('utf-8')
+	return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, field):
+	"""Unpack a cursor token for model `field`, returning None for anything malformed"""
+	if not token:
+		return None
+	try:
+		padded = token + '=' * (-len(token) % 4)
+		value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+		value = field.to_python(value)
+		pk = int(pk)
+	except (ValueError, TypeError, ValidationError):
+		return None
+	if value is None:
+		return None
+	return value, pk
+
+
+def keyset_paginate(queryset, cursor=None, page_size=50, field='created_at', descending=True):
+	"""
+	Return a KeysetPage of `queryset` ordered by (field, id), newest first by default.
+
+	Rows after the cursor are found with a range predicate on the composite
+	key instead of OFFSET, so page N costs the same as page 1 as long as
+	(field, id) is indexed. `field` must not be nullable.
+	"""
+	sign, after = ('-', 'lt') if descending else ('', 'gt')
+	queryset = queryset.order_by(f'{sign}{field}', f'{sign}id')
+	key = decode_cursor(cursor, queryset.model._meta.get_field(field))
+	if key is not None:
+		value, pk = key
+		queryset = queryset.filter(
+			Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk})
+		)
+
+	rows = list(queryset[:page_size + 1])
+	next_cursor = None
+	if len(rows) > page_size:
+		rows = rows[:page_size]
+		last = rows[-1]
+		next_cursor = encode_cursor(getattr(last, field), last.pk)
+	return KeysetPage(rows, next_cursor, is_first=key is None)
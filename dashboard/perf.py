@@ -0,0 +1,230 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+# Per-request timings are only collected for a sampled share of requests;
+# the rest pay for one random() call. See PERF_* in settings.
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_WINDOW = 500
+DEFAULT_DUPLICATE_THRESHOLD = 3
+PERCENTILES = (50, 95, 99)
+
+_current = ContextVar('perf_sample', default=None)
+
+
+class RequestSample:
+	"""Timings collected while serving one request"""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.wall = 0.0
+		self.sql_count = 0
+		self.sql_time = 0.0
+		self.template_time = 0.0
+		self.statements = Counter()
+
+	def __call__(self, execute, sql, params, many, context):
+		# connection.execute_wrapper hook: time every query the request runs
+		start = time.perf_counter()
+		try:
+			return execute(sql, params, many, context)
+		finally:
+			self.sql_time += time.perf_counter() - start
+			self.sql_count += 1
+			self.statements[sql] += 1
+
+	def duplicates(self, threshold):
+		"""(sql, count) for statements run at least `threshold` times: likely N+1 loops"""
+		return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def percentile(ordered, p):
+	"""Nearest-rank percentile of an already sorted list"""
+	if not ordered:
+		return 0.0
+	rank = max(math.ceil(p / 100 * len(ordered)), 1)
+	return ordered[rank - 1]
+
+
+class PerfStats:
+	"""
+	Rolling per-view timings, kept in this process's memory.
+
+	Each view keeps its last `window` samples, so percentiles follow recent
+	traffic and memory stays bounded however long the process runs.
+	"""
+
+	def __init__(self, window=DEFAULT_WINDOW):
+		self.window = window
+		self.lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			self.views = {}
+
+	def add(self, name, sample, duplicates):
+		with self.lock:
+			view = self.views.get(name)
+			if view is None:
+				view = self.views[name] = {
+					'requests': 0,
+					'samples': deque(maxlen=self.window),
+					'duplicates': Counter(),
+				}
+			view['requests'] += 1
+			view['samples'].append((sample.wall, sample.sql_count, sample.sql_time, sample.template_time))
+			for sql, count in duplicates:
+				view['duplicates'][sql] = max(view['duplicates'][sql], count)
+
+	def summary(self):
+		"""One row per view, slowest p95 first"""
+		with self.lock:
+			views = [(name, view['requests'], list(view['samples']), view['duplicates'].most_common(3)) for name, view in self.views.items()]
+		rows = []
+		for name, requests, samples, duplicates in views:
+			walls = sorted(sample[0] for sample in samples)
+			count = len(samples)
+			rows.append({
+				'view': name,
+				'requests': requests,
+				'samples': count,
+				**{f'p{p}': percentile(walls, p) * 1000 for p in PERCENTILES},
+				'avg_queries': sum(sample[1] for sample in samples) / count,
+				'max_queries': max(sample[1] for sample in samples),
+				'avg_sql_ms': sum(sample[2] for sample in samples) / count * 1000,
+				'avg_template_ms': sum(sample[3] for sample in samples) / count * 1000,
+				'duplicates': duplicates,
+			})
+		rows.sort(key=lambda row: row['p95'], reverse=True)
+		return rows
+
+
+stats = PerfStats(getattr(settings, 'PERF_WINDOW', DEFAULT_WINDOW))
+
+_sink_lock = threading.Lock()
+
+# Marks the end of a streamed body, since any other value could be a chunk
+_END = object()
+
+
+def _write_sink(path, record):
+	with _sink_lock, open(path, 'a', encoding='utf-8') as sink:
+		sink.write(json.dumps(record) + '\n')
+
+
+@contextmanager
+def _sampling(sample):
+	"""Count the queries and template renders made inside the block towards `sample`"""
+	token = _current.set(sample)
+	try:
+		with ExitStack() as stack:
+			for connection in connections.all():
+				stack.enter_context(connection.execute_wrapper(sample))
+			yield
+	finally:
+		_current.reset(token)
+
+
+class PerfMiddleware:
+	"""
+	Time sampled requests: wall clock, SQL count and time, repeated
+	statements and template rendering, recorded under the URL name.
+	"""
+
+	# URL names that are never recorded (the panel itself)
+	ignore = {'perf_panel'}
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)
+		self.threshold = getattr(settings, 'PERF_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD)
+		self.sink = getattr(settings, 'PERF_LOG_FILE', None)
+
+	def __call__(self, request):
+		if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+			return self.get_response(request)
+
+		sample = RequestSample()
+		with _sampling(sample):
+			response = self.get_response(request)
+
+		if response.streaming and not response.is_async:
+			# The body is produced while the server sends it, so the request
+			# is only recorded once the last chunk has gone out
+			response.streaming_content = self._timed_stream(response.streaming_content, sample, request, response)
+		else:
+			self.record(request, response, sample)
+		return response
+
+	def _timed_stream(self, content, sample, request, response):
+		"""Yield `content`, counting each chunk's queries and time towards `sample`"""
+		chunks = iter(content)
+		try:
+			while True:
+				with _sampling(sample):
+					chunk = next(chunks, _END)
+				if chunk is _END:
+					break
+				yield chunk
+		finally:
+			# Also reached when the client disconnects and the server closes the stream
+			self.record(request, response, sample)
+
+	def record(self, request, response, sample):
+		sample.wall = time.perf_counter() - sample.started
+
+		match = request.resolver_match
+		name = match.view_name if match else 'unresolved'
+		if name in self.ignore:
+			return
+		duplicates = sample.duplicates(self.threshold)
+		stats.add(name, sample, duplicates)
+		if self.sink:
+			_write_sink(self.sink, {
+				'view': name,
+				'path': request.path,
+				'status': response.status_code,
+				'wall_ms': round(sample.wall * 1000, 2),
+				'queries': sample.sql_count,
+				'sql_ms': round(sample.sql_time * 1000, 2),
+				'template_ms': round(sample.template_time * 1000, 2),
+				'duplicates': [[sql, count] for sql, count in duplicates],
+			})
+
+
+class _TimedTemplate:
+	def __init__(self, template):
+		self.template = template
+
+	def __getattr__(self, name):
+		return getattr(self.template, name)
+
+	def render(self, context=None, request=None):
+		sample = _current.get()
+		if sample is None:
+			return self.template.render(context, request)
+		start = time.perf_counter()
+		try:
+			return self.template.render(context, request)
+		finally:
+			sample.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+	"""The Django template backend, adding render time to the sampled request"""
+
+	def from_string(self, template_code):
+		return _TimedTemplate(super().from_string(template_code))
+
+	def get_template(self, template_name):
+		return _TimedTemplate(super().get_template(template_name))
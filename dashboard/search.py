@@ -0,0 +1,22 @@
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+# Sorts after every character, so prefix + PREFIX_END bounds all strings starting with prefix
+PREFIX_END = '\U0010ffff'
+
+
+def starts_with(field, prefix):
+	"""
+	Case-insensitive "`field` starts with `prefix`" as a range on Lower(field).
+
+	istartswith compiles to LIKE, which SQLite cannot answer from an index
+	on a case-sensitive column; a range on Lower(field) can search an index
+	on that expression. Both sides are lowered by the database, so the match
+	folds case exactly as far as istartswith did.
+	"""
+	lowered = Lower(Value(prefix))
+	return Q(
+		GreaterThanOrEqual(Lower(field), lowered),
+		LessThan(Lower(field), Concat(lowered, Value(PREFIX_END))),
+	)
@@ -0,0 +1,265 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from finance.models import Employee, Expense, SalaryPayment, SundryCreditor, SundryDebtor
+from inventory.models import InventoryItem, StockMovement
+from rooms.models import Guest, Room
+from sales.models import FoodItem, PaymentDetail, SalesBill, SalesBillItem
+from sales.totals import set_totals
+
+from .imports import bulk_create_keeping_timestamps
+from .kpis import bump_on_commit
+
+SEED_BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Kabir', 'Meera', 'Rohan', 'Ananya', 'Vikram', 'Priya', 'Arjun', 'Sara', 'Nikhil', 'Leela']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Khan', 'Das', 'Reddy', 'Mehta', 'Nair', 'Bose', 'Gill', 'Rao', 'Joshi']
+DISHES = ['Tea', 'Coffee', 'Dal', 'Paneer', 'Biryani', 'Naan', 'Soup', 'Salad', 'Curry', 'Lassi', 'Dosa', 'Thali']
+STOCK = [('Rice', 'kg'), ('Flour', 'kg'), ('Milk', 'l'), ('Oil', 'l'), ('Eggs', 'pcs'), ('Soap', 'pcs'), ('Towels', 'pcs')]
+ROOM_PRICES = {'single': Decimal('1500'), 'double': Decimal('2500'), 'suite': Decimal('6000')}
+CENTS = Decimal('0.01')
+
+
+def _next_id(model):
+	return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def _money(rng, low, high):
+	return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def _person(rng):
+	return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def seed_catalogue(rng, food_items, inventory_items, now):
+	"""Menu and inventory items, each stocked by one opening receipt"""
+	first = _next_id(FoodItem)
+	foods = [
+		FoodItem(id=first + number, name=f'{rng.choice(DISHES)} {number + 1}', price=_money(rng, 40, 600))
+		for number in range(food_items)
+	]
+	FoodItem.objects.bulk_create(foods)
+
+	first = _next_id(InventoryItem)
+	items = []
+	for number in range(inventory_items):
+		name, unit = rng.choice(STOCK)
+		items.append(InventoryItem(
+			id=first + number,
+			name=f'{name} {number + 1}',
+			quantity=rng.randint(0, 500),
+			unit=unit,
+			price_per_unit=_money(rng, 5, 400),
+			reorder_level=rng.choice([0, 10, 25, 50]),
+			lead_time_days=rng.randint(0, 10),
+		))
+	InventoryItem.objects.bulk_create(items)
+	StockMovement.objects.bulk_create([
+		StockMovement(
+			item_id=item.id,
+			kind=StockMovement.RECEIPT,
+			quantity=item.quantity,
+			unit_cost=item.price_per_unit,
+			reference='OPENING',
+			created_at=now,
+		)
+		for item in items if item.quantity
+	])
+	return foods, len(items)
+
+
+def seed_rooms(rng, rooms, start, end, batch_size):
+	"""`rooms` rooms, each booked back to back with short gaps from `start` to `end`"""
+	first = _next_id(Room)
+	room_objects = []
+	for number in range(rooms):
+		room_type = rng.choice(list(ROOM_PRICES))
+		room_objects.append(Room(
+			id=first + number,
+			number=f'S{first + number}',
+			room_type=room_type,
+			price_per_night=ROOM_PRICES[room_type],
+		))
+	Room.objects.bulk_create(room_objects)
+
+	# Guest.save() checks for double bookings one row at a time; the stays
+	# generated here never overlap, so they go straight in with bulk_create
+	guests = []
+	for room in room_objects:
+		day = start + timedelta(days=rng.randint(0, 3))
+		while day < end:
+			check_out = day + timedelta(days=rng.randint(1, 7))
+			first_name, last_name = _person(rng).split()
+			guests.append(Guest(first_name=first_name, last_name=last_name, check_in=day, check_out=check_out, room_id=room.id))
+			day = check_out + timedelta(days=rng.randint(0, 4))
+	Guest.objects.bulk_create(guests, batch_size=batch_size)
+	return room_objects, len(guests)
+
+
+def seed_sales(rng, bills, start, now, foods, rooms, batch_size, progress=None):
+	"""
+	`bills` sales bills spread evenly from `start` to `now`, oldest first.
+
+	Each batch of bills, lines and payments is inserted in one transaction
+	with explicit ids, and the bills' denormalized totals are filled in as
+	they are generated, so nothing has to be reconciled per row afterwards.
+	"""
+	span = (now - start).total_seconds()
+	bill_id = _next_id(SalesBill)
+	line_id = _next_id(SalesBillItem)
+	payment_id = _next_id(PaymentDetail)
+	methods = [method for method, _label in PaymentDetail.PAYMENT_METHODS]
+	offsets = sorted(rng.random() * span for _ in range(bills))
+
+	for batch_start in range(0, bills, batch_size):
+		bill_objects, lines, payments = [], [], []
+		for offset in offsets[batch_start:batch_start + batch_size]:
+			room = rng.choice(rooms) if rooms and rng.random() < 0.3 else None
+			items_total = Decimal('0')
+			for food in rng.sample(foods, min(rng.randint(1, 4), len(foods))):
+				quantity = rng.randint(1, 3)
+				lines.append(SalesBillItem(id=line_id, sales_bill_id=bill_id, food_item_id=food.id, quantity=quantity, price=food.price))
+				items_total += food.price * quantity
+				line_id += 1
+
+			room_charge = room.price_per_night if room else Decimal('0')
+			percentage = rng.choice([0, 0, 0, 0, 5, 10])
+			discount = ((items_total + room_charge) * percentage / 100).quantize(CENTS)
+			bill = SalesBill(
+				id=bill_id,
+				created_at=start + timedelta(seconds=offset),
+				guest_name=_person(rng),
+				room_id=room.id if room else None,
+				room_charge=room_charge,
+				discount_percentage=percentage,
+				discount_amount=discount,
+				total_amount=items_total + room_charge - discount,
+			)
+
+			# Mostly paid in full with one method; some split, a few left owing
+			paid = bill.total_amount if rng.random() < 0.95 else (bill.total_amount / 2).quantize(CENTS)
+			if paid and rng.random() < 0.2:
+				part = (paid / 3).quantize(CENTS)
+				bill_payments = [(rng.choice(methods), part), (rng.choice(methods), paid - part)]
+			else:
+				bill_payments = [(rng.choice(methods), paid)] if paid else []
+			for method, amount in bill_payments:
+				payments.append(PaymentDetail(id=payment_id, sales_bill_id=bill_id, payment_method=method, amount=amount))
+				payment_id += 1
+			set_totals(bill, items_total, bill_payments)
+			bill_objects.append(bill)
+			bill_id += 1
+
+		with transaction.atomic():
+			bulk_create_keeping_timestamps(SalesBill, bill_objects, batch_size)
+			SalesBillItem.objects.bulk_create(lines, batch_size=batch_size)
+			PaymentDetail.objects.bulk_create(payments, batch_size=batch_size)
+		if progress:
+			progress(min(batch_start + batch_size, bills), bills)
+	return bills
+
+
+def seed_finance(rng, start, today, employees, expenses, debtors, creditors, batch_size):
+	"""Staff with monthly salary payments, expenses and open/settled debtors and creditors"""
+	days = (today - start).days
+	staff = [
+		Employee(
+			name=_person(rng),
+			position=rng.choice(Employee.POSITION_CHOICES)[0],
+			phone=f'98{rng.randint(10000000, 99999999)}',
+			address='Seeded',
+			monthly_salary=Decimal(rng.randint(12, 80) * 1000),
+			date_joined=start + timedelta(days=rng.randint(0, days // 2)),
+			is_active=rng.random() < 0.9,
+		)
+		for _ in range(employees)
+	]
+	first = _next_id(Employee)
+	for number, employee in enumerate(staff):
+		employee.id = first + number
+	Employee.objects.bulk_create(staff)
+
+	salaries = []
+	for employee in staff:
+		month = employee.date_joined.replace(day=1)
+		while month <= today:
+			salaries.append(SalaryPayment(
+				employee_id=employee.id,
+				amount=employee.monthly_salary,
+				payment_date=month,
+				month=f'{month:%B %Y}',
+			))
+			month = (month + timedelta(days=32)).replace(day=1)
+	SalaryPayment.objects.bulk_create(salaries, batch_size=batch_size)
+
+	categories = [key for key, _label in Expense.CATEGORY_CHOICES]
+	Expense.objects.bulk_create([
+		Expense(
+			title=f'Expense {number + 1}',
+			amount=_money(rng, 100, 20000),
+			category=rng.choice(categories),
+			date=start + timedelta(days=rng.randint(0, days)),
+		)
+		for number in range(expenses)
+	], batch_size=batch_size)
+
+	def accounts(model, amount_field, count):
+		rows = []
+		for _ in range(count):
+			due = start + timedelta(days=rng.randint(0, days + 60))
+			is_paid = due < today and rng.random() < 0.7
+			rows.append(model(**{
+				'name': _person(rng),
+				'contact': f'97{rng.randint(10000000, 99999999)}',
+				amount_field: _money(rng, 500, 50000),
+				'due_date': due,
+				'is_paid': is_paid,
+				'payment_date': due if is_paid else None,
+			}))
+		model.objects.bulk_create(rows, batch_size=batch_size)
+
+	accounts(SundryDebtor, 'amount_due', debtors)
+	accounts(SundryCreditor, 'amount_payable', creditors)
+	return len(staff) + len(salaries) + expenses + debtors + creditors
+
+
+def seed(bills=10000, rooms=50, years=2, food_items=60, inventory_items=200, employees=30,
+		expenses=5000, debtors=1000, creditors=1000, random_seed=1, batch_size=SEED_BATCH_SIZE, progress=None):
+	"""
+	Fill the database with a reproducible, realistically shaped data set.
+
+	The same `random_seed` and sizes always produce the same rows, so
+	benchmark runs against separately seeded databases are comparable.
+	Rows are appended; nothing already in the database is touched. Returns
+	{label: rows written}.
+	"""
+	from sales.rollups import rebuild_daily_summaries, rebuild_item_sales
+	from inventory.valuation import verify_valuation
+
+	rng = random.Random(random_seed)
+	now = timezone.now()
+	start = now - timedelta(days=365 * years)
+	counts = {}
+
+	foods, counts['inventory items'] = seed_catalogue(rng, food_items, inventory_items, now)
+	counts['food items'] = len(foods)
+	room_objects, counts['guests'] = seed_rooms(rng, rooms, start.date(), now.date(), batch_size)
+	counts['rooms'] = len(room_objects)
+	counts['bills'] = seed_sales(rng, bills, start, now, foods, room_objects, batch_size, progress) if foods else 0
+	counts['finance'] = seed_finance(rng, start.date(), now.date(), employees, expenses, debtors, creditors, batch_size)
+
+	# bulk_create bypasses the signals that keep these up to date
+	rebuild_daily_summaries()
+	rebuild_item_sales()
+	verify_valuation()
+	bump_on_commit(
+		FoodItem, InventoryItem, StockMovement, Room, Guest, SalesBill, SalesBillItem, PaymentDetail,
+		Employee, SalaryPayment, Expense, SundryDebtor, SundryCreditor,
+	)
+	return counts
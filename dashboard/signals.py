@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .kpis import bump_on_commit
+
+# Apps whose models carry a change version. Every save or delete bumps the
+# model's version, which invalidates cached KPIs and reports and changes
+# the ETag of the pages that read it.
+VERSIONED_APPS = ('sales', 'rooms', 'inventory', 'finance')
+
+
+def invalidate_kpis(sender, **kwargs):
+	bump_on_commit(sender)
+
+
+for app_label in VERSIONED_APPS:
+	for model in apps.get_app_config(app_label).get_models():
+		label = model._meta.label_lower
+		post_save.connect(invalidate_kpis, sender=model, dispatch_uid=f'kpi_save_{label}')
+		post_delete.connect(invalidate_kpis, sender=model, dispatch_uid=f'kpi_delete_{label}')
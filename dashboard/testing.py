@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def query_plan(query, params=None):
+	"""
+	Query plan for a QuerySet, or for raw SQL `query` with `params`.
+
+	Returns the plan as text, one step per line.
+	"""
+	if hasattr(query, 'explain'):
+		return query.explain()
+	with connection.cursor() as cursor:
+		cursor.execute(connection.ops.explain_query_prefix() + ' ' + query, params)
+		return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+# Bookkeeping tables that are read whole on purpose: the version table
+# once per request, and the cache table when DatabaseCache counts its rows
+ALWAYS_ALLOWED = ('dashboard_modelversion', 'dashboard_cache')
+
+
+def full_scans(plan, allow=()):
+	"""
+	Plan lines that read a whole table rather than searching an index.
+
+	Walking a whole index (SCAN ... USING INDEX) still reads every row, so
+	it counts too. Tables named in `allow` (and ALWAYS_ALLOWED) are skipped.
+	"""
+	allow = (*allow, *ALWAYS_ALLOWED)
+	scans = []
+	for line in plan.splitlines():
+		if 'Seq Scan' in line:
+			scans.append(line)
+		elif 'SCAN ' in line and 'CONSTANT ROW' not in line:
+			if not any(f'SCAN {table} ' in f'{line} ' for table in allow):
+				scans.append(line)
+	return scans
+
+
+class QueryPlanAssertions:
+	"""TestCase mixin that fails when a query falls back to a full table scan"""
+
+	def assertUsesIndex(self, query, params=None, allow=()):
+		plan = query_plan(query, params)
+		if full_scans(plan, allow):
+			self.fail(f'Full table scan in query plan:\n{plan}\nfor query:\n{query}')
+		return plan
+
+	def assertViewUsesIndexes(self, url, allow=()):
+		"""GET `url` and check the plan of every SELECT it ran"""
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		for query in context.captured_queries:
+			if query['sql'].lstrip().upper().startswith('SELECT'):
+				self.assertUsesIndex(query['sql'], allow=allow)
+		return response
@@ -1,3 +1,761 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+import warnings
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core import serializers
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Count, F, Sum
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from finance.models import Employee, Expense, SalaryPayment, SundryDebtor
+from finance.periods import close_period
+from finance.reports import balance_sheet_totals, sum_many
+from inventory.models import InventoryItem, StockMovement
+from inventory.stock import create_checkpoints, record_movement, stock_on
+from rooms.models import Guest, Room
+from sales.models import DailySalesSummary, FoodItem, PaymentDetail, RecipeIngredient, SalesBill
+from sales.posting import post_bill
+from sales.rollups import rebuild_daily_summaries, rebuild_item_sales
+from sales.totals import reconcile_bill_totals
+from inventory.valuation import verify_valuation
+
+from .benchmark import benchmark_urls, measure, over_budget, run_benchmarks
+from .cashup import cash_up, shift_window
+from .charts import chart_options, sales_chart
+from .db import ReportsRouter, reading_reports, reports_database
+from .exports import EXPORT_TABLES, export_stream
+from .imports import run_import
+from .jobs import claim_next_job, run_job
+from .kpis import bump_version, cached_kpi, model_versions
+from .models import DataJob
+from .perf import PerfMiddleware, percentile, stats as perf_stats
+from .seeding import seed
+from .views import DELETE_ALL_MODELS, delete_all_data
+from .testing import QueryPlanAssertions
+
+
+class DashboardQueryPlanTests(QueryPlanAssertions, TestCase):
+	"""The dashboard's KPI and chart queries must stay on indexes"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('planner', password='secret')
+		start = date(2026, 1, 1)
+		for i in range(90):
+			DailySalesSummary.objects.create(day=start + timedelta(days=i), bill_count=1, gross_amount=Decimal('10'), net_amount=Decimal('10'))
+
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(self.user)
+
+	def test_chart_range(self):
+		self.assertUsesIndex(DailySalesSummary.objects.filter(day__gte=date(2026, 2, 1), day__lte=date(2026, 2, 28)))
+
+	def test_dashboard(self):
+		# The all-time sales totals read the whole daily rollup, and the reorder
+		# list walks the partial index that holds only the items running low
+		self.assertViewUsesIndexes('/dashboard/', allow=('sales_dailysalessummary', 'inventory_inventoryitem'))
+
+
+class SalesChartTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		start = date(2026, 1, 1)
+		for i in range(90):
+			DailySalesSummary.objects.create(day=start + timedelta(days=i), bill_count=1, gross_amount=Decimal('10'), net_amount=Decimal('10'))
+
+	def test_chart_options(self):
+		self.assertEqual(chart_options('bogus', 'hour'), ('week', 'day'))
+		self.assertEqual(chart_options('year', None), ('year', 'month'))
+		self.assertEqual(chart_options('quarter', 'day'), ('quarter', 'day'))
+
+	def test_first_bucket_is_whole(self):
+		# Wednesday: the 7-day window starts on Thursday the 19th, so the
+		# first week reaches back to Monday the 16th
+		labels, amounts = sales_chart(date(2026, 3, 25), 'week', 'week')
+		self.assertEqual(labels, ['Wk Mar 16', 'Wk Mar 23'])
+		self.assertEqual(amounts, [70.0, 30.0])
+
+	def test_year_by_month(self):
+		labels, amounts = sales_chart(date(2026, 3, 31), 'year', 'month')
+		self.assertEqual(labels[0], 'Apr 2025')
+		self.assertEqual(labels[-3:], ['Jan 2026', 'Feb 2026', 'Mar 2026'])
+		self.assertEqual(amounts, [0.0] * 9 + [310.0, 280.0, 310.0])
+
+
+class CashUpTests(QueryPlanAssertions, TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('cashier', password='secret')
+		tea = FoodItem.objects.create(name='Tea', price=Decimal('10'))
+
+		def bill(hour, payments, day=date(2026, 5, 4)):
+			posted = post_bill(SalesBill(guest_name=f'Guest {hour}'), [(tea.pk, 1)], payments)
+			created = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour))
+			SalesBill.objects.filter(pk=posted.pk).update(created_at=created)
+			return posted
+
+		cls.paid = bill(7, [('cash', Decimal('6')), ('card', Decimal('4'))])
+		cls.underpaid = bill(9, [('cash', Decimal('8'))])
+		cls.overpaid = bill(13, [('upi', Decimal('12'))])
+		bill(15, [('cash', Decimal('10'))])
+		bill(23, [('card', Decimal('10'))])
+
+	def test_morning_shift(self):
+		report = cash_up(*shift_window(date(2026, 5, 4), 'morning'))
+		methods = {row['method']: (row['bill_count'], row['total']) for row in report['methods']}
+		self.assertEqual(methods, {
+			'cash': (2, Decimal('14.00')),
+			'card': (1, Decimal('4.00')),
+			'online': (0, Decimal('0.00')),
+			'upi': (1, Decimal('12.00')),
+		})
+		self.assertEqual((report['bill_count'], report['billed'], report['collected']), (3, Decimal('30.00'), Decimal('30.00')))
+		self.assertEqual(report['outstanding'], Decimal('0.00'))
+		self.assertEqual(report['underpaid'], [self.underpaid])
+		self.assertEqual(report['overpaid'], [self.overpaid])
+
+	def test_night_shift_crosses_midnight(self):
+		start, end = shift_window(date(2026, 5, 4), 'night')
+		self.assertEqual(end - start, timedelta(hours=8))
+		report = cash_up(start, end)
+		self.assertEqual(report['bill_count'], 1)
+		self.assertEqual(report['collected'], Decimal('10.00'))
+
+	def test_payment_totals_use_indexes(self):
+		start, end = shift_window(date(2026, 5, 4), 'day')
+		self.assertUsesIndex(
+			PaymentDetail.objects.filter(sales_bill__created_at__gte=start, sales_bill__created_at__lt=end)
+			.values('payment_method')
+			.annotate(total=Sum('amount'))
+			.order_by()
+		)
+
+	def test_csv_download(self):
+		self.client.force_login(self.user)
+		response = self.client.get('/dashboard/sales-bills/cash-up/?date=2026-05-04&shift=morning&format=csv')
+		self.assertEqual(response['Content-Type'], 'text/csv')
+		rows = response.content.decode().splitlines()
+		self.assertIn('Cash,2,2,14.00', rows)
+		self.assertTrue(any(row.startswith(f'underpaid,{self.underpaid.pk},') for row in rows))
+
+	def test_custom_window_page(self):
+		self.client.force_login(self.user)
+		response = self.client.get('/dashboard/sales-bills/cash-up/?start=2026-05-04T14:00&end=2026-05-05T00:00')
+		self.assertEqual(response.context['report']['bill_count'], 2)
+		self.assertContains(response, 'Underpaid Bills')
+
+	def test_custom_window_mixing_naive_and_offset_times(self):
+		self.client.force_login(self.user)
+		# Naive start in UTC, end with an explicit offset: 2026-05-04 18:30 UTC
+		response = self.client.get('/dashboard/sales-bills/cash-up/?start=2026-05-04T14:00&end=2026-05-05T00:00%2B05:30')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context['shift'], 'custom')
+		self.assertEqual(response.context['end'], timezone.make_aware(datetime(2026, 5, 4, 18, 30)))
+		# Out-of-range values fall back to the shift preset
+		response = self.client.get('/dashboard/sales-bills/cash-up/?start=2026-05-04T25:00&end=2026-05-05T00:00')
+		self.assertEqual((response.status_code, response.context['shift']), (200, 'day'))
+
+
+class ConditionalGetTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('manager', password='secret')
+		cls.other = User.objects.create_user('clerk', password='secret')
+
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(self.user)
+
+	def revalidate(self, url, etag):
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		return response, [query['sql'] for query in context.captured_queries]
+
+	def test_unchanged_pages_answer_304_from_versions(self):
+		for url in ('/dashboard/', '/dashboard/inventory/', '/dashboard/sales-bills/', '/finance/balance-sheet/', '/finance/expenses/'):
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			self.assertIn('no-cache', response['Cache-Control'])
+			response, queries = self.revalidate(url, response['ETag'])
+			self.assertEqual(response.status_code, 304, url)
+			# Only the session, the user and the version table are read
+			self.assertEqual(len(queries), 3, queries)
+			self.assertTrue(all(table in sql for table, sql in zip(('django_session', 'auth_user', 'dashboard_modelversion'), queries)))
+
+	def test_writes_change_the_etag(self):
+		etag = self.client.get('/finance/expenses/')['ETag']
+		with self.captureOnCommitCallbacks(execute=True):
+			Expense.objects.create(title='Diesel', amount=Decimal('40'), category='transport', date=date(2026, 5, 1))
+		self.assertEqual(self.client.get('/finance/expenses/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+		etag = self.client.get('/dashboard/')['ETag']
+		with self.captureOnCommitCallbacks(execute=True):
+			InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('1'))
+		self.assertEqual(self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_writes_from_another_process_change_the_etag(self):
+		etag = self.client.get('/finance/balance-sheet/')['ETag']
+		# A command or data job in another process shares only the database
+		# with this worker: write the way it does, with nothing cached here
+		Expense.objects.create(title='Diesel', amount=Decimal('40'), category='transport', date=date(2026, 5, 1))
+		cache.clear()
+		bump_version(Expense)
+		response = self.client.get('/finance/balance-sheet/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertContains(response, '40')
+
+		etag = self.client.get('/dashboard/')['ETag']
+		# The rebuild bumps the rollup's version once it commits
+		with self.captureOnCommitCallbacks(execute=True):
+			call_command('rebuild_sales_summary', stdout=io.StringIO())
+		self.assertEqual(self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_etag_is_per_user_and_skipped_for_flash_messages(self):
+		etag = self.client.get('/dashboard/inventory/')['ETag']
+		self.client.force_login(self.other)
+		self.assertEqual(self.client.get('/dashboard/inventory/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+		rice = InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('1'))
+		RecipeIngredient.objects.create(food_item=FoodItem.objects.create(name='Biryani', price=Decimal('9')), inventory_item=rice, quantity=1)
+		etag = self.client.get('/dashboard/inventory/')['ETag']
+		# A refused delete changes nothing, but its error must still be shown
+		self.client.post(f'/dashboard/inventory/{rice.pk}/delete/')
+		response = self.client.get('/dashboard/inventory/', HTTP_IF_NONE_MATCH=etag)
+		self.assertContains(response, 'is used in a recipe')
+		self.assertFalse(response.has_header('ETag'))
+		self.assertEqual(self.client.get('/dashboard/inventory/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class CachedKpiTests(TestCase):
+
+	def setUp(self):
+		cache.clear()
+		self.calls = []
+
+	def compute(self, *args):
+		self.calls.append(args)
+		return len(self.calls)
+
+	def test_hit_until_a_model_is_bumped(self):
+		self.assertEqual(cached_kpi('test', [Expense, SalesBill], self.compute, 'a'), 1)
+		self.assertEqual(cached_kpi('test', [Expense, SalesBill], self.compute, 'a'), 1)
+		# Arguments are part of the key
+		self.assertEqual(cached_kpi('test', [Expense, SalesBill], self.compute, 'b'), 2)
+		bump_version(InventoryItem)
+		self.assertEqual(cached_kpi('test', [Expense, SalesBill], self.compute, 'a'), 1)
+		bump_version(SalesBill)
+		self.assertEqual(cached_kpi('test', [Expense, SalesBill], self.compute, 'a'), 3)
+		self.assertEqual(self.calls, [('a',), ('b',), ('a',)])
+
+	def test_key_stays_short_for_many_models(self):
+		from finance.views import BALANCE_SHEET_MODELS
+		with warnings.catch_warnings():
+			warnings.simplefilter('error', CacheKeyWarning)
+			cached_kpi('balance_sheet', BALANCE_SHEET_MODELS, self.compute, date(2026, 3, 31))
+			self.assertEqual(cached_kpi('balance_sheet', BALANCE_SHEET_MODELS, self.compute, date(2026, 3, 31)), 1)
+
+	def test_sales_kpis_follow_the_rollup(self):
+		user = User.objects.create_user('clerk', password='secret')
+		self.client.force_login(user)
+		self.assertEqual(self.client.get('/dashboard/').context['sales_count'], 0)
+		# Bumps the rollup's version and nothing else
+		with self.captureOnCommitCallbacks(execute=True):
+			DailySalesSummary.objects.create(day=timezone.localdate(), bill_count=2, net_amount=Decimal('20'))
+		self.assertEqual(self.client.get('/dashboard/').context['sales_count'], 2)
+
+	def test_versions_survive_a_cleared_cache(self):
+		# Another worker's cache may be empty or hold different entries;
+		# the versions come from the database, so it still misses after a bump
+		cached_kpi('test', [Expense], self.compute)
+		cache.clear()
+		bump_version(Expense)
+		cached_kpi('test', [Expense], self.compute)
+		cached_kpi('test', [Expense], self.compute)
+		self.assertEqual(len(self.calls), 2)
+
+
+class PerfPanelTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+		tea = FoodItem.objects.create(name='Tea', price=Decimal('10'))
+		for i in range(5):
+			post_bill(SalesBill(guest_name=f'Guest {i}'), [(tea.pk, 1)], [('cash', Decimal('10'))])
+
+	def setUp(self):
+		cache.clear()
+		perf_stats.reset()
+
+	def test_requests_are_recorded_by_url_name(self):
+		self.client.force_login(self.staff)
+		for _ in range(3):
+			self.client.get('/dashboard/sales-bills/')
+		self.client.get('/finance/balance-sheet/')
+		rows = {row['view']: row for row in perf_stats.summary()}
+		self.assertEqual(set(rows), {'sales_bill_list', 'balance_sheet'})
+		bills = rows['sales_bill_list']
+		self.assertEqual(bills['requests'], 3)
+		self.assertGreater(bills['max_queries'], 0)
+		self.assertGreater(bills['avg_template_ms'], 0)
+		self.assertLessEqual(bills['p50'], bills['p99'])
+		self.assertEqual(bills['duplicates'], [])
+
+		response = self.client.get('/dashboard/_perf/')
+		self.assertContains(response, 'sales_bill_list')
+		self.assertNotIn('perf_panel', {row['view'] for row in perf_stats.summary()})
+		self.assertEqual(len(self.client.get('/dashboard/_perf/?format=json').json()['views']), 2)
+
+	def test_staff_only(self):
+		self.client.force_login(User.objects.create_user('clerk', password='secret'))
+		self.assertEqual(self.client.get('/dashboard/_perf/').status_code, 302)
+
+	def test_repeated_statements_are_flagged(self):
+		def loop(request):
+			for bill in SalesBill.objects.all():
+				bill.payments.count()
+			return HttpResponse()
+
+		request = RequestFactory().get('/dashboard/sales-bills/')
+		request.resolver_match = resolve('/dashboard/sales-bills/')
+		PerfMiddleware(loop)(request)
+		(row,) = perf_stats.summary()
+		((sql, count),) = row['duplicates']
+		self.assertEqual((row['max_queries'], count), (6, 5))
+		self.assertIn('sales_paymentdetail', sql)
+
+	def test_streaming_response_is_timed_until_the_body_is_sent(self):
+		def rows():
+			for bill in SalesBill.objects.order_by('pk'):
+				yield f'{bill.pk},{bill.payments.count()}\n'
+
+		request = RequestFactory().get('/dashboard/sales-bills/')
+		request.resolver_match = resolve('/dashboard/sales-bills/')
+		response = PerfMiddleware(lambda request: StreamingHttpResponse(rows()))(request)
+		self.assertEqual(perf_stats.summary(), [])
+		body = b''.join(response.streaming_content)
+		self.assertEqual(body.count(b'\n'), 5)
+		(row,) = perf_stats.summary()
+		self.assertEqual(row['max_queries'], 6)
+		self.assertEqual(len(row['duplicates']), 1)
+
+	def test_abandoned_stream_is_still_recorded(self):
+		request = RequestFactory().get('/dashboard/sales-bills/')
+		request.resolver_match = resolve('/dashboard/sales-bills/')
+		response = PerfMiddleware(lambda request: StreamingHttpResponse(iter([b'a', b'b'])))(request)
+		next(iter(response))
+		response.close()
+		self.assertEqual(perf_stats.summary()[0]['requests'], 1)
+
+	@override_settings(PERF_SAMPLE_RATE=0)
+	def test_sampling_off(self):
+		self.client.force_login(self.staff)
+		self.client.get('/dashboard/sales-bills/')
+		self.assertEqual(perf_stats.summary(), [])
+
+	def test_percentile(self):
+		self.assertEqual([percentile(list(range(1, 101)), p) for p in (50, 95, 99)], [50, 95, 99])
+		self.assertEqual(percentile([7.0], 99), 7.0)
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.counts = seed(bills=300, rooms=5, years=1, food_items=8, inventory_items=10, employees=4,
+			expenses=50, debtors=20, creditors=20, batch_size=100)
+		cls.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+
+	def setUp(self):
+		cache.clear()
+
+	def test_seeded_data_is_consistent(self):
+		self.assertEqual(SalesBill.objects.count(), 300)
+		self.assertEqual(reconcile_bill_totals(fix=False), [])
+		self.assertEqual(verify_valuation(fix=False), [])
+		summaries = list(DailySalesSummary.objects.values_list('day', 'bill_count', 'net_amount', 'cash_amount'))
+		rebuild_daily_summaries()
+		self.assertEqual(summaries, list(DailySalesSummary.objects.values_list('day', 'bill_count', 'net_amount', 'cash_amount')))
+		self.assertFalse(SalesBill.objects.annotate(lines=Count('salesbillitem')).filter(lines=0).exists())
+
+	def test_seed_is_reproducible(self):
+		names = list(SalesBill.objects.order_by('pk').values_list('guest_name', 'total_amount')[:50])
+		seed(bills=300, rooms=5, years=1, food_items=8, inventory_items=10, employees=4,
+			expenses=50, debtors=20, creditors=20, batch_size=100)
+		again = list(SalesBill.objects.order_by('pk').values_list('guest_name', 'total_amount')[300:350])
+		self.assertEqual(names, again)
+
+	def test_every_page_answers(self):
+		self.client.force_login(self.staff)
+		urls = dict(benchmark_urls())
+		self.assertIn('sales_bill_detail', urls)
+		self.assertIn('balance_sheet', urls)
+		results = run_benchmarks(self.client, repeat=2)
+		self.assertEqual(over_budget(results, {}), [])
+		self.assertTrue(all(result['queries'] > 0 for result in results.values()))
+
+	def test_budget(self):
+		results = {'dashboard': {'status': 200, 'ms': 50.0, 'queries': 8}}
+		self.assertEqual(over_budget(results, {'dashboard': {'ms': 40.0, 'queries': 8}}), [])
+		self.assertEqual(
+			over_budget(results, {'dashboard': {'ms': 10.0, 'queries': 6}}),
+			['dashboard: 8 queries, budget 6', 'dashboard: 50.0 ms, budget 35.0 ms'],
+		)
+
+	def test_command_compares_with_baseline(self):
+		with tempfile.TemporaryDirectory() as directory:
+			baseline = os.path.join(directory, 'baseline.json')
+			call_command('run_benchmarks', baseline=baseline, update_baseline=True, repeat=1, stdout=io.StringIO())
+			call_command('run_benchmarks', baseline=baseline, repeat=1, slack_ms=1000, stdout=io.StringIO())
+			with open(baseline) as f:
+				pages = json.load(f)
+			pages['pages']['dashboard']['queries'] = 0
+			with open(baseline, 'w') as f:
+				json.dump(pages, f)
+			with self.assertRaisesMessage(CommandError, 'dashboard:'):
+				call_command('run_benchmarks', baseline=baseline, repeat=1, slack_ms=1000, stdout=io.StringIO())
+
+
+class DatabaseSetupTests(TestCase):
+
+	def test_pragmas_applied_on_connect(self):
+		with connection.cursor() as cursor:
+			cursor.execute('PRAGMA synchronous')
+			self.assertEqual(cursor.fetchone()[0], 1)
+			cursor.execute('PRAGMA busy_timeout')
+			self.assertEqual(cursor.fetchone()[0], 5000)
+
+	def test_mirror_reads_stay_on_default(self):
+		self.assertEqual(reports_database(), 'default')
+		with reading_reports():
+			self.assertEqual(ReportsRouter().db_for_read(SalesBill), 'default')
+
+	def test_report_reads_routed_to_reports_connection(self):
+		router = ReportsRouter()
+		with mock.patch.dict(connections['reports'].settings_dict, {'NAME': 'file:elsewhere.sqlite3?mode=ro'}):
+			self.assertIsNone(router.db_for_read(SalesBill))
+			with reading_reports():
+				self.assertEqual(router.db_for_read(SalesBill), 'reports')
+				self.assertEqual(router.db_for_write(SalesBill), 'default')
+			self.assertIsNone(router.db_for_read(SalesBill))
+		self.assertFalse(router.allow_migrate('reports', 'sales'))
+		self.assertTrue(router.allow_migrate('default', 'sales'))
+
+
+class ReportsConnectionTests(TransactionTestCase):
+	# The mirror is a second connection, so it only sees committed rows
+	databases = {'default', 'reports'}
+
+	def setUp(self):
+		cache.clear()
+		self.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+		self.client.force_login(self.staff)
+
+	def test_sum_many_runs_on_the_routed_connection(self):
+		with mock.patch('dashboard.db.reports_database', return_value='reports'):
+			with CaptureQueriesContext(connection) as default, CaptureQueriesContext(connections['reports']) as reports:
+				with reading_reports():
+					self.assertEqual(sum_many(spent=(Expense.objects.all(), F('amount'))), {'spent': Decimal('0.00')})
+		self.assertEqual(len(default.captured_queries), 0)
+		self.assertEqual(len(reports.captured_queries), 1)
+
+	def test_benchmark_counts_queries_on_every_connection(self):
+		url = reverse('balance_sheet')
+		with mock.patch('dashboard.db.reports_database', return_value='reports'):
+			self.client.get(url)
+			cache.clear()
+			with CaptureQueriesContext(connection) as default, CaptureQueriesContext(connections['reports']) as reports:
+				self.client.get(url)
+			cache.clear()
+			with mock.patch('dashboard.benchmark.reports_database', return_value='reports'):
+				result = measure(self.client, url, 1)
+		self.assertTrue(reports.captured_queries)
+		self.assertEqual(result['queries'], len(default.captured_queries) + len(reports.captured_queries))
+
+
+def create_sample_data():
+	"""A little of everything the export carries, with timestamps in the past"""
+	rice = InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('2.50'))
+	record_movement(rice, StockMovement.RECEIPT, 40, unit_cost=Decimal('2.50'), reference='PO-1')
+	room = Room.objects.create(number='101', room_type='double', price_per_night=Decimal('2500'))
+	Guest.objects.create(first_name='Ann', last_name='Lee', room=room, check_in=date(2026, 3, 1), check_out=date(2026, 3, 4))
+	tea = FoodItem.objects.create(name='Tea', price=Decimal('10'))
+	RecipeIngredient.objects.create(food_item=tea, inventory_item=rice, quantity=1)
+	for guest in ('Ann Lee', 'Bo Chan'):
+		post_bill(SalesBill(guest_name=guest, room=room), [(tea.pk, 2)], [('cash', Decimal('20')), ('card', Decimal('2500'))])
+	SalesBill.objects.update(created_at=timezone.make_aware(datetime(2026, 3, 2, 9, 30, 15, 123456)))
+	Expense.objects.create(title='Soap', amount=Decimal('12.40'), category='supplies', date=date(2026, 3, 1))
+	employee = Employee.objects.create(name='Cy', position='chef', phone='1', address='x', monthly_salary=Decimal('900'), date_joined=date(2025, 1, 1))
+	SalaryPayment.objects.create(employee=employee, amount=Decimal('900'), payment_date=date(2026, 2, 28), month='February 2026')
+	SundryDebtor.objects.create(name='Acme', contact='2', amount_due=Decimal('70'), due_date=date(2026, 4, 1))
+	Expense.objects.update(created_at=timezone.make_aware(datetime(2026, 3, 1, 8)))
+
+
+def snapshot_tables():
+	"""{section: serialized rows} for every exported table, in pk order"""
+	return {
+		name: serializers.serialize('python', model.objects.order_by('pk'))
+		for name, model in EXPORT_TABLES
+	}
+
+
+def export_bytes(fmt, compress=False):
+	stream, _content_type, filename = export_stream(fmt, compress)
+	return b''.join(stream), filename
+
+
+def delete_everything():
+	for _name, model in reversed(EXPORT_TABLES):
+		model.objects.all().delete()
+
+
+class ExportTests(TestCase):
+
+	def setUp(self):
+		create_sample_data()
+
+	def parse(self, fmt, compress):
+		data, filename = export_bytes(fmt, compress)
+		if compress:
+			self.assertTrue(filename.endswith('.gz'))
+			data = gzip.decompress(data)
+		if fmt == 'ndjson':
+			sections = {name: [] for name, _model in EXPORT_TABLES}
+			for line in data.decode().splitlines():
+				record = json.loads(line)
+				sections[record.pop('table')].append(record)
+			return sections
+		return json.loads(data)
+
+	def test_every_format_matches_the_database(self):
+		for fmt, compress in (('json', False), ('ndjson', False), ('json', True), ('ndjson', True)):
+			with self.subTest(fmt=fmt, compress=compress):
+				sections = self.parse(fmt, compress)
+				self.assertEqual(list(sections), [name for name, _model in EXPORT_TABLES])
+				for name, model in EXPORT_TABLES:
+					fields = [field.attname for field in model._meta.concrete_fields]
+					exported = [
+						[getattr(item.object, field) for field in fields]
+						for item in serializers.deserialize('python', sections[name])
+					]
+					stored = list(model.objects.order_by('pk').values_list(*fields))
+					self.assertEqual([tuple(row) for row in exported], stored, name)
+				self.assertEqual(len(sections['sales_bills']), 2)
+				self.assertEqual(len(sections['payment_details']), 4)
+
+	def test_download_view_streams(self):
+		self.client.force_login(User.objects.create_user('admin', password='secret'))
+		response = self.client.get('/dashboard/settings/export/?format=ndjson&gzip=1')
+		self.assertEqual(response['Content-Type'], 'application/gzip')
+		lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+		self.assertEqual(len(lines), sum(model.objects.count() for _name, model in EXPORT_TABLES))
+
+
+class ImportTests(TestCase):
+
+	def setUp(self):
+		create_sample_data()
+		self.before = snapshot_tables()
+
+	def import_file(self, data, filename, **kwargs):
+		return run_import(io.BytesIO(data), filename=filename, **kwargs)
+
+	def test_round_trip_every_format(self):
+		for fmt, compress in (('json', False), ('ndjson', False), ('json', True), ('ndjson', True)):
+			with self.subTest(fmt=fmt, compress=compress):
+				data, filename = export_bytes(fmt, compress)
+				delete_everything()
+				report = self.import_file(data, filename)
+				self.assertEqual(report.error_count, 0, report.errors)
+				self.assertEqual(report.rows_written, sum(len(rows) for rows in self.before.values()))
+				# Rows, primary keys and original timestamps all come back
+				self.assertEqual(snapshot_tables(), self.before)
+				self.assertEqual(reconcile_bill_totals(fix=False), [])
+
+	def test_timestamps_of_other_saves_are_untouched(self):
+		data, filename = export_bytes('ndjson')
+		self.import_file(data, filename)
+		field = SalesBill._meta.get_field('created_at')
+		self.assertTrue(field.auto_now_add)
+		bill = SalesBill.objects.create(guest_name='New', total_amount=Decimal('0'))
+		self.assertGreater(bill.created_at, timezone.now() - timedelta(minutes=1))
+
+	def test_dry_run_writes_nothing(self):
+		data, filename = export_bytes('json')
+		delete_everything()
+		report = self.import_file(data, filename, dry_run=True)
+		self.assertEqual(report.error_count, 0, report.errors)
+		self.assertGreater(report.rows_processed, 0)
+		self.assertTrue(report.summary().startswith('Validated'))
+		self.assertFalse(any(rows for rows in snapshot_tables().values()))
+
+	def test_export_from_before_the_ledger_gets_opening_balances(self):
+		delete_everything()
+		record = {
+			'model': 'inventory.inventoryitem',
+			'pk': 7,
+			'fields': {'name': 'Flour', 'quantity': 40, 'unit': 'kg', 'price_per_unit': '1.20', 'last_updated': '2026-03-01T08:00:00Z'},
+		}
+		report = self.import_file(json.dumps({'inventory_items': [record]}).encode(), 'legacy.json')
+		self.assertEqual(report.error_count, 0, report.errors)
+		(movement,) = StockMovement.objects.filter(item_id=7)
+		self.assertEqual((movement.kind, movement.quantity, movement.note), (StockMovement.ADJUSTMENT, 40, 'Opening balance'))
+		self.assertEqual(stock_on(timezone.now()), {7: 40})
+		# Importing it again finds the ledger and adds nothing
+		self.import_file(json.dumps({'inventory_items': [record]}).encode(), 'legacy.json')
+		self.assertEqual(StockMovement.objects.count(), 1)
+
+	def test_existing_primary_keys_are_updated(self):
+		expense = Expense.objects.get()
+		record = {
+			'model': 'finance.expense',
+			'pk': expense.pk,
+			'fields': {'title': 'Hand soap', 'description': '', 'amount': '15.00', 'category': 'supplies', 'date': '2026-03-01', 'created_at': '2026-03-01T08:00:00Z'},
+		}
+		report = self.import_file(json.dumps({'expenses': [record]}).encode(), 'fix.json')
+		self.assertEqual((report.rows_written, report.error_count), (1, 0))
+		expense.refresh_from_db()
+		self.assertEqual((Expense.objects.count(), expense.title, expense.amount), (1, 'Hand soap', Decimal('15.00')))
+
+	def test_missing_foreign_keys_are_reported(self):
+		bill = SalesBill.objects.first()
+		lines = [
+			{'model': 'sales.salesbillitem', 'pk': 500, 'fields': {'sales_bill': 999, 'food_item': FoodItem.objects.get().pk, 'quantity': 1, 'price': '10'}},
+			{'model': 'sales.salesbillitem', 'pk': 501, 'fields': {'sales_bill': bill.pk, 'food_item': FoodItem.objects.get().pk, 'quantity': 1, 'price': '10'}},
+		]
+		data = '\n'.join(json.dumps({**line, 'table': 'sales_bill_items'}) for line in lines).encode()
+		report = self.import_file(data, 'lines.ndjson')
+		self.assertEqual((report.rows_written, report.error_count), (1, 1))
+		self.assertIn('sales_bill 999 does not exist', report.errors[0])
+		self.assertFalse(SalesBill.objects.filter(salesbillitem__pk=500).exists())
+		# The import re-derives bill totals from the lines it wrote
+		self.assertEqual(reconcile_bill_totals(fix=False), [])
+
+
+class DeleteAllTests(TestCase):
+
+	def setUp(self):
+		media = tempfile.TemporaryDirectory()
+		self.addCleanup(media.cleanup)
+		self.enterContext(override_settings(MEDIA_ROOT=media.name))
+		self.client.force_login(User.objects.create_user('owner', password='secret'))
+		create_sample_data()
+		rebuild_daily_summaries()
+		rebuild_item_sales()
+		create_checkpoints(timezone.make_aware(datetime(2026, 3, 3)))
+		close_period(date(2026, 3, 1))
+		self.job = DataJob.objects.create(kind='import', options={})
+		self.job.input_file.save('old.json', ContentFile(b'{}'))
+
+	def test_derived_rows_go_with_the_data(self):
+		self.assertGreater(balance_sheet_totals(timezone.localdate())['total_cash'], 0)
+		versions = model_versions(DELETE_ALL_MODELS)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post('/dashboard/settings/delete-all/', {'confirmation_code': 'DELETE123'})
+		# Raw deletes send no signals, so every model is bumped explicitly
+		self.assertTrue(all(after > before for before, after in zip(versions, model_versions(DELETE_ALL_MODELS))))
+		for model in DELETE_ALL_MODELS:
+			self.assertFalse(model.objects.exists(), model.__name__)
+		self.assertFalse(os.path.exists(self.job.input_file.path))
+		self.assertEqual(balance_sheet_totals(timezone.localdate())['total_cash'], 0)
+		# Finance records are kept
+		self.assertEqual(Expense.objects.count(), 1)
+
+	def test_one_query_per_table(self):
+		with CaptureQueriesContext(connection) as context:
+			delete_all_data()
+		deletes = [query['sql'] for query in context.captured_queries if query['sql'].startswith('DELETE')]
+		self.assertEqual(len(deletes), len(DELETE_ALL_MODELS))
+
+
+class DataJobTests(TestCase):
+
+	def setUp(self):
+		media = tempfile.TemporaryDirectory()
+		self.addCleanup(media.cleanup)
+		self.enterContext(override_settings(MEDIA_ROOT=media.name))
+		self.owner = User.objects.create_user('owner', password='secret')
+		self.other = User.objects.create_user('other', password='secret')
+		create_sample_data()
+
+	def queue(self, kind='export', **fields):
+		return DataJob.objects.create(kind=kind, options={'format': 'ndjson'}, created_by=self.owner, **fields)
+
+	def test_jobs_are_claimed_oldest_first(self):
+		first, second = self.queue(), self.queue()
+		self.queue(status='done')
+		claimed = claim_next_job()
+		self.assertEqual(claimed.pk, first.pk)
+		self.assertEqual(claimed.status, 'running')
+		self.assertIsNotNone(claimed.started_at)
+		self.assertIsNotNone(claimed.heartbeat_at)
+		self.assertEqual(claim_next_job().pk, second.pk)
+		self.assertIsNone(claim_next_job())
+
+	def test_export_job_runs_and_downloads(self):
+		job = self.queue()
+		self.client.force_login(self.owner)
+		url = reverse('settings_job_download', args=[job.pk])
+		self.assertEqual(self.client.get(url).status_code, 404)
+
+		run_job(claim_next_job())
+		job.refresh_from_db()
+		self.assertEqual(job.status, 'done', job.message)
+		self.assertEqual(job.rows_written, len(export_bytes('ndjson')[0].splitlines()))
+		progress = self.client.get(reverse('settings_job_status', args=[job.pk])).json()
+		self.assertEqual((progress['status'], progress['download_ready']), ('done', True))
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(b''.join(response.streaming_content), export_bytes('ndjson')[0])
+
+	def test_other_users_jobs_are_hidden(self):
+		job = self.queue()
+		run_job(claim_next_job())
+		self.client.force_login(self.other)
+		self.assertEqual(self.client.get(reverse('settings_job_status', args=[job.pk])).status_code, 404)
+		self.assertEqual(self.client.get(reverse('settings_job_download', args=[job.pk])).status_code, 404)
+		self.assertEqual(list(self.client.get(reverse('settings')).context['jobs']), [])
+		self.other.is_superuser = True
+		self.other.save()
+		self.assertEqual(self.client.get(reverse('settings_job_status', args=[job.pk])).status_code, 200)
+
+	def test_failing_job_records_the_error(self):
+		job = self.queue(kind='import', input_file=ContentFile(b'{"rooms": [', name='broken.json'))
+		run_job(claim_next_job())
+		job.refresh_from_db()
+		self.assertEqual(job.status, 'failed')
+		self.assertTrue(job.message)
+		self.assertIsNotNone(job.finished_at)
+
+	def test_stale_running_jobs_are_failed(self):
+		now = timezone.now()
+		stale = self.queue(status='running', started_at=now - timedelta(hours=2), heartbeat_at=now - timedelta(minutes=31))
+		legacy = self.queue(status='running', started_at=now - timedelta(hours=2))
+		busy = self.queue(status='running', started_at=now - timedelta(hours=2), heartbeat_at=now - timedelta(minutes=1))
+		pending = self.queue()
+		self.assertEqual(claim_next_job().pk, pending.pk)
+		statuses = dict(DataJob.objects.values_list('pk', 'status'))
+		self.assertEqual(
+			[statuses[job.pk] for job in (stale, legacy, busy, pending)],
+			['failed', 'failed', 'running', 'running'],
+		)
+		self.assertIn('stopped responding', DataJob.objects.get(pk=stale.pk).message)
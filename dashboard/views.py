@@ -4,15 +4,40 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.conf import settings
 from django.contrib import messages
-from django.core import serializers
-from decimal import Decimal
-from inventory.models import InventoryItem
-from sales.models import SalesBill, FoodItem, SalesBillItem, PaymentDetail
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from inventory.models import InventoryItem, InventoryValuation, StockCheckpoint, StockMovement
+from inventory.reorder import reorder_list
+from inventory.valuation import inventory_valuation
+from inventory.stock import parse_receipt_lines, receive_goods, record_movement, stock_on
+from sales.models import SalesBill, FoodItem, SalesBillItem, PaymentDetail, DailySalesSummary, DailyItemSales, RecipeIngredient
+from sales.posting import parse_lines, parse_payments, post_bill
 from rooms.models import Room, Guest
-from django.db.models import Sum, F, FloatField
+from finance.models import PeriodSnapshot
+from rooms.availability import available_rooms
+from rooms.occupancy import occupancy_report
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import ProtectedError
+from django.db.models import Sum
 from django import forms
+from .conditional import conditional_on
+from .db import reads_from_reports
+from .kpis import bump_on_commit, cached_kpi
+from .models import DataJob
+from .exports import export_stream
+from .imports import run_import
+from .menu_analytics import DEFAULT_TOP_ITEMS, menu_analytics
+from .cashup import SHIFTS, cash_up, shift_window, write_cash_up_csv
+from .charts import CHART_BUCKETS, CHART_WINDOWS, chart_options, sales_chart
+from .pagination import keyset_paginate
+from .search import starts_with
+from .perf import DEFAULT_DUPLICATE_THRESHOLD, DEFAULT_SAMPLE_RATE, stats as perf_stats
 import json
 
 
@@ -48,48 +73,58 @@ def custom_logout(request):
 	return redirect('login')
 
 
+def inventory_kpis():
+	"""Item count and total stock value, read from the maintained valuation"""
+	totals = inventory_valuation()
+	return totals.item_count, totals.value
+
+
+def sales_kpis():
+	"""Bill count and net sales, read from the daily rollup"""
+	totals = DailySalesSummary.objects.aggregate(
+		count=Sum('bill_count'),
+		total=Sum('net_amount'),
+	)
+	return totals['count'] or 0, totals['total'] or 0
+
+
+# Everything the dashboard's KPIs, reorder list and chart are built from
+DASHBOARD_MODELS = [InventoryItem, InventoryValuation, DailySalesSummary]
+
+
 @login_required(login_url='login')
+@conditional_on(*DASHBOARD_MODELS)
+@reads_from_reports
 def dashboard(request):
-	from datetime import datetime, timedelta
-	from django.db.models import Count
-	
-	inventory_count = InventoryItem.objects.count()
-	total_inventory_amount = InventoryItem.objects.aggregate(
-		total=Sum(F('quantity') * F('price_per_unit'), output_field=FloatField())
-	)["total"] or 0
-	sales_count = SalesBill.objects.count()
-	total_sales_amount = SalesBill.objects.aggregate(
-		total=Sum('total_amount')
-	)["total"] or 0
+	inventory_count, total_inventory_amount = cached_kpi('inventory', [InventoryItem, InventoryValuation], inventory_kpis)
+	sales_count, total_sales_amount = cached_kpi('sales', [DailySalesSummary], sales_kpis)
+	reorder = cached_kpi('reorder', [InventoryItem], reorder_list)
 	
-	# Get sales data for the last 7 days
-	today = datetime.now().date()
-	last_7_days = [today - timedelta(days=i) for i in range(6, -1, -1)]
-	
-	# Get daily sales amounts
-	daily_sales = []
-	daily_labels = []
-	for day in last_7_days:
-		next_day = day + timedelta(days=1)
-		sales_amount = SalesBill.objects.filter(
-			created_at__gte=day,
-			created_at__lt=next_day
-		).aggregate(total=Sum('total_amount'))['total'] or 0
-		daily_sales.append(float(sales_amount))
-		daily_labels.append(day.strftime('%b %d'))
+	# Sales chart over the selected window, bucketed by day/week/month
+	window, bucket = chart_options(request.GET.get('range'), request.GET.get('bucket'))
+	daily_labels, daily_sales = cached_kpi(
+		'sales_chart', [DailySalesSummary], sales_chart, timezone.localdate(), window, bucket
+	)
 	
 	context = {
 		'inventory_count': inventory_count,
 		'total_inventory_amount': total_inventory_amount,
 		'sales_count': sales_count,
 		'total_sales_amount': total_sales_amount,
+		'reorder': reorder,
 		'daily_sales': json.dumps(daily_sales),
 		'daily_labels': json.dumps(daily_labels),
+		'chart_window': window,
+		'chart_bucket': bucket,
+		'chart_title': CHART_WINDOWS[window][1],
+		'chart_windows': CHART_WINDOWS,
+		'chart_buckets': CHART_BUCKETS,
 	}
 	return render(request, 'dashboard/dashboard.html', context)
 
 
 @login_required(login_url='login')
+@conditional_on(InventoryItem)
 def inventory_list(request):
 	items = InventoryItem.objects.all().order_by('-last_updated')
 	return render(request, 'dashboard/inventory/list.html', {'items': items})
@@ -98,7 +133,19 @@ def inventory_list(request):
 class InventoryItemForm(forms.ModelForm):
 	class Meta:
 		model = InventoryItem
-		fields = ['name', 'description', 'quantity', 'unit', 'price_per_unit']
+		fields = ['name', 'description', 'quantity', 'unit', 'price_per_unit', 'reorder_level', 'lead_time_days']
+
+
+class InventoryItemUpdateForm(InventoryItemForm):
+	# Stock levels only change through the movement ledger
+	class Meta(InventoryItemForm.Meta):
+		fields = ['name', 'description', 'unit', 'price_per_unit', 'reorder_level', 'lead_time_days']
+
+
+class StockMovementForm(forms.ModelForm):
+	class Meta:
+		model = StockMovement
+		fields = ['kind', 'quantity', 'unit_cost', 'reference', 'note']
 
 
 @login_required(login_url='login')
@@ -106,7 +153,15 @@ def inventory_create(request):
 	if request.method == 'POST':
 		form = InventoryItemForm(request.POST)
 		if form.is_valid():
-			form.save()
+			item = form.save(commit=False)
+			opening, item.quantity = item.quantity, 0
+			with transaction.atomic():
+				item.save()
+				if opening:
+					record_movement(
+						item, StockMovement.ADJUSTMENT, opening,
+						unit_cost=item.price_per_unit, note='Opening balance', user=request.user,
+					)
 			return redirect('/dashboard/inventory/')
 	else:
 		form = InventoryItemForm()
@@ -117,20 +172,112 @@ def inventory_create(request):
 def inventory_update(request, pk):
 	item = get_object_or_404(InventoryItem, pk=pk)
 	if request.method == 'POST':
-		form = InventoryItemForm(request.POST, instance=item)
+		form = InventoryItemUpdateForm(request.POST, instance=item)
 		if form.is_valid():
-			form.save()
+			# Leave quantity alone so a concurrent movement is not overwritten
+			form.save(commit=False).save(update_fields=[*form.Meta.fields, 'last_updated'])
 			return redirect('/dashboard/inventory/')
 	else:
-		form = InventoryItemForm(instance=item)
+		form = InventoryItemUpdateForm(instance=item)
 	return render(request, 'dashboard/inventory/update.html', {'form': form, 'item': item})
 
 
+@login_required(login_url='login')
+@conditional_on(InventoryItem, StockMovement, StockCheckpoint)
+def inventory_stock(request, pk):
+	"""An item's movement ledger, with a form to record a new movement"""
+	item = get_object_or_404(InventoryItem, pk=pk)
+	if request.method == 'POST':
+		form = StockMovementForm(request.POST)
+		if form.is_valid():
+			try:
+				record_movement(item, user=request.user, **form.cleaned_data)
+			except ValidationError as e:
+				for message in e.messages:
+					form.add_error(None, message)
+			else:
+				return redirect('inventory_stock', pk=item.pk)
+	else:
+		form = StockMovementForm()
+
+	on_date = parse_date(request.GET.get('on', '') or '')
+	stock_on_date = None
+	if on_date:
+		when = _day_start(on_date + timedelta(days=1))
+		stock_on_date = stock_on(when, InventoryItem.objects.filter(pk=item.pk)).get(item.pk)
+
+	page = keyset_paginate(
+		item.movements.select_related('created_by'), cursor=request.GET.get('cursor'), page_size=STOCK_MOVEMENT_PAGE_SIZE,
+	)
+	context = {
+		'item': item,
+		'form': form,
+		'movements': page,
+		'page': page,
+		'on_date': on_date,
+		'stock_on_date': stock_on_date,
+	}
+	return render(request, 'dashboard/inventory/stock.html', context)
+
+
+@login_required(login_url='login')
+def inventory_receipt(request):
+	"""
+	Book in a whole delivery note in one transaction.
+
+	Accepts the form, or a JSON body of
+	{"reference": ..., "note": ..., "lines": [{"item": id, "quantity": n, "unit_cost": "1.50"}]}.
+	"""
+	wants_json = request.content_type == 'application/json'
+	errors = []
+	if request.method == 'POST':
+		try:
+			if wants_json:
+				try:
+					payload = json.loads(request.body)
+					rows = payload.get('lines') or []
+					lines = parse_receipt_lines(
+						[row.get('item') for row in rows],
+						[row.get('quantity') for row in rows],
+						[row.get('unit_cost') or '' for row in rows],
+					)
+				except (ValueError, AttributeError, TypeError):
+					raise ValidationError('Malformed goods receipt.')
+			else:
+				payload = request.POST
+				lines = parse_receipt_lines(
+					request.POST.getlist('items[]'),
+					request.POST.getlist('quantities[]'),
+					request.POST.getlist('unit_costs[]'),
+				)
+			reference = (payload.get('reference') or '').strip()
+			movements = receive_goods(reference, lines, user=request.user, note=(payload.get('note') or '').strip())
+		except ValidationError as e:
+			if wants_json:
+				return JsonResponse({'errors': e.messages}, status=400)
+			errors = e.messages
+		else:
+			if wants_json:
+				return JsonResponse({'reference': reference, 'movements': [movement.pk for movement in movements]}, status=201)
+			messages.success(request, f'Received {len(movements)} line(s){f" on {reference}" if reference else ""}.')
+			return redirect('/dashboard/inventory/')
+
+	context = {
+		'inventory_items': InventoryItem.objects.order_by('name').only('name', 'unit', 'price_per_unit'),
+		'errors': errors,
+		'rows': range(8),
+	}
+	return render(request, 'dashboard/inventory/receipt.html', context)
+
+
 @login_required(login_url='login')
 def inventory_delete(request, pk):
 	item = get_object_or_404(InventoryItem, pk=pk)
 	if request.method == 'POST':
-		item.delete()
+		try:
+			item.delete()
+		except ProtectedError:
+			messages.error(request, f'{item.name} is used in a recipe; remove it from the recipe first.')
 		return redirect('/dashboard/inventory/')
 	return render(request, 'dashboard/inventory/delete.html', {'item': item})
 
@@ -143,10 +290,71 @@ class RoomForm(forms.ModelForm):
 		fields = ['number', 'room_type', 'status', 'is_available', 'price_per_night']
 
 
+def _availability_query(params):
+	"""
+	Parse check_in/check_out/room_type/min_price/max_price search params.
+
+	Returns (search, error); search is None when no dates were given.
+	"""
+	check_in = parse_date(params.get('check_in', '') or '')
+	check_out = parse_date(params.get('check_out', '') or '')
+	if not (check_in or check_out):
+		return None, None
+	search = {'check_in': check_in, 'check_out': check_out, 'room_type': params.get('room_type') or None}
+	try:
+		for key in ('min_price', 'max_price'):
+			value = (params.get(key) or '').strip()
+			search[key] = Decimal(value) if value else None
+	except InvalidOperation:
+		return None, 'Prices must be numbers.'
+	return search, None
+
+
 @login_required(login_url='login')
+@conditional_on(Room, Guest)
 def room_list(request):
+	search, error = _availability_query(request.GET)
 	rooms = Room.objects.all().order_by('number')
-	return render(request, 'dashboard/rooms/list.html', {'rooms': rooms})
+	if search:
+		try:
+			rooms = available_rooms(**search)
+		except ValidationError as e:
+			error = '; '.join(e.messages)
+	context = {
+		'rooms': rooms,
+		'search': search or {},
+		'search_error': error,
+		'room_types': Room.ROOM_TYPES,
+	}
+	return render(request, 'dashboard/rooms/list.html', context)
+
+
+@login_required(login_url='login')
+@conditional_on(Room, Guest)
+def room_availability(request):
+	"""Free rooms for a date range as JSON"""
+	search, error = _availability_query(request.GET)
+	if search is None and error is None:
+		error = 'check_in and check_out are required.'
+	if error:
+		return JsonResponse({'error': error}, status=400)
+	try:
+		rooms = available_rooms(**search)
+	except ValidationError as e:
+		return JsonResponse({'error': '; '.join(e.messages)}, status=400)
+	return JsonResponse({
+		'check_in': search['check_in'].isoformat(),
+		'check_out': search['check_out'].isoformat(),
+		'rooms': [
+			{
+				'id': room.pk,
+				'number': room.number,
+				'room_type': room.room_type,
+				'price_per_night': str(room.price_per_night),
+			}
+			for room in rooms
+		],
+	})
 
 
 @login_required(login_url='login')
@@ -183,6 +391,41 @@ def room_delete(request, pk):
 	return render(request, 'dashboard/rooms/delete.html', {'room': room})
 
 
+def _parse_month(value, default):
+	"""First day of a 'YYYY-MM' month, or `default` when missing or malformed"""
+	try:
+		year, month = value.split('-')[:2]
+		return datetime(int(year), int(month), 1).date()
+	except (AttributeError, ValueError):
+		return default
+
+
+@login_required(login_url='login')
+@conditional_on(Room, Guest)
+@reads_from_reports
+def room_occupancy(request):
+	"""Rooms x nights occupancy grid with daily occupancy %, ADR and RevPAR"""
+	month = _parse_month(request.GET.get('month'), timezone.localdate().replace(day=1))
+	next_month = (month + timedelta(days=32)).replace(day=1)
+	report = cached_kpi('occupancy', [Room, Guest], occupancy_report, month, next_month)
+
+	if request.GET.get('format') == 'json':
+		return JsonResponse({
+			'month': month.strftime('%Y-%m'),
+			'rooms': report['rooms'],
+			'days': report['days'],
+			'totals': report['totals'],
+		})
+
+	context = {
+		'report': report,
+		'month': month,
+		'previous_month': (month - timedelta(days=1)).replace(day=1),
+		'next_month': next_month,
+	}
+	return render(request, 'dashboard/rooms/occupancy.html', context)
+
+
 # ============ Food Items Views ============
 
 class FoodItemForm(forms.ModelForm):
@@ -192,6 +435,7 @@ class FoodItemForm(forms.ModelForm):
 
 
 @login_required(login_url='login')
+@conditional_on(FoodItem)
 def food_item_list(request):
 	food_items = FoodItem.objects.all().order_by('name')
 	return render(request, 'dashboard/food_items/list.html', {'food_items': food_items})
@@ -231,6 +475,47 @@ def food_item_delete(request, pk):
 	return render(request, 'dashboard/food_items/delete.html', {'food_item': food_item})
 
 
+RecipeFormSet = forms.inlineformset_factory(
+	FoodItem, RecipeIngredient, fields=['inventory_item', 'quantity'], extra=3, can_delete=True,
+)
+
+
+@login_required(login_url='login')
+def food_item_recipe(request, pk):
+	"""Edit the inventory items one portion of a menu item uses up"""
+	food_item = get_object_or_404(FoodItem, pk=pk)
+	formset = RecipeFormSet(request.POST or None, instance=food_item)
+	if request.method == 'POST' and formset.is_valid():
+		formset.save()
+		messages.success(request, f'Recipe for {food_item.name} saved.')
+		return redirect('/dashboard/food-items/')
+	return render(request, 'dashboard/food_items/recipe.html', {'food_item': food_item, 'formset': formset})
+
+
+@login_required(login_url='login')
+@conditional_on(FoodItem, DailyItemSales)
+@reads_from_reports
+def food_item_analytics(request):
+	"""Per-item quantity, revenue, share and trend over a date range"""
+	today = timezone.localdate()
+	date_to = parse_date(request.GET.get('date_to', '') or '') or today
+	date_from = parse_date(request.GET.get('date_from', '') or '') or date_to - timedelta(days=29)
+	if date_from > date_to:
+		date_from, date_to = date_to, date_from
+	try:
+		top = min(max(int(request.GET.get('top', DEFAULT_TOP_ITEMS)), 1), 100)
+	except ValueError:
+		top = DEFAULT_TOP_ITEMS
+
+	context = {
+		'report': menu_analytics(date_from, date_to, top),
+		'date_from': date_from,
+		'date_to': date_to,
+		'top': top,
+	}
+	return render(request, 'dashboard/food_items/analytics.html', context)
+
+
 # ============ Sales Bills Views ============
 
 class SalesBillForm(forms.ModelForm):
@@ -239,10 +524,50 @@ class SalesBillForm(forms.ModelForm):
 		fields = ['guest_name', 'room', 'total_amount']
 
 
+SALES_BILL_PAGE_SIZE = 50
+STOCK_MOVEMENT_PAGE_SIZE = 50
+
+
+def _day_start(day):
+	"""Aware datetime for midnight at the start of `day`"""
+	return timezone.make_aware(datetime.combine(day, time.min))
+
+
+SALES_BILL_MODELS = [SalesBill, SalesBillItem, PaymentDetail, FoodItem, Room]
+
+
 @login_required(login_url='login')
+@conditional_on(*SALES_BILL_MODELS)
 def sales_bill_list(request):
-	bills = SalesBill.objects.all().order_by('-created_at')
-	return render(request, 'dashboard/sales_bills/list.html', {'bills': bills})
+	# Payment methods and totals are stored on the bill, so one query per page
+	bills = SalesBill.objects.select_related('room')
+
+	# Filters map onto range predicates so they can use the created_at indexes
+	date_from = parse_date(request.GET.get('date_from', '') or '')
+	date_to = parse_date(request.GET.get('date_to', '') or '')
+	guest = request.GET.get('guest', '').strip()
+	if date_from:
+		bills = bills.filter(created_at__gte=_day_start(date_from))
+	if date_to:
+		bills = bills.filter(created_at__lt=_day_start(date_to + timedelta(days=1)))
+	if guest:
+		bills = bills.filter(starts_with('guest_name', guest))
+
+	page = keyset_paginate(bills, cursor=request.GET.get('cursor'), page_size=SALES_BILL_PAGE_SIZE)
+
+	# Carry the active filters over to the pagination links
+	filters = request.GET.copy()
+	filters.pop('cursor', None)
+
+	context = {
+		'bills': page,
+		'page': page,
+		'date_from': date_from,
+		'date_to': date_to,
+		'guest': guest,
+		'filter_query': filters.urlencode(),
+	}
+	return render(request, 'dashboard/sales_bills/list.html', context)
 
 
 @login_required(login_url='login')
@@ -251,65 +576,32 @@ def sales_bill_create(request):
 		form = SalesBillForm(request.POST)
 		if form.is_valid():
 			bill = form.save(commit=False)
-			
-			# Calculate room charge if room is selected
-			room_charge = 0
-			if bill.room:
-				room_charge = bill.room.price_per_night
-			bill.room_charge = room_charge
-			
-			# Handle adding items to the bill
-			food_items = request.POST.getlist('food_items[]')
-			quantities = request.POST.getlist('quantities[]')
-			
-			# Calculate food items total
-			items_total = 0
-			items_to_create = []
-			for food_id, qty in zip(food_items, quantities):
-				if food_id and qty:
-					food = FoodItem.objects.get(id=food_id)
-					qty_int = int(qty)
-					item_price = food.price * qty_int
-					items_total += item_price
-					items_to_create.append({
-						'food': food,
-						'quantity': qty_int,
-						'price': food.price
-					})
-			
-			# Get discount values from form
-			discount_percentage = Decimal(request.POST.get('discount_percentage', 0))
-			discount_amount = Decimal(request.POST.get('discount_amount', 0))
-			
-			# Calculate total amount with discount
-			subtotal = items_total + room_charge
-			bill.discount_percentage = discount_percentage
-			bill.discount_amount = discount_amount
-			bill.total_amount = subtotal - discount_amount
-			bill.save()
-			
-			# Create bill items
-			for item_data in items_to_create:
-				SalesBillItem.objects.create(
-					sales_bill=bill,
-					food_item=item_data['food'],
-					quantity=item_data['quantity'],
-					price=item_data['price']
+			try:
+				lines = parse_lines(request.POST.getlist('food_items[]'), request.POST.getlist('quantities[]'))
+				payments = parse_payments(
+					request.POST.getlist('payment_methods[]'),
+					request.POST.getlist('payment_amounts[]'),
 				)
-			
-			# Handle multiple payment methods
-			payment_methods = request.POST.getlist('payment_methods[]')
-			payment_amounts = request.POST.getlist('payment_amounts[]')
-			
-			for method, amount in zip(payment_methods, payment_amounts):
-				if method and amount:
-					PaymentDetail.objects.create(
-						sales_bill=bill,
-						payment_method=method,
-						amount=Decimal(amount)
-					)
-			
-			return redirect('/dashboard/sales-bills/')
+				try:
+					bill.discount_percentage = Decimal(request.POST.get('discount_percentage') or 0)
+					discount_amount = Decimal(request.POST.get('discount_amount') or 0)
+				except InvalidOperation:
+					raise ValidationError('Invalid discount value.')
+				if not (bill.discount_percentage.is_finite() and discount_amount.is_finite()):
+					raise ValidationError('Invalid discount value.')
+				
+				# Resolves every item up front and writes the bill in one transaction
+				post_bill(bill, lines, payments, discount_amount=discount_amount, user=request.user)
+			except ValidationError as e:
+				for message in e.messages:
+					form.add_error(None, message)
+			else:
+				if bill.stock_shortfalls:
+					short = InventoryItem.objects.in_bulk(bill.stock_shortfalls)
+					messages.warning(request, 'Not enough stock was on hand for this sale: ' + ', '.join(
+						f'{short[pk].name} ({units} {short[pk].unit} short)' for pk, units in bill.stock_shortfalls.items()
+					) + '. Stock was issued down to zero; record a receipt or adjustment to correct it.')
+				return redirect('/dashboard/sales-bills/')
 	else:
 		form = SalesBillForm()
 	
@@ -319,46 +611,94 @@ def sales_bill_create(request):
 
 
 @login_required(login_url='login')
+@conditional_on(*SALES_BILL_MODELS)
 def sales_bill_detail(request, pk):
-	bill = get_object_or_404(SalesBill, pk=pk)
-	items = SalesBillItem.objects.filter(sales_bill=bill)
+	bill = get_object_or_404(SalesBill.objects.select_related('room'), pk=pk)
+	items = SalesBillItem.objects.filter(sales_bill=bill).select_related('food_item')
 	return render(request, 'dashboard/sales_bills/detail.html', {'bill': bill, 'items': items})
 
 
+def _aware_datetime(value):
+	"""Parse a query string datetime, naive ones in the current time zone; None if invalid"""
+	try:
+		parsed = parse_datetime(value or '')
+	except ValueError:
+		return None
+	if parsed and timezone.is_naive(parsed):
+		parsed = timezone.make_aware(parsed)
+	return parsed
+
+
+@login_required(login_url='login')
+@conditional_on(SalesBill, PaymentDetail)
+@reads_from_reports
+def sales_cash_up(request):
+	"""End-of-shift takings by payment method, with underpaid and overpaid bills"""
+	day = parse_date(request.GET.get('date', '') or '') or timezone.localdate()
+	shift = request.GET.get('shift', 'day')
+	if shift not in SHIFTS:
+		shift = 'day'
+	start, end = shift_window(day, shift)
+
+	# An explicit start/end overrides the shift presets
+	custom_start = _aware_datetime(request.GET.get('start'))
+	custom_end = _aware_datetime(request.GET.get('end'))
+	if custom_start and custom_end and custom_start < custom_end:
+		start, end = custom_start, custom_end
+		shift = 'custom'
+
+	report = cash_up(start, end)
+	if request.GET.get('format') == 'csv':
+		response = HttpResponse(content_type='text/csv')
+		filename = f"cash_up_{timezone.localtime(start).strftime('%Y%m%d_%H%M')}.csv"
+		response['Content-Disposition'] = f'attachment; filename="{filename}"'
+		write_cash_up_csv(report, response)
+		return response
+
+	filters = request.GET.copy()
+	filters.pop('format', None)
+	context = {
+		'report': report,
+		'day': day,
+		'shift': shift,
+		'shifts': SHIFTS,
+		'start': timezone.localtime(start),
+		'end': timezone.localtime(end),
+		'filter_query': filters.urlencode(),
+	}
+	return render(request, 'dashboard/sales_bills/cash_up.html', context)
+
+
 @login_required(login_url='login')
 def sales_bill_delete(request, pk):
 	bill = get_object_or_404(SalesBill, pk=pk)
 	if request.method == 'POST':
-		bill.delete()
+		try:
+			# Bills in a closed period refuse to go; roll back just this delete
+			with transaction.atomic():
+				bill.delete()
+		except ValidationError as e:
+			for message in e.messages:
+				messages.error(request, message)
 		return redirect('/dashboard/sales-bills/')
 	return render(request, 'dashboard/sales_bills/delete.html', {'bill': bill})
 
 
 @login_required(login_url='login')
 def settings_view(request):
-	return render(request, 'dashboard/settings.html')
+	jobs = DataJob.visible_to(request.user).select_related('created_by')[:10]
+	return render(request, 'dashboard/settings.html', {'jobs': jobs})
 
 
 @login_required(login_url='login')
 def settings_export(request):
-	from inventory.models import InventoryItem
-	from rooms.models import Room, Guest
-	from sales.models import FoodItem, SalesBill, SalesBillItem
-	from django.core import serializers
-	
-	# Collect all data
-	data = {
-		'inventory_items': json.loads(serializers.serialize('json', InventoryItem.objects.all())),
-		'rooms': json.loads(serializers.serialize('json', Room.objects.all())),
-		'guests': json.loads(serializers.serialize('json', Guest.objects.all())),
-		'food_items': json.loads(serializers.serialize('json', FoodItem.objects.all())),
-		'sales_bills': json.loads(serializers.serialize('json', SalesBill.objects.all())),
-		'sales_bill_items': json.loads(serializers.serialize('json', SalesBillItem.objects.all())),
-	}
+	fmt = 'ndjson' if request.GET.get('format') == 'ndjson' else 'json'
+	compress = request.GET.get('gzip') in ('1', 'on', 'true')
 	
-	# Create response
-	response = HttpResponse(json.dumps(data, indent=2), content_type='application/json')
-	response['Content-Disposition'] = 'attachment; filename="hotel_data_export.json"'
+	# Rows are serialized a chunk at a time while the response is sent
+	stream, content_type, filename = export_stream(fmt, compress)
+	response = StreamingHttpResponse(stream, content_type=content_type)
+	response['Content-Disposition'] = f'attachment; filename="{filename}"'
 	return response
 
 
@@ -371,69 +711,22 @@ def settings_import(request):
 				messages.error(request, 'No file uploaded.')
 				return redirect('/dashboard/settings/')
 			
-			# Read and parse JSON
-			file_content = uploaded_file.read().decode('utf-8')
-			data = json.loads(file_content)
-			
-			from inventory.models import InventoryItem
-			from rooms.models import Room, Guest
-			from sales.models import FoodItem, SalesBill, SalesBillItem
-			from django.core import serializers
-			
-			# Import data in order (to respect foreign keys)
-			for obj_data in data.get('inventory_items', []):
-				InventoryItem.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=obj_data['fields']
-				)
-			
-			for obj_data in data.get('rooms', []):
-				Room.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=obj_data['fields']
-				)
-			
-			for obj_data in data.get('guests', []):
-				fields = obj_data['fields'].copy()
-				# Handle foreign key for room
-				if 'room' in fields and fields['room']:
-					fields['room'] = Room.objects.get(id=fields['room'])
-				Guest.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=fields
-				)
-			
-			for obj_data in data.get('food_items', []):
-				FoodItem.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=obj_data['fields']
-				)
-			
-			for obj_data in data.get('sales_bills', []):
-				fields = obj_data['fields'].copy()
-				# Handle foreign keys
-				if 'guest' in fields and fields['guest']:
-					fields['guest'] = Guest.objects.get(id=fields['guest'])
-				if 'room' in fields and fields['room']:
-					fields['room'] = Room.objects.get(id=fields['room'])
-				SalesBill.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=fields
-				)
+			dry_run = request.POST.get('dry_run') == 'on'
+			if request.POST.get('background') == 'on':
+				job = DataJob(kind='import', options={'dry_run': dry_run}, created_by=request.user)
+				job.input_file.save(uploaded_file.name, uploaded_file)
+				messages.success(request, f'Import queued as job #{job.pk}.')
+				return redirect('/dashboard/settings/')
 			
-			for obj_data in data.get('sales_bill_items', []):
-				fields = obj_data['fields'].copy()
-				# Handle foreign keys
-				if 'sales_bill' in fields and fields['sales_bill']:
-					fields['sales_bill'] = SalesBill.objects.get(id=fields['sales_bill'])
-				if 'food_item' in fields and fields['food_item']:
-					fields['food_item'] = FoodItem.objects.get(id=fields['food_item'])
-				SalesBillItem.objects.update_or_create(
-					id=obj_data['pk'],
-					defaults=fields
-				)
+			# Parsed incrementally and upserted in chunks, parents before children
+			report = run_import(uploaded_file, filename=uploaded_file.name, dry_run=dry_run)
 			
-			messages.success(request, 'Data imported successfully!')
+			if report.error_count:
+				messages.error(request, report.summary())
+				for error in report.errors[:10]:
+					messages.error(request, error)
+			else:
+				messages.success(request, report.summary())
 		except Exception as e:
 			messages.error(request, f'Error importing data: {str(e)}')
 		
@@ -442,6 +735,59 @@ def settings_import(request):
 	return redirect('/dashboard/settings/')
 
 
+@login_required(login_url='login')
+@require_POST
+def settings_export_job(request):
+	options = {
+		'format': 'ndjson' if request.POST.get('format') == 'ndjson' else 'json',
+		'gzip': request.POST.get('gzip') == '1',
+	}
+	job = DataJob.objects.create(kind='export', options=options, created_by=request.user)
+	messages.success(request, f'Export queued as job #{job.pk}.')
+	return redirect('/dashboard/settings/')
+
+
+@login_required(login_url='login')
+def settings_job_status(request, pk):
+	job = get_object_or_404(DataJob.visible_to(request.user), pk=pk)
+	return JsonResponse(job.progress())
+
+
+@login_required(login_url='login')
+def settings_job_download(request, pk):
+	job = get_object_or_404(DataJob.visible_to(request.user), pk=pk, kind='export', status='done')
+	if not job.output_file:
+		raise Http404('Export file is no longer available.')
+	filename = job.output_file.name.rsplit('/', 1)[-1].split('_', 1)[-1]
+	return FileResponse(job.output_file.open('rb'), as_attachment=True, filename=filename)
+
+
+# Children before parents; finance records other than the snapshots stay
+DELETE_ALL_MODELS = [
+	RecipeIngredient, StockMovement, StockCheckpoint, PaymentDetail, SalesBillItem,
+	DailyItemSales, DailySalesSummary, SalesBill, Guest, FoodItem, Room,
+	InventoryItem, InventoryValuation, PeriodSnapshot, DataJob,
+]
+
+
+def delete_all_data():
+	"""
+	Empty the hotel's operating tables, with the rollups, checkpoints,
+	period snapshots and jobs derived from them.
+
+	Each table goes in one raw DELETE: the per-row receivers would only
+	adjust rollups and valuations that are being emptied anyway. Versions
+	are bumped once for every model instead.
+	"""
+	for job in DataJob.objects.exclude(input_file='', output_file=''):
+		job.input_file.delete(save=False)
+		job.output_file.delete(save=False)
+	with transaction.atomic():
+		for model in DELETE_ALL_MODELS:
+			model.objects.all()._raw_delete(DEFAULT_DB_ALIAS)
+		bump_on_commit(*DELETE_ALL_MODELS)
+
+
 @login_required(login_url='login')
 def settings_delete_all(request):
 	if request.method == 'POST':
@@ -452,18 +798,7 @@ def settings_delete_all(request):
 			return redirect('/dashboard/settings/')
 		
 		try:
-			from inventory.models import InventoryItem
-			from rooms.models import Room, Guest
-			from sales.models import FoodItem, SalesBill, SalesBillItem
-			
-			# Delete in reverse order of dependencies
-			SalesBillItem.objects.all().delete()
-			SalesBill.objects.all().delete()
-			Guest.objects.all().delete()
-			FoodItem.objects.all().delete()
-			Room.objects.all().delete()
-			InventoryItem.objects.all().delete()
-			
+			delete_all_data()
 			messages.success(request, 'All data deleted successfully!')
 		except Exception as e:
 			messages.error(request, f'Error deleting data: {str(e)}')
@@ -472,3 +807,21 @@ def settings_delete_all(request):
 	
 	return redirect('/dashboard/settings/')
 
+
+# ============ Performance Panel ============
+
+@staff_member_required(login_url='login')
+def perf_panel(request):
+	"""Per-view request timings collected by PerfMiddleware in this process"""
+	if request.method == 'POST':
+		perf_stats.reset()
+		return redirect('perf_panel')
+	if request.GET.get('format') == 'json':
+		return JsonResponse({'views': perf_stats.summary()})
+	context = {
+		'rows': perf_stats.summary(),
+		'sample_rate': getattr(settings, 'PERF_SAMPLE_RATE', DEFAULT_SAMPLE_RATE),
+		'window': perf_stats.window,
+		'duplicate_threshold': getattr(settings, 'PERF_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD),
+	}
+	return render(request, 'dashboard/perf.html', context)
@@ -0,0 +1,123 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from dashboard.pagination import keyset_paginate
+from dashboard.search import starts_with
+
+PAGE_SIZES = (25, 50, 100)
+DEFAULT_PAGE_SIZE = 50
+
+
+def choice(choices):
+    """Filter parser accepting only the keys of a model field's choices"""
+    keys = {key for key, _label in choices}
+    return lambda value: value if value in keys else None
+
+
+def flag(true, false):
+    """
+    Filter parser mapping two query string words onto a boolean, for an
+    `__in` lookup: SQLite writes `field=True` as a bare `WHERE field`, which
+    cannot search an index on (field, ...), while `field IN (1)` can.
+    """
+    return {true: (True,), false: (False,)}.get
+
+
+def text(value):
+    return value
+
+
+def date_value(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def prefix(field):
+    """Filter lookup for a case-insensitive prefix search, indexed on Lower(field)"""
+    return lambda value: starts_with(field, value)
+
+
+def date_filters(field):
+    """from/to filters on a date column, both inclusive"""
+    return [
+        ('from', f'{field}__gte', date_value),
+        ('to', f'{field}__lte', date_value),
+    ]
+
+
+def pk_value(value):
+    # str.isdigit() accepts characters such as '²' that int() rejects
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class FinanceList:
+    """
+    Filtering, sorting and keyset pagination shared by the finance list pages.
+
+    `filters` are (param, lookup, parse) triples; `parse` turns the query
+    string value into the lookup value, or None to ignore it. `lookup` is a
+    field lookup name, or a function of the value returning a Q. Every lookup
+    and sort key should be backed by an index, so a page costs one query
+    however large the table grows. `columns` prunes the SELECT with only().
+    """
+
+    def __init__(self, queryset, columns, filters, sorts, default_sort):
+        self.queryset = queryset
+        self.columns = columns
+        self.filters = filters
+        self.sorts = sorts
+        self.default_sort = default_sort
+
+    def sort_key(self, value):
+        if value and value.lstrip('-') in self.sorts:
+            return value
+        return self.default_sort
+
+    def page(self, params):
+        """Template context for one page of the list described by `params` (request.GET)"""
+        queryset = self.queryset.only(*self.columns)
+        applied = {}
+        for param, lookup, parse in self.filters:
+            raw = params.get(param, '').strip()
+            value = parse(raw) if raw else None
+            if value is not None:
+                queryset = queryset.filter(lookup(value) if callable(lookup) else Q(**{lookup: value}))
+                applied[param] = raw
+
+        sort = self.sort_key(params.get('sort'))
+        try:
+            page_size = int(params.get('per_page', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            page_size = DEFAULT_PAGE_SIZE
+        if page_size not in PAGE_SIZES:
+            page_size = DEFAULT_PAGE_SIZE
+
+        page = keyset_paginate(
+            queryset,
+            cursor=params.get('cursor'),
+            page_size=page_size,
+            field=sort.lstrip('-'),
+            descending=sort.startswith('-'),
+        )
+
+        # Links keep the filters; sorting or filtering starts again at page one
+        query = params.copy()
+        query.pop('cursor', None)
+        sort_query = query.copy()
+        sort_query.pop('sort', None)
+        return {
+            'page': page,
+            'filters': applied,
+            'sort': sort,
+            'sorts': self.sorts,
+            'per_page': page_size,
+            'page_sizes': PAGE_SIZES,
+            'filter_query': query.urlencode(),
+            'sort_query': sort_query.urlencode(),
+        }
+
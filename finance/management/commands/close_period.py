@@ -0,0 +1,26 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.periods import close_period, parse_period, reopen_period
+
+
+class Command(BaseCommand):
+    help = 'Close a month (YYYY-MM) into a PeriodSnapshot, or reopen it with --reopen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('period', help='Month to close, as YYYY-MM')
+        parser.add_argument('--reopen', action='store_true', help='Reopen the month and rebuild later snapshots')
+
+    def handle(self, *args, **options):
+        try:
+            period = parse_period(options['period'])
+            if options['reopen']:
+                rebuilt = reopen_period(period)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Reopened {period:%B %Y}; rebuilt {len(rebuilt)} later period(s).'
+                ))
+            else:
+                snapshot = close_period(period)
+                self.stdout.write(self.style.SUCCESS(f'{snapshot} closed.'))
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(unique=True)),
+                ('inventory_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses_by_category', models.JSONField(blank=True, default=dict)),
+                ('salaries_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('debtors_open', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('creditors_open', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cumulative_sales', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('cumulative_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('cumulative_salaries', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('closed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['period'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['name'], name='employee_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['position', 'name'], name='employee_position_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['is_active', 'name'], name='employee_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['date_joined'], name='employee_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date'], name='expense_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['category', 'date'], name='expense_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['amount'], name='expense_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarypayment',
+            index=models.Index(fields=['payment_date'], name='salarypayment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarypayment',
+            index=models.Index(fields=['employee', 'payment_date'], name='salary_employee_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarypayment',
+            index=models.Index(fields=['amount'], name='salarypayment_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(fields=['created_at'], name='creditor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(fields=['due_date'], name='creditor_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(fields=['is_paid', 'due_date'], name='creditor_paid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(condition=models.Q(('is_paid', False)), fields=['due_date'], name='creditor_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(fields=['payment_date'], name='creditor_payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(fields=['amount_payable'], name='creditor_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(fields=['created_at'], name='debtor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(fields=['due_date'], name='debtor_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(fields=['is_paid', 'due_date'], name='debtor_paid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(condition=models.Q(('is_paid', False)), fields=['due_date'], name='debtor_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(fields=['payment_date'], name='debtor_payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(fields=['amount_due'], name='debtor_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:50
+
+from django.db import migrations
+from django.db.models.functions import TruncDate
+
+
+def backfill_payment_dates(apps, schema_editor):
+    """Date paid rows that have no payment_date by the day they were created, as the reports already did"""
+    for name in ('SundryDebtor', 'SundryCreditor'):
+        model = apps.get_model('finance', name)
+        model.objects.filter(is_paid=True, payment_date__isnull=True).update(payment_date=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_indexes_and_periods'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_payment_dates, migrations.RunPython.noop),
+    ]
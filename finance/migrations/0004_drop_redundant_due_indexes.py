@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_backfill_payment_dates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sundrycreditor',
+            name='creditor_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sundrydebtor',
+            name='debtor_due_idx',
+        ),
+    ]
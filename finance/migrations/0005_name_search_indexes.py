@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_drop_redundant_due_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='employee_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='expense_title_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrycreditor',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='creditor_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sundrydebtor',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='debtor_name_lower_idx'),
+        ),
+    ]
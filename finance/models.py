@@ -1,4 +1,8 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class Expense(models.Model):
@@ -20,6 +24,12 @@ class Expense(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='expense_date_idx'),
+            models.Index(fields=['category', 'date'], name='expense_category_date_idx'),
+            models.Index(fields=['amount'], name='expense_amount_idx'),
+            models.Index(Lower('title'), name='expense_title_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - Rs {self.amount}"
@@ -49,6 +59,13 @@ class Employee(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], name='employee_name_idx'),
+            models.Index(fields=['position', 'name'], name='employee_position_name_idx'),
+            models.Index(fields=['is_active', 'name'], name='employee_active_name_idx'),
+            models.Index(fields=['date_joined'], name='employee_joined_idx'),
+            models.Index(Lower('name'), name='employee_name_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_position_display()}"
@@ -64,6 +81,11 @@ class SalaryPayment(models.Model):
     
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['payment_date'], name='salarypayment_date_idx'),
+            models.Index(fields=['employee', 'payment_date'], name='salary_employee_date_idx'),
+            models.Index(fields=['amount'], name='salarypayment_amount_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.month} - Rs {self.amount}"
@@ -82,9 +104,21 @@ class SundryDebtor(models.Model):
     
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['created_at'], name='debtor_created_idx'),
+            models.Index(fields=['is_paid', 'due_date'], name='debtor_paid_due_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(is_paid=False), name='debtor_open_due_idx'),
+            models.Index(fields=['payment_date'], name='debtor_payment_date_idx'),
+            models.Index(fields=['amount_due'], name='debtor_amount_idx'),
+            models.Index(Lower('name'), name='debtor_name_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - Rs {self.amount_due}"
+    
+    def save(self, *args, **kwargs):
+        settle(self)
+        super().save(*args, **kwargs)
 
 
 class SundryCreditor(models.Model):
@@ -100,6 +134,67 @@ class SundryCreditor(models.Model):
     
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['created_at'], name='creditor_created_idx'),
+            models.Index(fields=['is_paid', 'due_date'], name='creditor_paid_due_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(is_paid=False), name='creditor_open_due_idx'),
+            models.Index(fields=['payment_date'], name='creditor_payment_date_idx'),
+            models.Index(fields=['amount_payable'], name='creditor_amount_idx'),
+            models.Index(Lower('name'), name='creditor_name_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - Rs {self.amount_payable}"
+    
+    def save(self, *args, **kwargs):
+        settle(self)
+        super().save(*args, **kwargs)
+
+
+class PeriodSnapshot(models.Model):
+    """Frozen month-end figures for a closed accounting period"""
+    period = models.DateField(unique=True)  # first day of the month
+    inventory_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses_by_category = models.JSONField(default=dict, blank=True)
+    salaries_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    debtors_open = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    creditors_open = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Running totals from the first record up to the end of the period
+    cumulative_sales = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    cumulative_expenses = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    cumulative_salaries = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    closed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period']
+    
+    def __str__(self):
+        return f"Period {self.period:%B %Y}"
+    
+    @property
+    def period_end(self):
+        return month_end(self.period)
+    
+    @property
+    def net_profit(self):
+        return self.sales_amount - self.expenses_amount - self.salaries_amount
+
+
+def settle(account):
+    """
+    Keep a debtor's or creditor's payment_date in step with is_paid.
+
+    The balance sheet dates a settlement by payment_date, so a paid row
+    without one is dated today; an unpaid row never keeps one.
+    """
+    if not account.is_paid:
+        account.payment_date = None
+    elif not account.payment_date:
+        account.payment_date = timezone.localdate()
+
+
+def month_end(period):
+    """Last day of the month starting on `period`"""
+    return (period.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
@@ -0,0 +1,113 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Expense, PeriodSnapshot, SalaryPayment, month_end
+from .reports import CENTS, inventory_value_on, period_totals, sum_many
+
+
+def parse_period(value):
+    """Turn 'YYYY-MM' into the first day of that month"""
+    try:
+        year, month = value.split('-')[:2]
+        return date(int(year), int(month), 1)
+    except (AttributeError, ValueError):
+        raise ValidationError(f'Invalid period "{value}", expected YYYY-MM.')
+
+
+def check_period_open(days):
+    """
+    Raise ValidationError if any of `days` falls in or before a closed period.
+
+    Reports start from the latest snapshot and add only rows dated after
+    it, and each snapshot's running totals include every earlier month, so
+    an entry dated on or before the last closed month may not be added,
+    changed or removed until the periods covering it are reopened.
+    """
+    months = {day.replace(day=1) for day in days if day is not None}
+    if not months:
+        return
+    first = min(months)
+    latest = PeriodSnapshot.objects.filter(period__gte=first).order_by('-period').first()
+    if latest is not None:
+        raise ValidationError(
+            f'Entries dated {first:%B %Y} are part of the closed periods up to {latest.period:%B %Y}; '
+            f'reopen them first.'
+        )
+
+
+def _fill_snapshot(snapshot, base):
+    """Compute every figure of `snapshot` on top of `base`"""
+    from sales.models import DailySalesSummary
+
+    start, end = snapshot.period, snapshot.period_end
+    since = base.period_end if base else None
+    delta = period_totals(since, end)
+    month = sum_many(
+        sales=(DailySalesSummary.objects.filter(day__range=(start, end)), F('net_amount')),
+        expenses=(Expense.objects.filter(date__range=(start, end)), F('amount')),
+        salaries=(SalaryPayment.objects.filter(payment_date__range=(start, end)), F('amount')),
+    )
+    by_category = (
+        Expense.objects.filter(date__range=(start, end))
+        .values('category')
+        .annotate(total=Sum('amount'))
+        .order_by('category')
+    )
+
+    snapshot.sales_amount = month['sales']
+    snapshot.expenses_amount = month['expenses']
+    snapshot.salaries_amount = month['salaries']
+    snapshot.expenses_by_category = {
+        row['category']: str(row['total'].quantize(CENTS)) for row in by_category
+    }
+    snapshot.cumulative_sales = (base.cumulative_sales if base else 0) + delta['sales']
+    snapshot.cumulative_expenses = (base.cumulative_expenses if base else 0) + delta['expenses']
+    snapshot.cumulative_salaries = (base.cumulative_salaries if base else 0) + delta['salaries']
+    snapshot.debtors_open = (
+        (base.debtors_open if base else 0) + delta['debtors_added'] - delta['debtors_settled']
+    )
+    snapshot.creditors_open = (
+        (base.creditors_open if base else 0) + delta['creditors_added'] - delta['creditors_settled']
+    )
+    snapshot.inventory_value = inventory_value_on(end)
+
+
+@transaction.atomic
+def close_period(period):
+    """Freeze the month starting on `period` into a PeriodSnapshot"""
+    period = period.replace(day=1)
+    if month_end(period) >= timezone.localdate():
+        raise ValidationError(f'{period:%B %Y} has not ended yet.')
+    if PeriodSnapshot.objects.filter(period=period).exists():
+        raise ValidationError(f'{period:%B %Y} is already closed.')
+    # Later snapshots already cover this month through their own base, so
+    # closing out of order needs no rebuild
+    base = PeriodSnapshot.objects.filter(period__lt=period).order_by('-period').first()
+    snapshot = PeriodSnapshot(period=period)
+    _fill_snapshot(snapshot, base)
+    snapshot.save()
+    return snapshot
+
+
+@transaction.atomic
+def reopen_period(period):
+    """
+    Drop the snapshot for `period` and rebuild every later snapshot from
+    the raw rows, so corrections made while it is open carry forward.
+    """
+    period = period.replace(day=1)
+    deleted, _ = PeriodSnapshot.objects.filter(period=period).delete()
+    if not deleted:
+        raise ValidationError(f'{period:%B %Y} is not closed.')
+    base = PeriodSnapshot.objects.filter(period__lt=period).order_by('-period').first()
+    rebuilt = []
+    for snapshot in PeriodSnapshot.objects.filter(period__gt=period).order_by('period'):
+        _fill_snapshot(snapshot, base)
+        snapshot.save()
+        rebuilt.append(snapshot)
+        base = snapshot
+    return rebuilt
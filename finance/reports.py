@@ -0,0 +1,182 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.utils import timezone
+
+from .models import Expense, PeriodSnapshot, SalaryPayment, SundryCreditor, SundryDebtor
+
+CENTS = Decimal('0.01')
+
+
+def _sum_subquery(queryset, expression):
+    """Compile `SELECT SUM(expression)` over queryset without running it"""
+    total = (
+        queryset.order_by()
+        .annotate(_group=Value(1))
+        .values('_group')
+        .annotate(total=Sum(expression, output_field=DecimalField(max_digits=20, decimal_places=2)))
+        .values('total')
+    )
+    return total.query.sql_with_params()
+
+
+def sum_many_sql(**sums):
+    """SQL and params of the single SELECT that sum_many runs"""
+    columns = []
+    params = []
+    for queryset, expression in sums.values():
+        sql, sql_params = _sum_subquery(queryset, expression)
+        columns.append(f'COALESCE(({sql}), 0)')
+        params.extend(sql_params)
+    return 'SELECT ' + ', '.join(columns), params
+
+
+def sum_many(**sums):
+    """
+    Evaluate several (queryset, expression) sums in a single round trip.
+
+    Each sum becomes a scalar subquery of one SELECT, so the database can
+    use each table's own index. Runs on the database the router picks for
+    the first queryset, so it follows reading_reports(). Returns
+    {name: Decimal}.
+    """
+    sql, params = sum_many_sql(**sums)
+    alias = next(iter(sums.values()))[0].db
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return {
+        name: Decimal(str(value)).quantize(CENTS)
+        for name, value in zip(sums, row)
+    }
+
+
+def end_of_day(day):
+    """Aware datetime of the midnight that ends `day`"""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def open_on(queryset, as_of):
+    """
+    Debtor/creditor rows that existed and were unpaid at the end of `as_of`.
+
+    A paid row without a payment_date (saved before settle() filled it in,
+    or bulk loaded) counts as settled from the day it was created, here
+    and in added_and_settled() alike.
+    """
+    # A plain range on created_at (not __date) so the column index applies
+    return queryset.filter(created_at__lt=end_of_day(as_of)).filter(
+        Q(is_paid=False) | Q(payment_date__gt=as_of)
+    )
+
+
+def added_and_settled(queryset, since, as_of):
+    """
+    Changes to the open balance between the end of `since` and end of `as_of`.
+
+    Returns (added, settled): rows created in the window that are still
+    open at `as_of`, and older rows whose payment falls in the window.
+    """
+    added = open_on(queryset.filter(created_at__gte=end_of_day(since)), as_of)
+    settled = queryset.filter(
+        created_at__lt=end_of_day(since),
+        payment_date__gt=since,
+        payment_date__lte=as_of,
+    )
+    return added, settled
+
+
+def inventory_value_on(day):
+    """
+    Stock value at the end of `day`: the ledger's quantities at that time
+    priced at today's unit prices, since prices have no history.
+    """
+    from inventory.models import InventoryItem
+    from inventory.stock import stock_on
+
+    quantities = stock_on(end_of_day(day))
+    prices = dict(InventoryItem.objects.values_list('pk', 'price_per_unit'))
+    value = sum((quantity * prices[pk] for pk, quantity in quantities.items()), Decimal('0'))
+    return value.quantize(CENTS)
+
+
+def latest_snapshot(as_of):
+    """The most recent closed period ending on or before `as_of`, or None"""
+    for snapshot in PeriodSnapshot.objects.filter(period__lte=as_of).order_by('-period')[:2]:
+        if snapshot.period_end <= as_of:
+            return snapshot
+    return None
+
+
+def period_totals(since, as_of):
+    """
+    Sales, expense, salary and open-balance figures for the window after
+    the end of `since` up to the end of `as_of`; `since=None` means from
+    the first record. One round trip for the sums, plus a read of the
+    maintained inventory valuation.
+    """
+    from inventory.valuation import inventory_valuation
+    from sales.models import DailySalesSummary
+
+    sales = DailySalesSummary.objects.filter(day__lte=as_of)
+    expenses = Expense.objects.filter(date__lte=as_of)
+    salaries = SalaryPayment.objects.filter(payment_date__lte=as_of)
+    sums = {}
+    if since is None:
+        sums['debtors_added'] = (open_on(SundryDebtor.objects.all(), as_of), F('amount_due'))
+        sums['creditors_added'] = (open_on(SundryCreditor.objects.all(), as_of), F('amount_payable'))
+    else:
+        sales = sales.filter(day__gt=since)
+        expenses = expenses.filter(date__gt=since)
+        salaries = salaries.filter(payment_date__gt=since)
+        debtors_added, debtors_settled = added_and_settled(SundryDebtor.objects.all(), since, as_of)
+        creditors_added, creditors_settled = added_and_settled(SundryCreditor.objects.all(), since, as_of)
+        sums.update(
+            debtors_added=(debtors_added, F('amount_due')),
+            debtors_settled=(debtors_settled, F('amount_due')),
+            creditors_added=(creditors_added, F('amount_payable')),
+            creditors_settled=(creditors_settled, F('amount_payable')),
+        )
+    sums.update(
+        sales=(sales, F('net_amount')),
+        expenses=(expenses, F('amount')),
+        salaries=(salaries, F('amount')),
+    )
+    totals = sum_many(**sums)
+    totals['inventory_value'] = inventory_valuation().value
+    totals.setdefault('debtors_settled', Decimal('0'))
+    totals.setdefault('creditors_settled', Decimal('0'))
+    return totals
+
+
+def balance_sheet_totals(as_of):
+    """
+    Balance sheet line items as Decimals, for rows dated on or before `as_of`.
+
+    Starts from the last closed period's snapshot and adds only the rows
+    dated after it. Past dates value the stock the ledger held then;
+    today uses the maintained valuation.
+    """
+    snapshot = latest_snapshot(as_of)
+    since = snapshot.period_end if snapshot else None
+    delta = period_totals(since, as_of)
+
+    zero = Decimal('0')
+    inventory_value = delta['inventory_value']
+    if as_of < timezone.localdate():
+        inventory_value = inventory_value_on(as_of)
+    return {
+        # Current Assets
+        'inventory_value': inventory_value,
+        'total_cash': (snapshot.cumulative_sales if snapshot else zero) + delta['sales'],
+        'total_debtors': (snapshot.debtors_open if snapshot else zero)
+        + delta['debtors_added'] - delta['debtors_settled'],
+        # Current Liabilities
+        'total_creditors': (snapshot.creditors_open if snapshot else zero)
+        + delta['creditors_added'] - delta['creditors_settled'],
+        'total_expenses': (snapshot.cumulative_expenses if snapshot else zero) + delta['expenses'],
+        'total_salaries_paid': (snapshot.cumulative_salaries if snapshot else zero) + delta['salaries'],
+        'snapshot_period': snapshot.period if snapshot else None,
+    }
@@ -0,0 +1,28 @@
+from django.db.models.signals import pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Expense, SalaryPayment
+from .periods import check_period_open
+
+# Model -> the date field that places its rows in a period
+DATE_FIELDS = {Expense: 'date', SalaryPayment: 'payment_date'}
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=SalaryPayment)
+def keep_closed_periods_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    # Views assign the raw form string, so parse it as the field would
+    field = DATE_FIELDS[sender]
+    days = [instance._meta.get_field(field).to_python(getattr(instance, field))]
+    if instance.pk:
+        # Moving a row out of a closed month changes that month too
+        days.extend(sender.objects.filter(pk=instance.pk).values_list(field, flat=True))
+    check_period_open(days)
+
+
+@receiver(pre_delete, sender=Expense)
+@receiver(pre_delete, sender=SalaryPayment)
+def keep_closed_periods_on_delete(sender, instance, **kwargs):
+    check_period_open([getattr(instance, DATE_FIELDS[sender])])
@@ -1,3 +1,300 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.testing import QueryPlanAssertions
+from inventory.models import InventoryItem, StockMovement
+from inventory.stock import record_movement
+from sales.models import DailySalesSummary, SalesBill
+
+from .models import Employee, Expense, SalaryPayment, SundryCreditor, SundryDebtor
+from .periods import close_period, reopen_period
+from .reports import balance_sheet_totals
+
+
+class FinanceQueryPlanTests(QueryPlanAssertions, TestCase):
+    """Balance sheet and finance list pages must stay on indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('planner', password='secret')
+        start = date(2026, 1, 1)
+        for i in range(40):
+            day = start + timedelta(days=i)
+            Expense.objects.create(title=f'Expense {i}', amount=Decimal('12.50'), category='utilities', date=day)
+            employee = Employee.objects.create(
+                name=f'Employee {i}', position='chef', phone='555', address='Here',
+                monthly_salary=Decimal('1000'), date_joined=start,
+            )
+            SalaryPayment.objects.create(employee=employee, amount=Decimal('1000'), payment_date=day, month='January 2026')
+            SundryDebtor.objects.create(name=f'Debtor {i}', contact='555', amount_due=Decimal('30'), due_date=day, is_paid=i % 2 == 0)
+            SundryCreditor.objects.create(name=f'Creditor {i}', contact='555', amount_payable=Decimal('20'), due_date=day, is_paid=i % 3 == 0)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_balance_sheet(self):
+        self.assertViewUsesIndexes('/finance/balance-sheet/')
+
+    def test_balance_sheet_as_of(self):
+        # Valuing past stock reads every inventory item once, by design
+        self.assertViewUsesIndexes('/finance/balance-sheet/?as_of=2026-01-20', allow=['inventory_inventoryitem'])
+
+    # An unfiltered page walks the sort column's index and stops after one
+    # page, but the plan cannot show the LIMIT, so those tables are allowed
+
+    def test_expense_list(self):
+        self.assertViewUsesIndexes('/finance/expenses/', allow=['finance_expense'])
+
+    def test_employee_list(self):
+        self.assertViewUsesIndexes('/finance/employees/', allow=['finance_employee'])
+
+    def test_salary_payment_list(self):
+        self.assertViewUsesIndexes('/finance/salary-payments/', allow=['finance_salarypayment'])
+
+    def test_debtor_list(self):
+        # Every account sorted by due date; only the open ones have an index
+        self.assertViewUsesIndexes('/finance/debtors/', allow=['finance_sundrydebtor'])
+
+    def test_creditor_list(self):
+        self.assertViewUsesIndexes('/finance/creditors/', allow=['finance_sundrycreditor'])
+
+    def test_open_debtors_by_due_date(self):
+        # The partial index holds only the open rows, so walking it is the search
+        for model in (SundryDebtor, SundryCreditor):
+            plan = self.assertUsesIndex(model.objects.filter(is_paid=False).order_by('due_date'), allow=[model._meta.db_table])
+            self.assertIn('_open_due_idx', plan)
+
+    def test_filtered_and_sorted_lists(self):
+        self.assertViewUsesIndexes('/finance/expenses/?category=utilities&from=2026-01-05&to=2026-01-20')
+        self.assertViewUsesIndexes('/finance/expenses/?sort=-amount&q=Expense')
+        self.assertViewUsesIndexes('/finance/employees/?position=chef&status=active')
+        self.assertViewUsesIndexes(f'/finance/salary-payments/?employee={Employee.objects.first().pk}&sort=amount')
+        # Walks the amount index in order, skipping paid rows, until a page is full
+        self.assertViewUsesIndexes('/finance/debtors/?status=unpaid&sort=-amount_due', allow=['finance_sundrydebtor'])
+        self.assertViewUsesIndexes('/finance/creditors/?status=paid&from=2026-01-10')
+        for url in ('/finance/employees/?q=ann', '/finance/debtors/?q=ann', '/finance/creditors/?q=ann&sort=-amount_payable'):
+            self.assertViewUsesIndexes(url)
+
+
+class FinanceListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clerk', password='secret')
+        start = date(2026, 3, 1)
+        for i in range(60):
+            employee = Employee.objects.create(
+                name=f'Employee {i:02d}', position='waiter' if i % 2 else 'chef', phone='555', address='Here',
+                monthly_salary=Decimal('900'), date_joined=start, is_active=i % 5 != 0,
+            )
+            SalaryPayment.objects.create(
+                employee=employee, amount=Decimal(100 + i % 7), payment_date=start + timedelta(days=i % 20),
+                month='March 2026',
+            )
+            Expense.objects.create(
+                title=f'Expense {i}', amount=Decimal(i), category='supplies' if i % 3 else 'transport',
+                date=start + timedelta(days=i % 30),
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, url):
+        """Follow the next-page links, returning every row and the queries per page"""
+        rows, queries = [], []
+        # The first request seeds the change-version rows
+        self.client.get(url)
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            queries.append(len(context.captured_queries))
+            listing = response.context['listing']
+            rows.extend(listing['page'])
+            url = f"{url.split('?')[0]}?{listing['filter_query']}&cursor={listing['page'].next_cursor}" if listing['page'].has_next else None
+        return rows, queries
+
+    def test_pages_cover_the_filtered_rows_once(self):
+        rows, queries = self.walk('/finance/expenses/?category=supplies&sort=-amount&per_page=25')
+        self.assertEqual([expense.amount for expense in rows], sorted((Decimal(i) for i in range(60) if i % 3), reverse=True))
+        self.assertEqual(len(queries), 2)
+        # Session, user, versions and the page itself, however deep the page
+        self.assertEqual(set(queries), {4})
+
+    def test_salary_payments_load_employee_names_with_the_page(self):
+        rows, queries = self.walk('/finance/salary-payments/?sort=payment_date&per_page=25')
+        self.assertEqual(len(rows), 60)
+        self.assertEqual([row.payment_date for row in rows], sorted(row.payment_date for row in rows))
+        # Session, user, versions, the employee dropdown and the page
+        self.assertEqual(set(queries), {5})
+
+    def test_salary_payment_dropdown_lists_active_employees(self):
+        employees = self.client.get('/finance/salary-payments/').context['employees']
+        self.assertEqual([employee.name for employee in employees], [f'Employee {i:02d}' for i in range(60) if i % 5])
+        # An inactive employee stays selectable while the list is filtered on them
+        inactive = Employee.objects.get(name='Employee 00')
+        employees = self.client.get(f'/finance/salary-payments/?employee={inactive.pk}').context['employees']
+        self.assertEqual(employees[0], inactive)
+        self.assertEqual(len(employees), 49)
+
+    def test_filters_and_bad_parameters(self):
+        response = self.client.get('/finance/employees/?position=chef&status=inactive&sort=bogus&per_page=7')
+        listing = response.context['listing']
+        self.assertEqual([employee.name for employee in listing['page']], [f'Employee {i:02d}' for i in range(0, 60, 10)])
+        self.assertEqual((listing['sort'], listing['per_page']), ('name', 50))
+        response = self.client.get('/finance/expenses/?from=2026-02-31&cursor=garbage&q=Expense 5')
+        self.assertEqual({expense.title for expense in response.context['expenses']}, {'Expense 5'} | {f'Expense {i}' for i in range(50, 60)})
+        response = self.client.get('/finance/expenses/?q=eXPENSE 1')
+        self.assertEqual({expense.title for expense in response.context['expenses']}, {'Expense 1'} | {f'Expense {i}' for i in range(10, 20)})
+        # Unicode digits that int() rejects are ignored like any other junk
+        for junk in ('%C2%B2', 'x', '1.5'):
+            response = self.client.get(f'/finance/salary-payments/?employee={junk}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['listing']['filters'], {})
+
+
+class PeriodCloseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for day, amount in ((date(2026, 1, 10), '100'), (date(2026, 2, 10), '50'), (date(2026, 3, 5), '20')):
+            Expense.objects.create(title='Supplies', amount=Decimal(amount), category='supplies', date=day)
+        employee = Employee.objects.create(
+            name='Cy', position='chef', phone='1', address='x', monthly_salary=Decimal('900'), date_joined=date(2025, 1, 1),
+        )
+        SalaryPayment.objects.create(employee=employee, amount=Decimal('900'), payment_date=date(2026, 2, 28), month='February 2026')
+        DailySalesSummary.objects.create(day=date(2026, 1, 15), bill_count=3, net_amount=Decimal('300'))
+        DailySalesSummary.objects.create(day=date(2026, 2, 15), bill_count=2, net_amount=Decimal('200'))
+        debtor = SundryDebtor.objects.create(name='Acme', contact='1', amount_due=Decimal('70'), due_date=date(2026, 2, 1))
+        creditor = SundryCreditor.objects.create(name='Mill', contact='1', amount_payable=Decimal('40'), due_date=date(2026, 2, 1))
+        SundryDebtor.objects.filter(pk=debtor.pk).update(created_at=at(date(2026, 1, 5)), is_paid=True, payment_date=date(2026, 2, 20))
+        SundryCreditor.objects.filter(pk=creditor.pk).update(created_at=at(date(2026, 1, 5)))
+
+        rice = InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('2.50'))
+        for day, kind, quantity in ((date(2026, 1, 3), StockMovement.RECEIPT, 40), (date(2026, 2, 10), StockMovement.ISSUE, 10)):
+            movement = record_movement(rice, kind, quantity)
+            StockMovement.objects.filter(pk=movement.pk).update(created_at=at(day))
+
+    def test_close_freezes_the_month(self):
+        january = close_period(date(2026, 1, 1))
+        self.assertEqual(
+            (january.sales_amount, january.expenses_amount, january.salaries_amount, january.debtors_open, january.creditors_open),
+            (300, 100, 0, 70, 40),
+        )
+        self.assertEqual(january.expenses_by_category, {'supplies': '100.00'})
+        self.assertEqual(january.inventory_value, Decimal('100.00'))
+
+        february = close_period(date(2026, 2, 1))
+        self.assertEqual(
+            (february.sales_amount, february.expenses_amount, february.salaries_amount, february.debtors_open, february.creditors_open),
+            (200, 50, 900, 0, 40),
+        )
+        self.assertEqual((february.cumulative_sales, february.cumulative_expenses), (500, 150))
+        self.assertEqual(february.inventory_value, Decimal('75.00'))
+
+    def test_close_and_reopen_are_validated(self):
+        with self.assertRaisesMessage(ValidationError, 'has not ended yet'):
+            close_period(timezone.localdate())
+        close_period(date(2026, 1, 1))
+        with self.assertRaisesMessage(ValidationError, 'already closed'):
+            close_period(date(2026, 1, 15))
+        with self.assertRaisesMessage(ValidationError, 'is not closed'):
+            reopen_period(date(2026, 2, 1))
+
+    def test_balance_sheet_as_of_matches_with_and_without_snapshots(self):
+        days = [date(2026, 1, 20), date(2026, 1, 31), date(2026, 2, 15), date(2026, 2, 28), date(2026, 3, 31)]
+        live = {day: balance_sheet_totals(day) for day in days}
+        self.assertEqual(live[date(2026, 1, 20)]['inventory_value'], Decimal('100.00'))
+        self.assertEqual(live[date(2026, 3, 31)]['total_debtors'], 0)
+        close_period(date(2026, 1, 1))
+        close_period(date(2026, 2, 1))
+        bases = [None, date(2026, 1, 1), date(2026, 1, 1), date(2026, 2, 1), date(2026, 2, 1)]
+        for day, base in zip(days, bases):
+            totals = balance_sheet_totals(day)
+            self.assertEqual(totals.pop('snapshot_period'), base)
+            live[day].pop('snapshot_period')
+            self.assertEqual(totals, live[day], day)
+
+    def test_backdated_writes_are_refused_while_closed(self):
+        close_period(date(2026, 1, 1))
+        close_period(date(2026, 2, 1))
+        with self.assertRaisesMessage(ValidationError, 'closed periods up to February 2026'):
+            Expense.objects.create(title='Late invoice', amount=Decimal('99'), category='other', date=date(2026, 1, 20))
+        february = Expense.objects.get(date=date(2026, 2, 10))
+        february.date = date(2026, 3, 10)
+        with self.assertRaises(ValidationError):
+            february.save()
+        # Deletes run in the collector's transaction, so give each its own savepoint
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Expense.objects.get(pk=february.pk).delete()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            SalaryPayment.objects.get().delete()
+        self.assertEqual(balance_sheet_totals(date(2026, 3, 31))['total_expenses'], 170)
+        # The open month takes entries as usual
+        Expense.objects.create(title='Paper', amount=Decimal('5'), category='supplies', date=date(2026, 3, 6))
+
+    def test_backdated_bill_delete_is_refused(self):
+        bill = SalesBill.objects.create(guest_name='Ann', total_amount=Decimal('30'))
+        SalesBill.objects.filter(pk=bill.pk).update(created_at=at(date(2026, 1, 12)))
+        close_period(date(2026, 1, 1))
+        self.client.force_login(User.objects.create_user('clerk', password='secret'))
+        response = self.client.post(f'/dashboard/sales-bills/{bill.pk}/delete/', follow=True)
+        self.assertContains(response, 'reopen them first')
+        self.assertTrue(SalesBill.objects.filter(pk=bill.pk).exists())
+
+    def test_expense_views_report_a_closed_period(self):
+        close_period(date(2026, 1, 1))
+        self.client.force_login(User.objects.create_user('clerk', password='secret'))
+        expense = Expense.objects.get(date=date(2026, 1, 10))
+        response = self.client.post(f'/finance/expenses/{expense.pk}/delete/', follow=True)
+        self.assertContains(response, 'reopen them first')
+        response = self.client.post('/finance/expenses/create/', {
+            'title': 'Late', 'amount': '99', 'category': 'other', 'date': '2026-01-20',
+        }, follow=True)
+        self.assertContains(response, 'reopen them first')
+        self.assertEqual(Expense.objects.filter(date__lte=date(2026, 1, 31)).count(), 1)
+
+    def test_reopen_carries_corrections_forward(self):
+        close_period(date(2026, 1, 1))
+        close_period(date(2026, 2, 1))
+        rebuilt = reopen_period(date(2026, 1, 1))
+        self.assertEqual([snapshot.period for snapshot in rebuilt], [date(2026, 2, 1)])
+        self.assertEqual(rebuilt[0].cumulative_expenses, 150)
+        self.assertEqual(rebuilt[0].inventory_value, Decimal('75.00'))
+        reopen_period(date(2026, 2, 1))
+
+        Expense.objects.create(title='Late invoice', amount=Decimal('99'), category='other', date=date(2026, 1, 20))
+        self.assertEqual(balance_sheet_totals(date(2026, 3, 31))['total_expenses'], 269)
+        self.assertEqual(close_period(date(2026, 1, 1)).expenses_amount, 199)
+        self.assertEqual(close_period(date(2026, 2, 1)).cumulative_expenses, 249)
+        self.assertEqual(balance_sheet_totals(date(2026, 3, 31))['total_expenses'], 269)
+
+    def test_paid_accounts_always_have_a_payment_date(self):
+        debtor = SundryDebtor.objects.create(name='Beta', contact='1', amount_due=Decimal('5'), due_date=date(2026, 3, 1), is_paid=True)
+        self.assertEqual(debtor.payment_date, timezone.localdate())
+        debtor.is_paid = False
+        debtor.save()
+        self.assertIsNone(debtor.payment_date)
+
+        # Rows that skipped save() count as settled from the day they were created
+        SundryCreditor.objects.bulk_create([SundryCreditor(
+            name='Gamma', contact='1', amount_payable=Decimal('8'), due_date=date(2026, 1, 1), is_paid=True,
+        )])
+        SundryCreditor.objects.filter(name='Gamma').update(created_at=at(date(2026, 1, 2)))
+        live = balance_sheet_totals(date(2026, 2, 15))
+        close_period(date(2026, 1, 1))
+        self.assertEqual(live['total_creditors'], 40)
+        self.assertEqual(balance_sheet_totals(date(2026, 2, 15))['total_creditors'], 40)
+
 
-# Create your tests here.
+def at(day):
+    """Aware midday on `day`"""
+    return timezone.make_aware(datetime.combine(day, time(12)))
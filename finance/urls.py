@@ -5,6 +5,11 @@ urlpatterns = [
     # Balance Sheet URL
     path('balance-sheet/', views.balance_sheet, name='balance_sheet'),
     
+    # Period Close URLs
+    path('periods/', views.period_list, name='period_list'),
+    path('periods/close/', views.period_close, name='period_close'),
+    path('periods/<int:pk>/reopen/', views.period_reopen, name='period_reopen'),
+    
     # Expense URLs
     path('expenses/', views.expense_list, name='expense_list'),
     path('expenses/create/', views.expense_create, name='expense_create'),
@@ -1,81 +1,199 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, F, FloatField
-from datetime import datetime
-from .models import Expense, Employee, SalaryPayment, SundryDebtor, SundryCreditor
+from django.core.exceptions import ValidationError
+from django.views.decorators.http import require_POST
+from django.utils import timezone
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from dashboard.conditional import conditional_on
+from dashboard.db import reads_from_reports
+from dashboard.kpis import cached_kpi
+from inventory.models import InventoryItem, InventoryValuation, StockCheckpoint, StockMovement
+from sales.models import DailySalesSummary, SalesBill
+from .models import Expense, Employee, SalaryPayment, SundryDebtor, SundryCreditor, PeriodSnapshot
+from .listing import FinanceList, choice, date_filters, flag, pk_value, prefix, text
+from .periods import close_period, parse_period, reopen_period
+from .reports import balance_sheet_totals, period_totals
+
+
+# Each list filters and sorts only on indexed columns and loads one page
+EXPENSE_LIST = FinanceList(
+    Expense.objects.all(),
+    columns=['title', 'description', 'amount', 'category', 'date'],
+    filters=[
+        ('category', 'category', choice(Expense.CATEGORY_CHOICES)),
+        *date_filters('date'),
+        ('q', prefix('title'), text),
+    ],
+    sorts=['date', 'amount'],
+    default_sort='-date',
+)
+
+EMPLOYEE_LIST = FinanceList(
+    Employee.objects.all(),
+    columns=['name', 'position', 'phone', 'monthly_salary', 'date_joined', 'is_active'],
+    filters=[
+        ('position', 'position', choice(Employee.POSITION_CHOICES)),
+        ('status', 'is_active__in', flag('active', 'inactive')),
+        ('q', prefix('name'), text),
+    ],
+    sorts=['name', 'date_joined'],
+    default_sort='name',
+)
+
+SALARY_PAYMENT_LIST = FinanceList(
+    SalaryPayment.objects.select_related('employee'),
+    columns=['employee__name', 'month', 'amount', 'payment_date', 'notes'],
+    filters=[
+        ('employee', 'employee_id', pk_value),
+        *date_filters('payment_date'),
+    ],
+    sorts=['payment_date', 'amount'],
+    default_sort='-payment_date',
+)
+
+DEBTOR_LIST = FinanceList(
+    SundryDebtor.objects.all(),
+    columns=['name', 'contact', 'amount_due', 'due_date', 'is_paid'],
+    filters=[
+        ('status', 'is_paid__in', flag('paid', 'unpaid')),
+        *date_filters('due_date'),
+        ('q', prefix('name'), text),
+    ],
+    sorts=['due_date', 'amount_due'],
+    default_sort='due_date',
+)
+
+CREDITOR_LIST = FinanceList(
+    SundryCreditor.objects.all(),
+    columns=['name', 'contact', 'amount_payable', 'due_date', 'is_paid'],
+    filters=[
+        ('status', 'is_paid__in', flag('paid', 'unpaid')),
+        *date_filters('due_date'),
+        ('q', prefix('name'), text),
+    ],
+    sorts=['due_date', 'amount_payable'],
+    default_sort='due_date',
+)
+
+
+# Everything the balance sheet and period figures are computed from
+BALANCE_SHEET_MODELS = [
+    InventoryItem, InventoryValuation, StockMovement, StockCheckpoint, SalesBill, DailySalesSummary,
+    SundryDebtor, SundryCreditor, Expense, SalaryPayment, PeriodSnapshot,
+]
 
 
 # Balance Sheet View
 @login_required(login_url='login')
+@conditional_on(*BALANCE_SHEET_MODELS)
+@reads_from_reports
 def balance_sheet(request):
-    from inventory.models import InventoryItem
-    from sales.models import SalesBill
+    today = timezone.localdate()
+    as_of = parse_date(request.GET.get('as_of', '') or '') or today
+    as_of = min(as_of, today)
     
-    # ASSETS
-    # Current Assets - Inventory
-    inventory_value = float(InventoryItem.objects.aggregate(
-        total=Sum(F('quantity') * F('price_per_unit'), output_field=FloatField())
-    )['total'] or 0)
-    
-    # Current Assets - Cash (Total Sales)
-    total_cash = float(SalesBill.objects.aggregate(total=Sum('total_amount'))['total'] or 0)
+    totals = cached_kpi(
+        'balance_sheet',
+        BALANCE_SHEET_MODELS,
+        balance_sheet_totals,
+        as_of,
+    )
     
-    # Current Assets - Sundry Debtors (Accounts Receivable)
-    total_debtors = float(SundryDebtor.objects.filter(is_paid=False).aggregate(
-        total=Sum('amount_due')
-    )['total'] or 0)
-    
-    total_assets = inventory_value + total_cash + total_debtors
+    # ASSETS
+    total_assets = totals['inventory_value'] + totals['total_cash'] + totals['total_debtors']
     
     # LIABILITIES
-    # Current Liabilities - Sundry Creditors (Accounts Payable)
-    total_creditors = float(SundryCreditor.objects.filter(is_paid=False).aggregate(
-        total=Sum('amount_payable')
-    )['total'] or 0)
-    
-    # Current Liabilities - Expenses
-    total_expenses = float(Expense.objects.aggregate(total=Sum('amount'))['total'] or 0)
-    
-    # Current Liabilities - Salary Payments
-    total_salaries_paid = float(SalaryPayment.objects.aggregate(total=Sum('amount'))['total'] or 0)
-    
-    total_liabilities = total_creditors + total_expenses + total_salaries_paid
+    total_liabilities = totals['total_creditors'] + totals['total_expenses'] + totals['total_salaries_paid']
     
     # EQUITY (Assets - Liabilities)
     total_equity = total_assets - total_liabilities
     
     context = {
-        'inventory_value': inventory_value,
-        'total_cash': total_cash,
-        'total_debtors': total_debtors,
+        **totals,
         'total_assets': total_assets,
-        'total_creditors': total_creditors,
-        'total_expenses': total_expenses,
-        'total_salaries_paid': total_salaries_paid,
         'total_liabilities': total_liabilities,
         'total_equity': total_equity,
-        'current_date': datetime.now().strftime('%B %d, %Y'),
+        'as_of': as_of,
+        'is_historical': as_of < today,
+        'current_date': as_of.strftime('%B %d, %Y'),
     }
     return render(request, 'finance/balance_sheet.html', context)
 
 
+# Period Close Views
+@login_required(login_url='login')
+@conditional_on(*BALANCE_SHEET_MODELS)
+@reads_from_reports
+def period_list(request):
+    snapshots = list(PeriodSnapshot.objects.all())
+    last = snapshots[-1] if snapshots else None
+    today = timezone.localdate()
+    
+    # The open period is everything after the last close, computed live
+    since = last.period_end if last else None
+    open_totals = period_totals(since, today)
+    open_totals['net_profit'] = open_totals['sales'] - open_totals['expenses'] - open_totals['salaries']
+    
+    next_period = (since + timedelta(days=1)) if since else today.replace(day=1)
+    context = {
+        'snapshots': snapshots,
+        'open_totals': open_totals,
+        'open_since': next_period if last else None,
+        'next_period': next_period,
+    }
+    return render(request, 'finance/periods/list.html', context)
+
+
+@login_required(login_url='login')
+@require_POST
+def period_close(request):
+    try:
+        snapshot = close_period(parse_period(request.POST.get('period', '')))
+        messages.success(request, f'{snapshot} closed.')
+    except ValidationError as e:
+        messages.error(request, ' '.join(e.messages))
+    return redirect('period_list')
+
+
+@login_required(login_url='login')
+@require_POST
+def period_reopen(request, pk):
+    snapshot = get_object_or_404(PeriodSnapshot, pk=pk)
+    rebuilt = reopen_period(snapshot.period)
+    messages.success(request, f'{snapshot} reopened; {len(rebuilt)} later period(s) rebuilt.')
+    return redirect('period_list')
+
+
 # Expense Views
 @login_required(login_url='login')
+@conditional_on(Expense)
 def expense_list(request):
-    expenses = Expense.objects.all()
-    return render(request, 'finance/expenses/list.html', {'expenses': expenses})
+    listing = EXPENSE_LIST.page(request.GET)
+    context = {
+        'expenses': listing['page'],
+        'listing': listing,
+        'categories': Expense.CATEGORY_CHOICES,
+    }
+    return render(request, 'finance/expenses/list.html', context)
 
 
 @login_required(login_url='login')
 def expense_create(request):
     if request.method == 'POST':
-        Expense.objects.create(
-            title=request.POST['title'],
-            description=request.POST.get('description', ''),
-            amount=request.POST['amount'],
-            category=request.POST['category'],
-            date=request.POST['date']
-        )
+        try:
+            Expense.objects.create(
+                title=request.POST['title'],
+                description=request.POST.get('description', ''),
+                amount=request.POST['amount'],
+                category=request.POST['category'],
+                date=request.POST['date']
+            )
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
         return redirect('expense_list')
     return render(request, 'finance/expenses/create.html')
 
@@ -89,7 +207,10 @@ def expense_update(request, pk):
         expense.amount = request.POST['amount']
         expense.category = request.POST['category']
         expense.date = request.POST['date']
-        expense.save()
+        try:
+            expense.save()
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
         return redirect('expense_list')
     return render(request, 'finance/expenses/update.html', {'expense': expense})
 
@@ -98,16 +219,27 @@ def expense_update(request, pk):
 def expense_delete(request, pk):
     expense = get_object_or_404(Expense, pk=pk)
     if request.method == 'POST':
-        expense.delete()
+        try:
+            # A savepoint, so a refused delete leaves any outer transaction usable
+            with transaction.atomic():
+                expense.delete()
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
         return redirect('expense_list')
     return render(request, 'finance/expenses/delete.html', {'expense': expense})
 
 
 # Employee Views
 @login_required(login_url='login')
+@conditional_on(Employee)
 def employee_list(request):
-    employees = Employee.objects.all()
-    return render(request, 'finance/employees/list.html', {'employees': employees})
+    listing = EMPLOYEE_LIST.page(request.GET)
+    context = {
+        'employees': listing['page'],
+        'listing': listing,
+        'positions': Employee.POSITION_CHOICES,
+    }
+    return render(request, 'finance/employees/list.html', context)
 
 
 @login_required(login_url='login')
@@ -155,21 +287,35 @@ def employee_delete(request, pk):
 
 # Salary Payment Views
 @login_required(login_url='login')
+@conditional_on(SalaryPayment, Employee)
 def salary_payment_list(request):
-    payments = SalaryPayment.objects.all()
-    return render(request, 'finance/salary_payments/list.html', {'payments': payments})
+    listing = SALARY_PAYMENT_LIST.page(request.GET)
+    # Only active staff fill the dropdown, plus whoever the list is filtered on
+    shown = Q(is_active__in=[True])
+    if 'employee' in listing['filters']:
+        shown |= Q(pk=pk_value(listing['filters']['employee']))
+    employees = Employee.objects.filter(shown).only('name')
+    context = {
+        'payments': listing['page'],
+        'listing': listing,
+        'employees': employees,
+    }
+    return render(request, 'finance/salary_payments/list.html', context)
 
 
 @login_required(login_url='login')
 def salary_payment_create(request):
     if request.method == 'POST':
-        SalaryPayment.objects.create(
-            employee_id=request.POST['employee'],
-            amount=request.POST['amount'],
-            payment_date=request.POST['payment_date'],
-            month=request.POST['month'],
-            notes=request.POST.get('notes', '')
-        )
+        try:
+            SalaryPayment.objects.create(
+                employee_id=request.POST['employee'],
+                amount=request.POST['amount'],
+                payment_date=request.POST['payment_date'],
+                month=request.POST['month'],
+                notes=request.POST.get('notes', '')
+            )
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
         return redirect('salary_payment_list')
     employees = Employee.objects.filter(is_active=True)
     return render(request, 'finance/salary_payments/create.html', {'employees': employees})
@@ -179,16 +325,22 @@ def salary_payment_create(request):
 def salary_payment_delete(request, pk):
     payment = get_object_or_404(SalaryPayment, pk=pk)
     if request.method == 'POST':
-        payment.delete()
+        try:
+            # A savepoint, so a refused delete leaves any outer transaction usable
+            with transaction.atomic():
+                payment.delete()
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
         return redirect('salary_payment_list')
     return render(request, 'finance/salary_payments/delete.html', {'payment': payment})
 
 
 # Sundry Debtor Views
 @login_required(login_url='login')
+@conditional_on(SundryDebtor)
 def debtor_list(request):
-    debtors = SundryDebtor.objects.all()
-    return render(request, 'finance/debtors/list.html', {'debtors': debtors})
+    listing = DEBTOR_LIST.page(request.GET)
+    return render(request, 'finance/debtors/list.html', {'debtors': listing['page'], 'listing': listing})
 
 
 @login_required(login_url='login')
@@ -202,7 +354,7 @@ def debtor_create(request):
             due_date=request.POST['due_date'],
             description=request.POST.get('description', ''),
             is_paid=request.POST.get('is_paid') == 'on',
-            payment_date=request.POST.get('payment_date') if request.POST.get('is_paid') == 'on' else None
+            payment_date=request.POST.get('payment_date') or None
         )
         return redirect('debtor_list')
     return render(request, 'finance/debtors/create.html')
@@ -219,7 +371,7 @@ def debtor_update(request, pk):
         debtor.due_date = request.POST['due_date']
         debtor.description = request.POST.get('description', '')
         debtor.is_paid = request.POST.get('is_paid') == 'on'
-        debtor.payment_date = request.POST.get('payment_date') if request.POST.get('is_paid') == 'on' else None
+        debtor.payment_date = request.POST.get('payment_date') or None
         debtor.save()
         return redirect('debtor_list')
     return render(request, 'finance/debtors/update.html', {'debtor': debtor})
@@ -236,9 +388,10 @@ def debtor_delete(request, pk):
 
 # Sundry Creditor Views
 @login_required(login_url='login')
+@conditional_on(SundryCreditor)
 def creditor_list(request):
-    creditors = SundryCreditor.objects.all()
-    return render(request, 'finance/creditors/list.html', {'creditors': creditors})
+    listing = CREDITOR_LIST.page(request.GET)
+    return render(request, 'finance/creditors/list.html', {'creditors': listing['page'], 'listing': listing})
 
 
 @login_required(login_url='login')
@@ -252,7 +405,7 @@ def creditor_create(request):
             due_date=request.POST['due_date'],
             description=request.POST.get('description', ''),
             is_paid=request.POST.get('is_paid') == 'on',
-            payment_date=request.POST.get('payment_date') if request.POST.get('is_paid') == 'on' else None
+            payment_date=request.POST.get('payment_date') or None
         )
         return redirect('creditor_list')
     return render(request, 'finance/creditors/create.html')
@@ -269,7 +422,7 @@ def creditor_update(request, pk):
         creditor.due_date = request.POST['due_date']
         creditor.description = request.POST.get('description', '')
         creditor.is_paid = request.POST.get('is_paid') == 'on'
-        creditor.payment_date = request.POST.get('payment_date') if request.POST.get('is_paid') == 'on' else None
+        creditor.payment_date = request.POST.get('payment_date') or None
         creditor.save()
         return redirect('creditor_list')
     return render(request, 'finance/creditors/update.html', {'creditor': creditor})
@@ -1,14 +1,15 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import InventoryItem  # Assuming InventoryItem is defined in models.py
+from .models import InventoryItem, StockMovement
 
 @admin.register(InventoryItem)
 class InventoryItemAdmin(admin.ModelAdmin):
-	list_display = ("name", "quantity", "unit", "price_per_unit", "last_updated")
+	list_display = ("name", "quantity", "reorder_level", "unit", "price_per_unit", "last_updated")
 	search_fields = ("name",)
 	list_filter = ("unit", "last_updated")
-	readonly_fields = ("last_updated",)
+	# Stock only changes through StockMovement
+	readonly_fields = ("quantity", "daily_usage", "usage_updated_at", "last_updated")
 	fieldsets = (
 		(None, {
 			'fields': ("name", "description")
@@ -16,4 +17,30 @@ class InventoryItemAdmin(admin.ModelAdmin):
 		("Stock Info", {
 			'fields': ("quantity", "unit", "price_per_unit", "last_updated")
 		}),
+		("Reordering", {
+			'fields': ("reorder_level", "lead_time_days", "daily_usage", "usage_updated_at")
+		}),
 	)
+
+	def save_model(self, request, obj, form, change):
+		if change:
+			obj.save(update_fields=["name", "description", "unit", "price_per_unit", "reorder_level", "lead_time_days", "last_updated"])
+		else:
+			obj.save()
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+	list_display = ("created_at", "item", "kind", "quantity", "unit_cost", "reference", "created_by")
+	search_fields = ("item__name", "reference")
+	list_filter = ("kind",)
+	date_hierarchy = "created_at"
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	def has_add_permission(self, request):
+		return False
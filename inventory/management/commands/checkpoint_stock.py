@@ -0,0 +1,27 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.stock import create_checkpoints
+
+
+class Command(BaseCommand):
+    help = 'Record every inventory item\'s stock balance at the end of a day (default: yesterday)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to checkpoint, YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        day = timezone.localdate() - timedelta(days=1)
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError(f'Invalid date "{options["date"]}", expected YYYY-MM-DD.')
+        as_of = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        if as_of > timezone.now():
+            # Movements may still be recorded for a day that has not ended
+            raise CommandError(f'{day:%Y-%m-%d} has not ended yet; only past days can be checkpointed.')
+        count = create_checkpoints(as_of)
+        self.stdout.write(self.style.SUCCESS(f'Checkpointed {count} item(s) at {as_of:%Y-%m-%d %H:%M}.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.reorder import CONSUMPTION_WINDOW_DAYS, update_consumption_rates
+
+
+class Command(BaseCommand):
+    help = 'Recompute each inventory item\'s average daily usage for reorder suggestions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=CONSUMPTION_WINDOW_DAYS,
+            help=f'Days of stock history to average over (default: {CONSUMPTION_WINDOW_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+        count = update_consumption_rates(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Updated consumption rates for {count} item(s) over {options["days"]} day(s).'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from inventory.valuation import FIELDS, verify_valuation
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stock valuation from every inventory item and report or fix drift in the maintained totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        drift = verify_valuation(fix=not options['dry_run'])
+        for unit, stored, expected in drift:
+            changes = ', '.join(
+                f'{field}: {old} -> {new}' for field, old, new in zip(FIELDS, stored, expected) if old != new
+            )
+            self.stdout.write(f'{unit or "All units"}: {changes}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Inventory valuation is consistent.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} valuation row(s) have drifted; run without --dry-run to fix.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(drift)} drifted valuation row(s).'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='daily_usage',
+            field=models.DecimalField(decimal_places=3, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='lead_time_days',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='usage_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('reorder_level')), ('reorder_level__gt', 0)), fields=['name'], name='inventory_low_stock_idx'),
+        ),
+    ]
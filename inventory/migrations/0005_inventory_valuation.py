@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:14
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+
+
+def initial_valuation(apps, schema_editor):
+    """Value the existing stock once; signals and the ledger keep it current from here"""
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryValuation = apps.get_model('inventory', 'InventoryValuation')
+    rows = (
+        InventoryItem.objects.values('unit')
+        .annotate(
+            count=Count('id'),
+            total_quantity=Sum('quantity'),
+            total_value=Sum(F('quantity') * F('price_per_unit'), output_field=DecimalField()),
+        )
+        .order_by()
+    )
+    valuations = [
+        InventoryValuation(unit=row['unit'], item_count=row['count'], quantity=row['total_quantity'], value=row['total_value'])
+        for row in rows
+    ]
+    valuations.append(InventoryValuation(
+        unit='',
+        item_count=sum(row.item_count for row in valuations),
+        quantity=sum(row.quantity for row in valuations),
+        value=sum(row.value for row in valuations),
+    ))
+    InventoryValuation.objects.bulk_create(valuations)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_reorder_levels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(blank=True, max_length=20, unique=True)),
+                ('item_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'ordering': ['unit'],
+            },
+        ),
+        migrations.RunPython(initial_valuation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_bills(apps, schema_editor):
+    """Link the existing recipe issues, referenced as 'Bill #<pk>', to bills that still exist"""
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    SalesBill = apps.get_model('sales', 'SalesBill')
+    references = StockMovement.objects.filter(reference__startswith='Bill #').values_list('reference', flat=True).distinct()
+    bill_ids = {}
+    for reference in references:
+        number = reference.removeprefix('Bill #')
+        if number.isascii() and number.isdigit():
+            bill_ids[reference] = int(number)
+    existing = set(SalesBill.objects.filter(pk__in=bill_ids.values()).values_list('pk', flat=True))
+    for reference, bill_id in bill_ids.items():
+        if bill_id in existing:
+            StockMovement.objects.filter(reference=reference).update(sales_bill_id=bill_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventory_valuation'),
+        ('sales', '0002_totals_and_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='sales_bill',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='sales.salesbill'),
+        ),
+        migrations.RunPython(link_bills, migrations.RunPython.noop),
+    ]
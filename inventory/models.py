@@ -1,13 +1,108 @@
-
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class InventoryItem(models.Model):
 	name = models.CharField(max_length=100)
 	description = models.TextField(blank=True)
+	# Only ever changed through StockMovement (see inventory.stock)
 	quantity = models.PositiveIntegerField(default=0)
 	unit = models.CharField(max_length=20)
 	price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
+	# Alert once quantity falls to this level; 0 turns alerts off for the item
+	reorder_level = models.PositiveIntegerField(default=0)
+	lead_time_days = models.PositiveSmallIntegerField(default=0)
+	# Maintained by the update_consumption_rates command (see inventory.reorder)
+	daily_usage = models.DecimalField(max_digits=10, decimal_places=3, default=0, editable=False)
+	usage_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
 	last_updated = models.DateTimeField(auto_now=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["-last_updated"], name="inventory_updated_idx"),
+			# Partial index holding only the items at or below their reorder level
+			models.Index(
+				fields=["name"],
+				name="inventory_low_stock_idx",
+				condition=models.Q(reorder_level__gt=0, quantity__lte=models.F("reorder_level")),
+			),
+		]
+
 	def __str__(self):
 		return self.name
+
+class StockMovement(models.Model):
+	"""One append-only entry in an item's stock ledger; quantity is signed"""
+	RECEIPT = "receipt"
+	ISSUE = "issue"
+	ADJUSTMENT = "adjustment"
+	WASTAGE = "wastage"
+	KINDS = [
+		(RECEIPT, "Receipt"),
+		(ISSUE, "Issue"),
+		(ADJUSTMENT, "Adjustment"),
+		(WASTAGE, "Wastage"),
+	]
+	item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="movements")
+	kind = models.CharField(max_length=12, choices=KINDS)
+	quantity = models.IntegerField()
+	unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+	reference = models.CharField(max_length=100, blank=True)
+	note = models.CharField(max_length=255, blank=True)
+	created_at = models.DateTimeField(default=timezone.now)
+	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+	# The sale a recipe issue belongs to; `reference` keeps the bill number after it is deleted
+	sales_bill = models.ForeignKey(
+		"sales.SalesBill", on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements",
+	)
+
+	class Meta:
+		ordering = ["-created_at", "-id"]
+		indexes = [
+			models.Index(fields=["item", "created_at"], name="stockmovement_item_time_idx"),
+			models.Index(fields=["reference"], name="stockmovement_reference_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.get_kind_display()} {self.quantity:+d} {self.item_id}"
+
+	def save(self, *args, **kwargs):
+		if self.pk is not None and not kwargs.get("force_insert"):
+			raise ValueError("Stock movements are append-only; record a correcting adjustment instead.")
+		super().save(*args, **kwargs)
+
+class StockCheckpoint(models.Model):
+	"""An item's balance at `as_of`, so stock-on-date only replays movements since"""
+	item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="checkpoints")
+	as_of = models.DateTimeField()
+	quantity = models.IntegerField()
+
+	class Meta:
+		ordering = ["-as_of"]
+		constraints = [
+			models.UniqueConstraint(fields=["item", "as_of"], name="stockcheckpoint_item_asof_uniq"),
+		]
+
+	def __str__(self):
+		return f"{self.item_id} @ {self.as_of}: {self.quantity}"
+
+class InventoryValuation(models.Model):
+	"""
+	Running stock value per unit of measure, plus an all-units total row.
+
+	Kept in step with InventoryItem by inventory.valuation, so reports read
+	one row instead of summing the whole stock table.
+	"""
+	# Key of the all-units row; InventoryItem.unit is required, so never a real unit
+	ALL_UNITS = ""
+
+	unit = models.CharField(max_length=20, unique=True, blank=True)
+	item_count = models.IntegerField(default=0)
+	quantity = models.BigIntegerField(default=0)
+	value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+	class Meta:
+		ordering = ["unit"]
+
+	def __str__(self):
+		return f"{self.unit or 'All units'}: {self.value}"
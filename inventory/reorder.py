@@ -0,0 +1,76 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import InventoryItem, StockMovement
+from .stock import OUTGOING, _stock_changed
+
+# History the consumption rate is averaged over
+CONSUMPTION_WINDOW_DAYS = 28
+# Days of stock an order should cover once it arrives, on top of the reorder level
+REVIEW_PERIOD_DAYS = 7
+
+USAGE_PLACES = Decimal('0.001')
+
+
+def low_stock_items():
+	"""Items at or below their reorder level; matches inventory_low_stock_idx"""
+	return InventoryItem.objects.filter(reorder_level__gt=0, quantity__lte=F('reorder_level')).order_by('name')
+
+
+def suggested_quantity(quantity, reorder_level, lead_time_days, daily_usage):
+	"""
+	Units to order so stock is back above the reorder level for a review period.
+
+	What is used while the order is on its way comes out of the current
+	stock, so the order covers lead time plus review period at the
+	current consumption rate, topped up to the reorder level.
+	"""
+	target = reorder_level + math.ceil(daily_usage * (lead_time_days + REVIEW_PERIOD_DAYS))
+	return max(target - quantity, 0)
+
+
+def reorder_list():
+	"""The low-stock items with suggested order quantities, as plain dicts for caching"""
+	rows = low_stock_items().values(
+		'pk', 'name', 'unit', 'quantity', 'reorder_level', 'lead_time_days', 'daily_usage', 'usage_updated_at',
+	)
+	suggestions = []
+	for row in rows:
+		usage = row['daily_usage']
+		row['suggested_quantity'] = suggested_quantity(
+			row['quantity'], row['reorder_level'], row['lead_time_days'], usage,
+		)
+		row['days_left'] = (Decimal(row['quantity']) / usage).quantize(Decimal('0.1')) if usage else None
+		suggestions.append(row)
+	return suggestions
+
+
+def update_consumption_rates(days=CONSUMPTION_WINDOW_DAYS, now=None):
+	"""
+	Recompute every item's average daily usage from the last `days` of issues and wastage.
+
+	One grouped query over the ledger and one bulk_update, so it belongs in
+	a scheduled job rather than a page load. Returns the number of items
+	updated.
+	"""
+	now = now or timezone.now()
+	used = dict(
+		StockMovement.objects.filter(kind__in=OUTGOING, created_at__gte=now - timedelta(days=days), created_at__lt=now)
+		.order_by()
+		.values('item')
+		.annotate(total=Sum('quantity'))
+		.values_list('item', 'total')
+	)
+	items = list(InventoryItem.objects.only('pk', 'daily_usage', 'usage_updated_at'))
+	for item in items:
+		item.daily_usage = (Decimal(-used.get(item.pk, 0)) / days).quantize(USAGE_PLACES)
+		item.usage_updated_at = now
+	with transaction.atomic():
+		InventoryItem.objects.bulk_update(items, ['daily_usage', 'usage_updated_at'], batch_size=500)
+		_stock_changed()
+	return len(items)
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import valuation
+from .models import InventoryItem
+
+
+@receiver(pre_save, sender=InventoryItem)
+def remember_previous_item(sender, instance, raw, **kwargs):
+	# Read what was counted from the database: the instance may be stale
+	# after ledger updates, and update_fields saves leave other columns alone
+	instance._valuation_previous = None
+	if instance.pk and not raw:
+		instance._valuation_previous = valuation.item_state(instance.pk)
+
+
+@receiver(post_save, sender=InventoryItem)
+def revalue_item_saved(sender, instance, raw, **kwargs):
+	if raw:
+		return
+	valuation.revalue(getattr(instance, '_valuation_previous', None), valuation.item_state(instance.pk))
+
+
+@receiver(pre_delete, sender=InventoryItem)
+def revalue_item_deleted(sender, instance, **kwargs):
+	valuation.revalue(valuation.item_state(instance.pk), None)
@@ -0,0 +1,278 @@
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from dashboard.kpis import bump_on_commit
+
+from .models import InventoryItem, StockCheckpoint, StockMovement
+from .valuation import stock_moved
+
+# Kinds that take stock out, entered as positive numbers and stored negative
+OUTGOING = (StockMovement.ISSUE, StockMovement.WASTAGE)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _stock_changed():
+	# Queryset updates and bulk_create skip the signals that bump these
+	bump_on_commit(InventoryItem, StockMovement)
+
+
+def signed_quantity(kind, quantity):
+	"""Ledger delta for `quantity` of `kind`; adjustments keep their own sign"""
+	if kind not in dict(StockMovement.KINDS):
+		raise ValidationError(f'Unknown movement kind: {kind}')
+	if kind == StockMovement.ADJUSTMENT:
+		if not quantity:
+			raise ValidationError('An adjustment must change the quantity.')
+		return quantity
+	if quantity <= 0:
+		raise ValidationError('Quantity must be at least 1.')
+	return -quantity if kind in OUTGOING else quantity
+
+
+def _apply(movements):
+	"""
+	Move each item's on-hand quantity by its movements with one F() update per item.
+
+	Stock may not go negative: the UPDATE only matches while enough is on
+	hand, so two concurrent issues cannot both take the last unit.
+	"""
+	deltas = defaultdict(int)
+	for movement in movements:
+		deltas[movement.item_id] += movement.quantity
+	now = timezone.now()
+	for item_id, delta in deltas.items():
+		updated = InventoryItem.objects.filter(pk=item_id, quantity__gte=-delta).update(
+			quantity=F('quantity') + delta, last_updated=now,
+		)
+		if not updated:
+			item = InventoryItem.objects.filter(pk=item_id).first()
+			if item is None:
+				raise ValidationError(f'Inventory item {item_id} does not exist.')
+			raise ValidationError(f'Not enough {item.name} in stock: {item.quantity} {item.unit} on hand.')
+	# The updates above bypass post_save, so move the valuation along with them
+	stock_moved(deltas)
+
+
+def record_movement(item, kind, quantity, unit_cost=None, reference='', note='', user=None):
+	"""Append one movement to the ledger and apply it to the item"""
+	movement = StockMovement(
+		item=item,
+		kind=kind,
+		quantity=signed_quantity(kind, quantity),
+		unit_cost=unit_cost,
+		reference=reference,
+		note=note,
+		created_by=user,
+	)
+	with transaction.atomic():
+		_apply([movement])
+		movement.save()
+		_stock_changed()
+	return movement
+
+
+def post_movements(kind, quantities, reference='', note='', user=None):
+	"""
+	Post one `kind` movement per item from `quantities` (item id -> quantity).
+
+	All movements share one bulk_create and each item gets a single F()
+	update, however many lines contributed to its quantity.
+	"""
+	now = timezone.now()
+	movements = [
+		StockMovement(
+			item_id=item_id,
+			kind=kind,
+			quantity=signed_quantity(kind, quantity),
+			reference=reference,
+			note=note,
+			created_at=now,
+			created_by=user,
+		)
+		for item_id, quantity in quantities.items()
+		if quantity
+	]
+	if not movements:
+		return []
+	with transaction.atomic():
+		_apply(movements)
+		StockMovement.objects.bulk_create(movements)
+		_stock_changed()
+	return movements
+
+
+def issue_available(quantities, reference='', note='', user=None, sales_bill=None):
+	"""
+	Issue up to `quantities` (item id -> quantity), never more than is on hand.
+
+	For sales, which must go through even when the counted stock says the
+	ingredients ran out. Each item is issued down to zero at most, and a
+	movement that fell short says so in its note. Returns (movements,
+	shortfalls), shortfalls mapping item id -> units that could not be issued.
+	"""
+	with transaction.atomic():
+		# Lock the rows so the balances read here are still current when applied
+		on_hand = dict(
+			InventoryItem.objects.select_for_update().filter(pk__in=quantities).values_list('pk', 'quantity')
+		)
+		now = timezone.now()
+		movements = []
+		shortfalls = {}
+		for item_id, quantity in quantities.items():
+			issued = min(quantity, on_hand.get(item_id, 0))
+			if issued < quantity:
+				shortfalls[item_id] = quantity - issued
+			if not issued:
+				continue
+			movements.append(StockMovement(
+				item_id=item_id,
+				kind=StockMovement.ISSUE,
+				quantity=signed_quantity(StockMovement.ISSUE, issued),
+				reference=reference,
+				note=f'{note} ({quantity - issued} short)' if issued < quantity else note,
+				created_at=now,
+				created_by=user,
+				sales_bill=sales_bill,
+			))
+		if movements:
+			_apply(movements)
+			StockMovement.objects.bulk_create(movements)
+			_stock_changed()
+	return movements, shortfalls
+
+
+def receive_goods(reference, lines, user=None, note=''):
+	"""
+	Post a whole delivery note: `lines` of (item_id, quantity, unit_cost).
+
+	Every line is validated first, then all movements are written with one
+	bulk_create and the items updated in the same transaction, so a
+	delivery is either fully booked in or not at all.
+	"""
+	if not lines:
+		raise ValidationError('A goods receipt needs at least one line.')
+	items = InventoryItem.objects.in_bulk({item_id for item_id, _qty, _cost in lines})
+	missing = sorted({item_id for item_id, _qty, _cost in lines if item_id not in items})
+	if missing:
+		raise ValidationError(f"Unknown inventory item(s): {', '.join(map(str, missing))}")
+
+	now = timezone.now()
+	movements = [
+		StockMovement(
+			item=items[item_id],
+			kind=StockMovement.RECEIPT,
+			quantity=signed_quantity(StockMovement.RECEIPT, quantity),
+			unit_cost=unit_cost,
+			reference=reference,
+			note=note,
+			created_at=now,
+			created_by=user,
+		)
+		for item_id, quantity, unit_cost in lines
+	]
+	with transaction.atomic():
+		_apply(movements)
+		StockMovement.objects.bulk_create(movements)
+		_stock_changed()
+	return movements
+
+
+def post_opening_balances():
+	"""
+	Give every stocked item with no ledger rows an opening adjustment.
+
+	The same backfill inventory/migrations/0003 ran, for items that arrive
+	without their movements (an import of a pre-ledger export), so that
+	stock_on() agrees with the stored quantity. Returns the movements written.
+	"""
+	unledgered = InventoryItem.objects.exclude(quantity=0).exclude(
+		Exists(StockMovement.objects.filter(item=OuterRef('pk')))
+	)
+	movements = StockMovement.objects.bulk_create([
+		StockMovement(
+			item_id=pk,
+			kind=StockMovement.ADJUSTMENT,
+			quantity=quantity,
+			unit_cost=price,
+			note='Opening balance',
+			created_at=updated,
+		)
+		for pk, quantity, price, updated in unledgered.values_list('pk', 'quantity', 'price_per_unit', 'last_updated')
+	], batch_size=500)
+	if movements:
+		bump_on_commit(StockMovement)
+	return movements
+
+
+def stock_on(when, items=None):
+	"""
+	Map item id -> quantity on hand at `when`.
+
+	Starts from each item's latest checkpoint at or before `when` and adds
+	only the movements recorded after it, all in one query.
+	"""
+	if items is None:
+		items = InventoryItem.objects.all()
+	checkpoint = StockCheckpoint.objects.filter(item=OuterRef('pk'), as_of__lte=when).order_by('-as_of')
+	items = items.annotate(
+		checkpoint_at=Subquery(checkpoint.values('as_of')[:1]),
+		checkpoint_quantity=Subquery(checkpoint.values('quantity')[:1]),
+	)
+	moved = (
+		StockMovement.objects.filter(
+			item=OuterRef('pk'),
+			created_at__lte=when,
+			created_at__gt=Coalesce(OuterRef('checkpoint_at'), Value(_EPOCH)),
+		)
+		.order_by()
+		.values('item')
+		.annotate(total=Sum('quantity'))
+		.values('total')
+	)
+	items = items.annotate(
+		on_hand=Coalesce(F('checkpoint_quantity'), 0) + Coalesce(Subquery(moved, output_field=IntegerField()), 0)
+	)
+	return dict(items.values_list('pk', 'on_hand'))
+
+
+def create_checkpoints(as_of):
+	"""
+	Record every item's balance at `as_of`, building on its previous checkpoint.
+
+	Returns the number of checkpoints written. Items that already have a
+	checkpoint at `as_of` are left alone, so the command can be re-run.
+	"""
+	existing = set(StockCheckpoint.objects.filter(as_of=as_of).values_list('item_id', flat=True))
+	balances = stock_on(as_of, InventoryItem.objects.exclude(pk__in=existing))
+	StockCheckpoint.objects.bulk_create(
+		[StockCheckpoint(item_id=pk, as_of=as_of, quantity=quantity) for pk, quantity in balances.items()],
+		batch_size=500,
+	)
+	bump_on_commit(StockCheckpoint)
+	return len(balances)
+
+
+def parse_receipt_lines(item_ids, quantities, unit_costs):
+	"""Zip the items[]/quantities[]/unit_costs[] form lists into receive_goods lines"""
+	lines = []
+	for item_id, quantity, unit_cost in zip(item_ids, quantities, unit_costs):
+		if not (item_id and quantity):
+			continue
+		try:
+			cost = Decimal(unit_cost) if str(unit_cost).strip() else None
+			lines.append((int(item_id), int(quantity), cost))
+		except (ValueError, InvalidOperation):
+			raise ValidationError(f'Invalid receipt line: {item_id} x {quantity} @ {unit_cost}')
+		# Decimal() also accepts NaN and Infinity, and a cost below zero would
+		# take value out of the valuation on a receipt
+		if cost is not None and not (cost.is_finite() and cost >= 0):
+			raise ValidationError(f'Invalid unit cost: {unit_cost}')
+	return lines
@@ -1,3 +1,271 @@
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.testing import QueryPlanAssertions
+
+from .models import InventoryItem, InventoryValuation, StockCheckpoint, StockMovement
+from .reorder import low_stock_items, reorder_list, update_consumption_rates
+from .valuation import compute_valuation, inventory_valuation, verify_valuation
+from .stock import create_checkpoints, parse_receipt_lines, receive_goods, record_movement, stock_on
+
+
+class InventoryQueryPlanTests(QueryPlanAssertions, TestCase):
+	"""Recently-updated stock lookups must read the last_updated index"""
+
+	@classmethod
+	def setUpTestData(cls):
+		for i in range(30):
+			InventoryItem.objects.create(name=f'Item {i}', quantity=i, unit='kg', price_per_unit=Decimal('3.20'))
+
+	def test_recently_updated(self):
+		# Reads the newest 20 entries of the index, not the table
+		plan = self.assertUsesIndex(InventoryItem.objects.order_by('-last_updated')[:20], allow=['inventory_inventoryitem'])
+		self.assertIn('inventory_updated_idx', plan)
+
+
+class StockLedgerTests(QueryPlanAssertions, TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('storekeeper', password='secret')
+		cls.rice = InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('1.20'))
+		cls.oil = InventoryItem.objects.create(name='Oil', unit='l', price_per_unit=Decimal('3.00'))
+
+	def quantity(self, item):
+		return InventoryItem.objects.get(pk=item.pk).quantity
+
+	def test_movements_update_quantity(self):
+		record_movement(self.rice, StockMovement.RECEIPT, 50)
+		record_movement(self.rice, StockMovement.ISSUE, 12)
+		record_movement(self.rice, StockMovement.WASTAGE, 3)
+		record_movement(self.rice, StockMovement.ADJUSTMENT, -5)
+		self.assertEqual(self.quantity(self.rice), 30)
+		self.assertEqual(
+			list(self.rice.movements.order_by('id').values_list('quantity', flat=True)), [50, -12, -3, -5],
+		)
+
+	def test_stale_instance_does_not_lose_updates(self):
+		stale = InventoryItem.objects.get(pk=self.rice.pk)
+		record_movement(self.rice, StockMovement.RECEIPT, 10)
+		record_movement(stale, StockMovement.RECEIPT, 5)
+		self.assertEqual(self.quantity(self.rice), 15)
+
+	def test_cannot_issue_more_than_on_hand(self):
+		record_movement(self.rice, StockMovement.RECEIPT, 2)
+		with self.assertRaises(ValidationError):
+			record_movement(self.rice, StockMovement.ISSUE, 3)
+		self.assertEqual(self.quantity(self.rice), 2)
+		self.assertEqual(self.rice.movements.count(), 1)
+
+	def test_movements_are_append_only(self):
+		movement = record_movement(self.rice, StockMovement.RECEIPT, 2)
+		movement.quantity = 20
+		with self.assertRaises(ValueError):
+			movement.save()
+
+	def test_goods_receipt_is_all_or_nothing(self):
+		receive_goods('DN-1', [(self.rice.pk, 25, Decimal('1.10')), (self.oil.pk, 4, None)])
+		self.assertEqual((self.quantity(self.rice), self.quantity(self.oil)), (25, 4))
+		with self.assertRaises(ValidationError):
+			receive_goods('DN-2', [(self.rice.pk, 5, None), (9999, 1, None)])
+		with self.assertRaises(ValidationError):
+			receive_goods('DN-3', [(self.rice.pk, 5, None), (self.oil.pk, 0, None)])
+		self.assertEqual(self.quantity(self.rice), 25)
+		self.assertEqual(StockMovement.objects.filter(reference='DN-1').count(), 2)
+		self.assertEqual(StockMovement.objects.exclude(reference='DN-1').count(), 0)
+
+	def test_receipt_lines_reject_bad_costs(self):
+		self.assertEqual(
+			parse_receipt_lines(['1', '2', ''], ['3', '4', '5'], ['0.50', ' ', '1']),
+			[(1, 3, Decimal('0.50')), (2, 4, None)],
+		)
+		for cost in ('NaN', 'Infinity', '-1'):
+			with self.assertRaises(ValidationError):
+				parse_receipt_lines(['1'], ['3'], [cost])
+
+	def test_stock_on_date_from_checkpoints(self):
+		start = timezone.make_aware(datetime(2026, 4, 1, 9))
+
+		def move(days, kind, quantity):
+			movement = record_movement(self.rice, kind, quantity)
+			StockMovement.objects.filter(pk=movement.pk).update(created_at=start + timedelta(days=days))
+
+		move(0, StockMovement.RECEIPT, 40)
+		move(1, StockMovement.ISSUE, 10)
+		move(3, StockMovement.RECEIPT, 5)
+		checkpoint_at = start + timedelta(days=2)
+		self.assertEqual(create_checkpoints(checkpoint_at), 2)
+		self.assertEqual(create_checkpoints(checkpoint_at), 0)
+		self.assertEqual(StockCheckpoint.objects.get(item=self.rice).quantity, 30)
+
+		# Movements before the checkpoint are no longer replayed
+		StockMovement.objects.filter(created_at__lt=checkpoint_at).delete()
+		self.assertEqual(stock_on(start + timedelta(days=5))[self.rice.pk], 35)
+		self.assertEqual(stock_on(checkpoint_at)[self.rice.pk], 30)
+		self.assertEqual(stock_on(start + timedelta(days=5))[self.oil.pk], 0)
+
+	def test_checkpoint_command_only_takes_past_days(self):
+		today = timezone.localdate()
+		with self.assertRaisesMessage(CommandError, 'has not ended yet'):
+			call_command('checkpoint_stock', date=today.isoformat(), stdout=io.StringIO())
+		with self.assertRaisesMessage(CommandError, 'has not ended yet'):
+			call_command('checkpoint_stock', date=(today + timedelta(days=30)).isoformat(), stdout=io.StringIO())
+		self.assertFalse(StockCheckpoint.objects.exists())
+
+		call_command('checkpoint_stock', date=(today - timedelta(days=1)).isoformat(), stdout=io.StringIO())
+		self.assertEqual(StockCheckpoint.objects.count(), 2)
+
+	def test_item_ledger_uses_index(self):
+		self.assertUsesIndex(self.rice.movements.order_by('-created_at', '-id')[:50])
+
+	def test_receipt_endpoint(self):
+		self.client.force_login(self.user)
+		body = {'reference': 'DN-9', 'lines': [{'item': self.oil.pk, 'quantity': 6, 'unit_cost': '2.75'}]}
+		response = self.client.post('/dashboard/inventory/receipts/', json.dumps(body), content_type='application/json')
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(self.quantity(self.oil), 6)
+		body['lines'][0]['item'] = 9999
+		response = self.client.post('/dashboard/inventory/receipts/', json.dumps(body), content_type='application/json')
+		self.assertEqual(response.status_code, 400)
+
+	def test_stock_page_records_movement(self):
+		self.client.force_login(self.user)
+		record_movement(self.rice, StockMovement.RECEIPT, 5)
+		url = f'/dashboard/inventory/{self.rice.pk}/stock/'
+		response = self.client.post(url, {'kind': 'issue', 'quantity': 9})
+		self.assertContains(response, 'Not enough Rice')
+		response = self.client.post(url, {'kind': 'issue', 'quantity': 2, 'note': 'Kitchen'})
+		self.assertRedirects(response, url)
+		self.assertEqual(self.quantity(self.rice), 3)
+		self.assertContains(self.client.get(url + '?on=2000-01-01'), '0 kg on')
+
+	def test_editing_details_keeps_quantity(self):
+		self.client.force_login(self.user)
+		record_movement(self.rice, StockMovement.RECEIPT, 7)
+		data = {
+			'name': 'Basmati', 'description': '', 'unit': 'kg', 'price_per_unit': '1.50', 'quantity': 999,
+			'reorder_level': 4, 'lead_time_days': 2,
+		}
+		self.client.post(f'/dashboard/inventory/{self.rice.pk}/update/', data)
+		item = InventoryItem.objects.get(pk=self.rice.pk)
+		self.assertEqual((item.name, item.quantity, item.reorder_level), ('Basmati', 7, 4))
+
+
+class ReorderTests(QueryPlanAssertions, TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('storekeeper', password='secret')
+		cls.flour = InventoryItem.objects.create(
+			name='Flour', unit='kg', price_per_unit=Decimal('0.90'), reorder_level=10, lead_time_days=3,
+		)
+		cls.sugar = InventoryItem.objects.create(name='Sugar', unit='kg', price_per_unit=Decimal('1.10'), reorder_level=5)
+		cls.salt = InventoryItem.objects.create(name='Salt', unit='kg', price_per_unit=Decimal('0.40'))
+		for i in range(30):
+			InventoryItem.objects.create(
+				name=f'Spice {i}', quantity=50, unit='g', price_per_unit=Decimal('0.10'), reorder_level=10,
+			)
+
+	def setUp(self):
+		cache.clear()
+
+	def test_low_stock_uses_partial_index(self):
+		# The partial index holds only items at or below their reorder level
+		plan = self.assertUsesIndex(low_stock_items(), allow=['inventory_inventoryitem'])
+		self.assertIn('inventory_low_stock_idx', plan)
+		record_movement(self.sugar, StockMovement.RECEIPT, 20)
+		# Salt has no reorder level, so it is never flagged
+		self.assertEqual(list(low_stock_items()), [self.flour])
+
+	def test_consumption_rates_and_suggestions(self):
+		now = timezone.now()
+		record_movement(self.flour, StockMovement.RECEIPT, 100)
+		issue = record_movement(self.flour, StockMovement.ISSUE, 70)
+		record_movement(self.flour, StockMovement.WASTAGE, 14)
+		old = record_movement(self.flour, StockMovement.ISSUE, 8)
+		StockMovement.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=40))
+		StockMovement.objects.filter(pk=issue.pk).update(created_at=now - timedelta(days=3))
+
+		self.assertEqual(update_consumption_rates(days=28, now=now + timedelta(seconds=1)), 33)
+		flour = InventoryItem.objects.get(pk=self.flour.pk)
+		self.assertEqual((flour.quantity, flour.daily_usage), (8, Decimal('3.000')))
+
+		rows = {row['name']: row for row in reorder_list()}
+		self.assertEqual(sorted(rows), ['Flour', 'Sugar'])
+		# 10 + 3/day over 3 days' lead time and a 7 day review period, less the 8 on hand
+		self.assertEqual(rows['Flour']['suggested_quantity'], 32)
+		self.assertEqual(rows['Flour']['days_left'], Decimal('2.7'))
+		self.assertEqual((rows['Sugar']['suggested_quantity'], rows['Sugar']['days_left']), (5, None))
+
+	def test_dashboard_reorder_list_is_cached(self):
+		self.client.force_login(self.user)
+		self.assertContains(self.client.get('/dashboard/'), 'Flour')
+		with CaptureQueriesContext(connection) as context:
+			self.client.get('/dashboard/')
+		# Session, user, the version table and cache reads; the KPIs and
+		# reorder list come from the cache, not the inventory or sales tables
+		tables = {'django_session', 'auth_user', 'dashboard_modelversion', 'dashboard_cache'}
+		for query in context.captured_queries:
+			self.assertTrue(any(f'"{table}"' in query['sql'] for table in tables), query['sql'])
+		with self.captureOnCommitCallbacks(execute=True):
+			record_movement(self.flour, StockMovement.RECEIPT, 50)
+		self.assertNotContains(self.client.get('/dashboard/'), 'Flour')
+
+
+class InventoryValuationTests(TestCase):
+
+	def setUp(self):
+		self.rice = InventoryItem.objects.create(name='Rice', unit='kg', price_per_unit=Decimal('1.15'))
+		self.oil = InventoryItem.objects.create(name='Oil', unit='l', price_per_unit=Decimal('3.10'))
+
+	def assertMaintained(self):
+		# Units left with no items keep an all-zero row
+		stored = {
+			row.unit: (row.item_count, row.quantity, row.value)
+			for row in InventoryValuation.objects.all()
+			if row.item_count or row.unit == InventoryValuation.ALL_UNITS
+		}
+		self.assertEqual(stored, compute_valuation())
+
+	def test_kept_in_step_with_stock(self):
+		receive_goods('DN-1', [(self.rice.pk, 30, None), (self.oil.pk, 7, None)])
+		record_movement(self.rice, StockMovement.ISSUE, 3)
+		self.assertEqual(inventory_valuation().value, Decimal('52.75'))
+		self.assertEqual(inventory_valuation('kg').quantity, 27)
+
+		# A stale copy saved with a new price and unit revalues what is on hand
+		stale = InventoryItem.objects.get(pk=self.rice.pk)
+		record_movement(self.rice, StockMovement.RECEIPT, 3)
+		stale.price_per_unit = Decimal('1.20')
+		stale.unit = 'bag'
+		stale.save(update_fields=['price_per_unit', 'unit'])
+		self.assertEqual(inventory_valuation('bag').value, Decimal('36.00'))
+		self.assertEqual(inventory_valuation('kg').item_count, 0)
+		self.assertMaintained()
+
+		self.oil.delete()
+		self.assertEqual(inventory_valuation().value, Decimal('36.00'))
+		self.assertEqual(inventory_valuation().item_count, 1)
+		self.assertMaintained()
 
-# Create your tests here.
+	def test_verify_rebuilds_drifted_rows(self):
+		record_movement(self.oil, StockMovement.RECEIPT, 4)
+		self.assertEqual(verify_valuation(), [])
+		InventoryValuation.objects.filter(unit='l').update(value=Decimal('99'))
+		InventoryItem.objects.filter(pk=self.rice.pk).update(quantity=2)
+		drift = verify_valuation(fix=False)
+		self.assertEqual([unit for unit, _stored, _expected in drift], ['', 'kg', 'l'])
+		verify_valuation()
+		self.assertMaintained()
+		self.assertEqual(inventory_valuation().value, Decimal('14.70'))
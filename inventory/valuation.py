@@ -0,0 +1,113 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+
+from dashboard.kpis import bump_on_commit
+
+from .models import InventoryItem, InventoryValuation
+
+FIELDS = ('item_count', 'quantity', 'value')
+
+
+def item_deltas(rows):
+	"""Map unit -> [item_count, quantity, value] for an iterable of (unit, count, quantity, price)"""
+	deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+	for unit, count, quantity, price in rows:
+		for key in (unit, InventoryValuation.ALL_UNITS):
+			delta = deltas[key]
+			delta[0] += count
+			delta[1] += quantity
+			delta[2] += quantity * price
+	return deltas
+
+
+def apply_valuation(deltas):
+	"""Add item_deltas() output to the valuation rows with F() updates"""
+	bump_on_commit(InventoryValuation)
+	with transaction.atomic():
+		for unit, values in deltas.items():
+			updates = {field: F(field) + value for field, value in zip(FIELDS, values) if value}
+			if not updates:
+				continue
+			rows = InventoryValuation.objects.filter(unit=unit)
+			if not rows.update(**updates):
+				InventoryValuation.objects.get_or_create(unit=unit)
+				rows.update(**updates)
+
+
+def item_state(pk):
+	"""(unit, 1, quantity, price) as currently stored for one item, or None"""
+	row = InventoryItem.objects.filter(pk=pk).values_list('unit', 'quantity', 'price_per_unit').first()
+	return row and (row[0], 1, row[1], row[2])
+
+
+def revalue(before, after):
+	"""Swap an item's contribution from its `before` to its `after` item_state()"""
+	rows = []
+	if before:
+		unit, count, quantity, price = before
+		rows.append((unit, -count, -quantity, price))
+	if after:
+		rows.append(after)
+	apply_valuation(item_deltas(rows))
+
+
+def stock_moved(quantities):
+	"""Revalue after queryset updates moved stock: `quantities` maps item id -> quantity delta"""
+	items = InventoryItem.objects.filter(pk__in=quantities).values_list('pk', 'unit', 'price_per_unit')
+	apply_valuation(item_deltas((unit, 0, quantities[pk], price) for pk, unit, price in items))
+
+
+def inventory_valuation(unit=InventoryValuation.ALL_UNITS):
+	"""The maintained valuation row for `unit` (default: all units), zeros if none yet"""
+	return InventoryValuation.objects.filter(unit=unit).first() or InventoryValuation(unit=unit)
+
+
+def compute_valuation():
+	"""Map unit -> (item_count, quantity, value), recomputed from the stock table"""
+	totals = {InventoryValuation.ALL_UNITS: (0, 0, Decimal('0'))}
+	rows = (
+		InventoryItem.objects.values('unit')
+		.annotate(
+			count=Count('id'),
+			total_quantity=Sum('quantity'),
+			total_value=Sum(F('quantity') * F('price_per_unit'), output_field=DecimalField()),
+		)
+		.order_by()
+	)
+	for row in rows:
+		value = row['total_value'].quantize(Decimal('0.01'))
+		totals[row['unit']] = (row['count'], row['total_quantity'], value)
+		count, quantity, total = totals[InventoryValuation.ALL_UNITS]
+		totals[InventoryValuation.ALL_UNITS] = (count + row['count'], quantity + row['total_quantity'], total + value)
+	return totals
+
+
+def verify_valuation(fix=True):
+	"""
+	Compare the maintained rows with a full recomputation.
+
+	Returns a list of (unit, stored, expected) for every row that drifted;
+	with `fix` the rows are rewritten from the recomputed figures.
+	"""
+	expected = compute_valuation()
+	with transaction.atomic():
+		stored = {
+			row[0]: row[1:]
+			for row in InventoryValuation.objects.select_for_update().values_list('unit', *FIELDS)
+		}
+		zero = (0, 0, Decimal('0'))
+		drift = [
+			(unit, stored.get(unit, zero), expected.get(unit, zero))
+			for unit in sorted(set(stored) | set(expected))
+			if stored.get(unit, zero) != expected.get(unit, zero)
+		]
+		if fix and drift:
+			InventoryValuation.objects.all().delete()
+			InventoryValuation.objects.bulk_create(
+				InventoryValuation(unit=unit, **dict(zip(FIELDS, values))) for unit, values in expected.items()
+			)
+			bump_on_commit(InventoryValuation)
+	return drift
@@ -1,6 +1,6 @@
 
 from django.contrib import admin
-from .models import Room
+from .models import Guest, Room
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
@@ -15,3 +15,11 @@ class RoomAdmin(admin.ModelAdmin):
 			'fields': ("is_available", "price_per_night")
 		}),
 	)
+
+
+@admin.register(Guest)
+class GuestAdmin(admin.ModelAdmin):
+	list_display = ("first_name", "last_name", "room", "check_in", "check_out")
+	search_fields = ("first_name", "last_name", "room__number")
+	list_filter = ("room__room_type",)
+	date_hierarchy = "check_in"
@@ -0,0 +1,61 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
+
+from .models import Guest, Room
+
+
+def overlapping_stays(check_in, check_out):
+	"""
+	Guest stays that overlap the half-open night range [check_in, check_out).
+
+	Two stays overlap when each starts before the other ends, so a guest
+	checking out on the day another checks in is not a conflict. Both
+	predicates are range conditions on the (room, check_in, check_out) index.
+	"""
+	return Guest.objects.filter(check_in__lt=check_out, check_out__gt=check_in)
+
+
+def validate_stay(check_in, check_out):
+	if check_in is None or check_out is None:
+		raise ValidationError('Both check-in and check-out dates are required.')
+	if check_out <= check_in:
+		raise ValidationError('Check-out must be after check-in.')
+
+
+def available_rooms(check_in, check_out, room_type=None, min_price=None, max_price=None):
+	"""
+	Rooms free for every night from `check_in` up to `check_out`, cheapest first.
+
+	Runs as a single query: the overlap test is a correlated NOT EXISTS
+	against the guest index rather than a scan of every stay. Rooms under
+	maintenance are never offered.
+	"""
+	validate_stay(check_in, check_out)
+	rooms = Room.objects.exclude(status='maintenance')
+	if room_type:
+		rooms = rooms.filter(room_type=room_type)
+	if min_price is not None:
+		rooms = rooms.filter(price_per_night__gte=min_price)
+	if max_price is not None:
+		rooms = rooms.filter(price_per_night__lte=max_price)
+	booked = overlapping_stays(check_in, check_out).filter(room=OuterRef('pk'))
+	return rooms.filter(~Exists(booked)).order_by('price_per_night', 'number')
+
+
+def booking_conflicts(room, check_in, check_out, exclude=None):
+	"""Stays already holding `room` on any night in [check_in, check_out)"""
+	stays = overlapping_stays(check_in, check_out).filter(room=room)
+	if exclude is not None:
+		stays = stays.exclude(pk=exclude)
+	return stays
+
+
+def check_room_free(room, check_in, check_out, exclude=None):
+	"""Raise ValidationError if `room` is already booked for part of the stay"""
+	validate_stay(check_in, check_out)
+	conflict = booking_conflicts(room, check_in, check_out, exclude).order_by('check_in').first()
+	if conflict is not None:
+		raise ValidationError(
+			f'Room {room.number} is already booked by {conflict} '
+			f'from {conflict.check_in} to {conflict.check_out}.'
+		)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=10, unique=True)),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite')], max_length=10)),
+                ('status', models.CharField(choices=[('available', 'Available'), ('booked', 'Booked'), ('occupied', 'Occupied'), ('maintenance', 'Maintenance')], default='available', max_length=15)),
+                ('is_available', models.BooleanField(default=True)),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=8)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Guest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=50)),
+                ('last_name', models.CharField(max_length=50)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guests', to='rooms.room')),
+            ],
+        ),
+    ]
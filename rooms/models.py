@@ -1,5 +1,5 @@
 
-from django.db import models
+from django.db import models, transaction
 
 class Room(models.Model):
 	ROOM_TYPES = [
@@ -19,6 +19,11 @@ class Room(models.Model):
 	is_available = models.BooleanField(default=True)
 	price_per_night = models.DecimalField(max_digits=8, decimal_places=2)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["room_type", "price_per_night"], name="room_type_price_idx"),
+		]
+
 	def __str__(self):
 		return f"Room {self.number} ({self.room_type})"
 
@@ -31,5 +36,34 @@ class Guest(models.Model):
 	check_out = models.DateField()
 	room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="guests")
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["room", "check_in", "check_out"], name="guest_room_stay_idx"),
+			models.Index(fields=["check_in", "check_out"], name="guest_stay_idx"),
+		]
+
 	def __str__(self):
 		return f"{self.first_name} {self.last_name}"
+
+	def clean(self):
+		from .availability import check_room_free
+		if self.room_id and self.check_in and self.check_out:
+			check_room_free(self.room, self.check_in, self.check_out, exclude=self.pk)
+
+	def save(self, *args, **kwargs):
+		"""
+		Refuse to save a stay that double-books the room, or that has no nights.
+
+		A stay must check out at least one day after it checks in: stays are
+		half-open [check_in, check_out), so one with check_out == check_in
+		would hold no night and could never conflict with anything.
+		"""
+		from .availability import check_room_free
+		with transaction.atomic():
+			# SQLite ignores select_for_update(); the default connection's
+			# IMMEDIATE transaction mode takes the write lock when the block
+			# begins, so a second booking waits here until this one commits.
+			# The row lock is kept for databases that do support it.
+			room = Room.objects.select_for_update().get(pk=self.room_id)
+			check_room_free(room, self.check_in, self.check_out, exclude=self.pk)
+			super().save(*args, **kwargs)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import Guest, Room
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+def _cents(value):
+	return (Decimal(int(value)) / 100).quantize(Decimal('0.01'))
+
+
+def occupancy_report(start, end):
+	"""
+	Rooms x nights occupancy for the nights from `start` up to `end`.
+
+	Stays are loaded in one query and turned into the grid with a
+	difference array: +1 on each stay's first night, -1 the morning it
+	leaves, then a cumulative sum along each room's row. Revenue is kept in
+	integer cents so ADR and RevPAR come out exact.
+
+	Returns plain lists and Decimals so the result can be cached.
+	"""
+	if np is None:
+		raise ImproperlyConfigured('The occupancy report requires NumPy.')
+	nights = (end - start).days
+	rooms = list(Room.objects.order_by('number').values_list('pk', 'number', 'room_type', 'price_per_night'))
+	stays = list(
+		Guest.objects.filter(check_in__lt=end, check_out__gt=start)
+		.values_list('room_id', 'check_in', 'check_out')
+	)
+
+	room_ids = np.array([room[0] for room in rooms], dtype=np.int64)
+	order = np.argsort(room_ids)
+	prices = np.array([int(room[3] * 100) for room in rooms], dtype=np.int64)
+	grid = np.zeros((len(rooms), nights), dtype=bool)
+
+	if stays and rooms:
+		stay_rooms = np.array([stay[0] for stay in stays], dtype=np.int64)
+		check_in = np.array([stay[1] for stay in stays], dtype='datetime64[D]')
+		check_out = np.array([stay[2] for stay in stays], dtype='datetime64[D]')
+		origin = np.datetime64(start, 'D')
+		first = np.clip((check_in - origin).astype(np.int64), 0, nights)
+		last = np.clip((check_out - origin).astype(np.int64), 0, nights)
+
+		rows = order[np.searchsorted(room_ids, stay_rooms, sorter=order)]
+		diff = np.zeros((len(rooms), nights + 1), dtype=np.int32)
+		np.add.at(diff, (rows, first), 1)
+		np.add.at(diff, (rows, last), -1)
+		grid = np.cumsum(diff[:, :nights], axis=1) > 0
+
+	occupied = grid.sum(axis=0)
+	revenue = prices @ grid
+	room_count = len(rooms)
+
+	days = []
+	for offset in range(nights):
+		sold = int(occupied[offset])
+		income = _cents(revenue[offset])
+		days.append({
+			'date': start + timedelta(days=offset),
+			'occupied': sold,
+			'occupancy': round(Decimal(100 * sold) / room_count, 1) if room_count else Decimal(0),
+			'revenue': income,
+			'adr': (income / sold).quantize(Decimal('0.01')) if sold else Decimal('0.00'),
+			'revpar': (income / room_count).quantize(Decimal('0.01')) if room_count else Decimal('0.00'),
+		})
+
+	sold = int(occupied.sum())
+	total = _cents(revenue.sum())
+	available = room_count * nights
+	return {
+		'start': start,
+		'end': end,
+		'rooms': [
+			{'number': number, 'room_type': room_type, 'price_per_night': price, 'nights': row}
+			for (_pk, number, room_type, price), row in zip(rooms, grid.tolist())
+		],
+		'days': days,
+		'totals': {
+			'room_nights': sold,
+			'revenue': total,
+			'occupancy': round(Decimal(100 * sold) / available, 1) if available else Decimal(0),
+			'adr': (total / sold).quantize(Decimal('0.01')) if sold else Decimal('0.00'),
+			'revpar': (total / available).quantize(Decimal('0.01')) if available else Decimal('0.00'),
+		},
+	}
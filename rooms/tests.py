@@ -1,3 +1,141 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from dashboard.testing import QueryPlanAssertions
+
+from .availability import available_rooms, check_room_free
+from .occupancy import occupancy_report
+from .models import Guest, Room
+
+
+class RoomQueryPlanTests(QueryPlanAssertions, TestCase):
+	"""Stay-overlap lookups must search the guest indexes"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('planner', password='secret')
+		start = date(2026, 1, 1)
+		for i in range(20):
+			room = Room.objects.create(number=str(100 + i), room_type='double', price_per_night=Decimal('80'))
+			for j in range(5):
+				check_in = start + timedelta(days=j * 3)
+				Guest.objects.create(
+					first_name='Guest', last_name=f'{i}-{j}', room=room,
+					check_in=check_in, check_out=check_in + timedelta(days=2),
+				)
+		cls.room = room
+
+	def test_room_overlap(self):
+		self.assertUsesIndex(Guest.objects.filter(
+			room=self.room, check_in__lt=date(2026, 1, 5), check_out__gt=date(2026, 1, 1),
+		))
+
+	def test_stays_in_range(self):
+		self.assertUsesIndex(Guest.objects.filter(
+			check_in__lt=date(2026, 1, 5), check_out__gt=date(2026, 1, 1),
+		))
+
+	def test_rooms_by_type_and_price(self):
+		self.assertUsesIndex(Room.objects.filter(room_type='double', price_per_night__lte=Decimal('100')))
+
+	def test_room_list(self):
+		self.client.force_login(self.user)
+		# The page lists every room
+		self.assertViewUsesIndexes('/dashboard/rooms/', allow=['rooms_room'])
+
+
+class AvailabilityTests(QueryPlanAssertions, TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.single = Room.objects.create(number='1', room_type='single', price_per_night=Decimal('40'))
+		cls.double = Room.objects.create(number='2', room_type='double', price_per_night=Decimal('70'))
+		cls.suite = Room.objects.create(number='3', room_type='suite', price_per_night=Decimal('150'))
+		cls.closed = Room.objects.create(number='4', room_type='double', price_per_night=Decimal('60'), status='maintenance')
+		Guest.objects.create(first_name='Ann', last_name='Lee', room=cls.double, check_in=date(2026, 3, 10), check_out=date(2026, 3, 13))
+
+	def test_overlapping_stay_blocks_room(self):
+		rooms = list(available_rooms(date(2026, 3, 12), date(2026, 3, 15)))
+		self.assertEqual(rooms, [self.single, self.suite])
+
+	def test_back_to_back_stays_do_not_overlap(self):
+		self.assertIn(self.double, available_rooms(date(2026, 3, 13), date(2026, 3, 15)))
+		self.assertIn(self.double, available_rooms(date(2026, 3, 8), date(2026, 3, 10)))
+
+	def test_type_and_price_filters(self):
+		rooms = available_rooms(date(2026, 3, 1), date(2026, 3, 2), room_type='double', max_price=Decimal('100'))
+		self.assertEqual(list(rooms), [self.double])
+		rooms = available_rooms(date(2026, 3, 1), date(2026, 3, 2), min_price=Decimal('100'))
+		self.assertEqual(list(rooms), [self.suite])
+
+	def test_search_is_one_indexed_query(self):
+		rooms = available_rooms(date(2026, 3, 12), date(2026, 3, 15), room_type='double')
+		with self.assertNumQueries(1):
+			list(rooms)
+		self.assertUsesIndex(rooms)
+
+	def test_invalid_range(self):
+		with self.assertRaises(ValidationError):
+			available_rooms(date(2026, 3, 5), date(2026, 3, 5))
+
+	def test_double_booking_is_refused(self):
+		guest = Guest(first_name='Bo', last_name='Kim', room=self.double, check_in=date(2026, 3, 11), check_out=date(2026, 3, 12))
+		with self.assertRaises(ValidationError):
+			guest.save()
+		with self.assertRaises(ValidationError):
+			guest.full_clean()
+		self.assertEqual(Guest.objects.filter(room=self.double).count(), 1)
+
+	def test_stay_without_a_night_is_refused(self):
+		guest = Guest(first_name='Bo', last_name='Kim', room=self.single, check_in=date(2026, 3, 11), check_out=date(2026, 3, 11))
+		with self.assertRaisesMessage(ValidationError, 'Check-out must be after check-in.'):
+			guest.save()
+		self.assertFalse(Guest.objects.filter(room=self.single).exists())
+
+	def test_editing_a_stay_does_not_conflict_with_itself(self):
+		guest = Guest.objects.get(room=self.double)
+		guest.check_out = date(2026, 3, 14)
+		guest.save()
+		check_room_free(self.double, date(2026, 3, 14), date(2026, 3, 16))
+
+
+class OccupancyReportTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.single = Room.objects.create(number='1', room_type='single', price_per_night=Decimal('40'))
+		cls.double = Room.objects.create(number='2', room_type='double', price_per_night=Decimal('70.50'))
+		# Runs in from the previous month and out into the next
+		Guest.objects.create(first_name='Ann', last_name='Lee', room=cls.single, check_in=date(2026, 2, 27), check_out=date(2026, 3, 3))
+		Guest.objects.create(first_name='Bo', last_name='Kim', room=cls.double, check_in=date(2026, 3, 2), check_out=date(2026, 3, 4))
+		Guest.objects.create(first_name='Cy', last_name='Ray', room=cls.double, check_in=date(2026, 3, 30), check_out=date(2026, 4, 5))
+
+	def test_grid(self):
+		with self.assertNumQueries(2):
+			report = occupancy_report(date(2026, 3, 1), date(2026, 4, 1))
+		single, double = report['rooms']
+		self.assertEqual(len(report['days']), 31)
+		self.assertEqual(single['nights'][:4], [True, True, False, False])
+		self.assertEqual(double['nights'][:4], [False, True, True, False])
+		self.assertEqual(double['nights'][-3:], [False, True, True])
+
+	def test_daily_rates(self):
+		report = occupancy_report(date(2026, 3, 1), date(2026, 3, 4))
+		day = report['days'][1]
+		self.assertEqual(day['occupied'], 2)
+		self.assertEqual(day['occupancy'], Decimal('100.0'))
+		self.assertEqual(day['revenue'], Decimal('110.50'))
+		self.assertEqual(day['adr'], Decimal('55.25'))
+		self.assertEqual(day['revpar'], Decimal('55.25'))
+		self.assertEqual(report['days'][2]['revpar'], Decimal('35.25'))
+
+	def test_totals(self):
+		totals = occupancy_report(date(2026, 3, 1), date(2026, 3, 4))['totals']
+		self.assertEqual(totals['room_nights'], 4)
+		self.assertEqual(totals['revenue'], Decimal('221.00'))
+		self.assertEqual(totals['occupancy'], Decimal('66.7'))
+		self.assertEqual(totals['adr'], Decimal('55.25'))
@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import FoodItem, RecipeIngredient
+
+class RecipeIngredientInline(admin.TabularInline):
+	model = RecipeIngredient
+	extra = 1
+	autocomplete_fields = ("inventory_item",)
+
+@admin.register(FoodItem)
+class FoodItemAdmin(admin.ModelAdmin):
+	list_display = ("name", "price", "available")
+	search_fields = ("name",)
+	list_filter = ("available",)
+	inlines = (RecipeIngredientInline,)
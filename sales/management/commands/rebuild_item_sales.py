@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sales.rollups import rebuild_item_sales
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyItemSales rollup from the sales bill line items'
+
+    def handle(self, *args, **options):
+        rows = rebuild_item_sales()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt item sales rollup: {rows} item-day row(s).'))
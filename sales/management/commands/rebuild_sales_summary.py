@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sales.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailySalesSummary rollup from the sales bill and payment tables'
+
+    def handle(self, *args, **options):
+        days = rebuild_daily_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily sales summary for {days} day(s).'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from sales.totals import RECONCILE_CHUNK_SIZE, reconcile_bill_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored item, payment and balance totals on every sales bill and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+        parser.add_argument('--chunk-size', type=int, default=RECONCILE_CHUNK_SIZE)
+        parser.add_argument('--show', type=int, default=20, help='Number of drifted bills to list')
+
+    def handle(self, *args, **options):
+        drift = reconcile_bill_totals(fix=not options['dry_run'], chunk_size=options['chunk_size'])
+        for pk, fields in drift[:options['show']]:
+            changes = ', '.join(f'{field}: {stored!r} -> {expected!r}' for field, (stored, expected) in fields.items())
+            self.stdout.write(f'Bill #{pk}: {changes}')
+        if len(drift) > options['show']:
+            self.stdout.write(f'... and {len(drift) - options["show"]} more')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All bill totals are consistent.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} bill(s) have drifted; run without --dry-run to fix.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed totals on {len(drift)} bill(s).'))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('available', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesBill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('guest_name', models.CharField(max_length=100)),
+                ('room_charge', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_bills', to='rooms.room')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentDetail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Card'), ('online', 'Online'), ('upi', 'UPI')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sales_bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='sales.salesbill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesBillItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.fooditem')),
+                ('sales_bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.salesbill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='items',
+            field=models.ManyToManyField(through='sales.SalesBillItem', to='sales.fooditem'),
+        ),
+    ]
@@ -0,0 +1,203 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:46
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+
+CHUNK_SIZE = 1000
+
+
+def fill_totals(apps, schema_editor):
+    """Fill the new denormalized bill columns from the existing lines and payments"""
+    SalesBill = apps.get_model('sales', 'SalesBill')
+    SalesBillItem = apps.get_model('sales', 'SalesBillItem')
+    PaymentDetail = apps.get_model('sales', 'PaymentDetail')
+    labels = dict(PaymentDetail._meta.get_field('payment_method').choices)
+    last_pk = 0
+    while True:
+        bills = list(SalesBill.objects.filter(pk__gt=last_pk).order_by('pk').only('total_amount')[:CHUNK_SIZE])
+        if not bills:
+            return
+        last_pk = bills[-1].pk
+        ids = [bill.pk for bill in bills]
+        items = dict(
+            SalesBillItem.objects.filter(sales_bill_id__in=ids)
+            .values('sales_bill_id')
+            .annotate(total=Sum(F('quantity') * F('price'), output_field=DecimalField()))
+            .values_list('sales_bill_id', 'total')
+            .order_by()
+        )
+        payments = defaultdict(list)
+        rows = PaymentDetail.objects.filter(sales_bill_id__in=ids).order_by('sales_bill_id', 'pk')
+        for bill_id, method, amount in rows.values_list('sales_bill_id', 'payment_method', 'amount'):
+            payments[bill_id].append((method, amount))
+        for bill in bills:
+            paid = payments[bill.pk]
+            bill.items_total = items.get(bill.pk) or Decimal('0')
+            bill.paid_total = sum((amount for _method, amount in paid), Decimal('0'))
+            bill.balance_due = bill.total_amount - bill.paid_total
+            bill.payment_summary = ', '.join(
+                f'{labels.get(method, method)} (Rs{amount.quantize(Decimal("0.01"))})' for method, amount in paid
+            )
+        SalesBill.objects.bulk_update(bills, ['items_total', 'paid_total', 'balance_due', 'payment_summary'])
+
+
+def build_rollups(apps, schema_editor):
+    """Build the daily sales and item rollups that signals keep current from here on"""
+    SalesBill = apps.get_model('sales', 'SalesBill')
+    SalesBillItem = apps.get_model('sales', 'SalesBillItem')
+    PaymentDetail = apps.get_model('sales', 'PaymentDetail')
+    DailySalesSummary = apps.get_model('sales', 'DailySalesSummary')
+    DailyItemSales = apps.get_model('sales', 'DailyItemSales')
+
+    summaries = {}
+    bill_totals = (
+        SalesBill.objects.annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(bill_count=Count('id'), net_amount=Sum('total_amount'), discount_amount=Sum('discount_amount'))
+        .order_by()
+    )
+    for row in bill_totals:
+        summaries[row['day']] = DailySalesSummary(
+            day=row['day'],
+            bill_count=row['bill_count'],
+            gross_amount=row['net_amount'] + row['discount_amount'],
+            discount_amount=row['discount_amount'],
+            net_amount=row['net_amount'],
+        )
+    payment_totals = (
+        PaymentDetail.objects.annotate(day=TruncDate('sales_bill__created_at'))
+        .values('day', 'payment_method')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in payment_totals:
+        summary = summaries.setdefault(row['day'], DailySalesSummary(day=row['day']))
+        setattr(summary, f"{row['payment_method']}_amount", row['total'])
+    DailySalesSummary.objects.bulk_create(summaries.values(), batch_size=500)
+
+    item_totals = (
+        SalesBillItem.objects.annotate(day=TruncDate('sales_bill__created_at'))
+        .values('food_item_id', 'day')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+        )
+        .order_by()
+    )
+    DailyItemSales.objects.bulk_create([
+        DailyItemSales(food_item_id=row['food_item_id'], day=row['day'], quantity=row['total_quantity'], revenue=row['total_revenue'])
+        for row in item_totals
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventory_valuation'),
+        ('rooms', '0002_indexes'),
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyItemSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'daily item sales',
+                'ordering': ['day', 'food_item'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('bill_count', models.IntegerField(default=0)),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('card_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('upi_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'daily sales summaries',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(help_text="In the inventory item's unit, per portion")),
+            ],
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='items_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='paid_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='payment_summary',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='salesbill',
+            index=models.Index(fields=['-created_at', '-id'], name='salesbill_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesbill',
+            index=models.Index(fields=['guest_name', 'created_at'], name='salesbill_guest_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyitemsales',
+            name='food_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='sales.fooditem'),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='food_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredients', to='sales.fooditem'),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='inventory_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='used_in', to='inventory.inventoryitem'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyitemsales',
+            index=models.Index(fields=['day', 'food_item'], name='dailyitemsales_day_item_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyitemsales',
+            constraint=models.UniqueConstraint(fields=('food_item', 'day'), name='dailyitemsales_item_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('food_item', 'inventory_item'), name='recipe_food_inventory_uniq'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:02
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_indexes'),
+        ('sales', '0002_totals_and_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='salesbill',
+            name='salesbill_guest_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='salesbill',
+            index=models.Index(django.db.models.functions.text.Lower('guest_name'), models.F('created_at'), name='salesbill_guest_lower_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
+from inventory.models import InventoryItem
 from rooms.models import Room
 
 class FoodItem(models.Model):
@@ -11,6 +14,20 @@ class FoodItem(models.Model):
 	def __str__(self):
 		return self.name
 
+class RecipeIngredient(models.Model):
+	"""How much of an inventory item one portion of a menu item uses"""
+	food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name="ingredients")
+	inventory_item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT, related_name="used_in")
+	quantity = models.PositiveIntegerField(help_text="In the inventory item's unit, per portion")
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["food_item", "inventory_item"], name="recipe_food_inventory_uniq"),
+		]
+
+	def __str__(self):
+		return f"{self.food_item_id}: {self.quantity} x {self.inventory_item_id}"
+
 class SalesBill(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	guest_name = models.CharField(max_length=100)
@@ -20,21 +37,29 @@ class SalesBill(models.Model):
 	discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
 	discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 	total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+	# Maintained from the bill's lines and payments by sales.totals
+	items_total = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+	paid_total = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+	balance_due = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+	payment_summary = models.TextField(blank=True, editable=False)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["-created_at", "-id"], name="salesbill_created_id_idx"),
+			# Guest search is a range on Lower(guest_name); see dashboard.search.starts_with
+			models.Index(Lower("guest_name"), F("created_at"), name="salesbill_guest_lower_idx"),
+		]
 
 	def __str__(self):
 		return f"Bill #{self.id} - {self.guest_name}"
 	
 	def calculate_total(self):
 		"""Calculate total including food items and room charge"""
-		items_total = sum(item.price * item.quantity for item in self.salesbillitem_set.all())
-		return items_total + self.room_charge
+		return self.items_total + self.room_charge
 	
 	def get_payment_methods_display(self):
 		"""Get comma-separated list of payment methods"""
-		payments = self.payments.all()
-		if not payments:
-			return "N/A"
-		return ", ".join([f"{p.get_payment_method_display()} (Rs{p.amount})" for p in payments])
+		return self.payment_summary or "N/A"
 
 class SalesBillItem(models.Model):
 	sales_bill = models.ForeignKey(SalesBill, on_delete=models.CASCADE)
@@ -58,3 +83,47 @@ class PaymentDetail(models.Model):
 
 	def __str__(self):
 		return f"{self.get_payment_method_display()} - Rs{self.amount}"
+
+class DailySalesSummary(models.Model):
+	"""Per-day rollup of sales bills, kept current by the signals in sales.signals"""
+	day = models.DateField(unique=True)
+	bill_count = models.IntegerField(default=0)
+	gross_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	net_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	cash_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	card_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	online_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	upi_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+	class Meta:
+		ordering = ["day"]
+		verbose_name_plural = "daily sales summaries"
+
+	def __str__(self):
+		return f"{self.day}: {self.bill_count} bills, Rs{self.net_amount}"
+
+	@staticmethod
+	def payment_field(method):
+		"""Column holding the running total for a PaymentDetail.payment_method"""
+		return f"{method}_amount"
+
+class DailyItemSales(models.Model):
+	"""Per-menu-item, per-day rollup of SalesBillItem rows, kept current by sales.signals"""
+	food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name="daily_sales")
+	day = models.DateField()
+	quantity = models.IntegerField(default=0)
+	revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+	class Meta:
+		ordering = ["day", "food_item"]
+		verbose_name_plural = "daily item sales"
+		constraints = [
+			models.UniqueConstraint(fields=["food_item", "day"], name="dailyitemsales_item_day_uniq"),
+		]
+		indexes = [
+			models.Index(fields=["day", "food_item"], name="dailyitemsales_day_item_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.day}: {self.food_item_id} x {self.quantity}"
@@ -0,0 +1,103 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from dashboard.kpis import bump_on_commit
+
+from . import rollups
+from .recipes import deplete_stock
+from .totals import set_totals
+from .models import FoodItem, PaymentDetail, SalesBillItem
+
+
+def parse_lines(food_ids, quantities):
+	"""Pair up the food_items[]/quantities[] form lists as (food_id, quantity)"""
+	lines = []
+	for food_id, qty in zip(food_ids, quantities):
+		if not (food_id and qty):
+			continue
+		try:
+			lines.append((int(food_id), int(qty)))
+		except ValueError:
+			raise ValidationError(f'Invalid bill line: {food_id} x {qty}')
+	for _food_id, qty in lines:
+		if qty < 1:
+			raise ValidationError('Item quantities must be at least 1.')
+	return lines
+
+
+def parse_payments(methods, amounts):
+	"""Pair up the payment_methods[]/payment_amounts[] form lists"""
+	valid_methods = dict(PaymentDetail.PAYMENT_METHODS)
+	payments = []
+	for method, amount in zip(methods, amounts):
+		if not (method and amount):
+			continue
+		if method not in valid_methods:
+			raise ValidationError(f'Unknown payment method: {method}')
+		try:
+			value = Decimal(amount)
+		except InvalidOperation:
+			raise ValidationError(f'Invalid payment amount: {amount}')
+		# Decimal() also accepts NaN and Infinity, which no column can store
+		if not value.is_finite():
+			raise ValidationError(f'Invalid payment amount: {amount}')
+		payments.append((method, value))
+	return payments
+
+
+def resolve_food_items(lines):
+	"""
+	Fetch every menu item on the bill in one query.
+
+	Raises ValidationError if any line refers to an item that does not
+	exist or is not currently available.
+	"""
+	foods = FoodItem.objects.in_bulk({food_id for food_id, _qty in lines})
+	missing = sorted({food_id for food_id, _qty in lines if food_id not in foods})
+	if missing:
+		raise ValidationError(f"Unknown food item(s): {', '.join(map(str, missing))}")
+	unavailable = sorted({foods[food_id].name for food_id, _qty in lines if not foods[food_id].available})
+	if unavailable:
+		raise ValidationError(f"Not available: {', '.join(unavailable)}")
+	return foods
+
+
+def post_bill(bill, lines, payments, discount_amount=Decimal('0'), user=None):
+	"""
+	Price and save `bill` together with its lines and payments.
+
+	Everything is validated before the first write, and the bill, its
+	items, its payments and the stock its recipes use are committed in a
+	single transaction. Ingredients that were not in stock do not stop the
+	sale; they are left in `bill.stock_shortfalls` ({inventory item id:
+	units short}) for the caller to report.
+	"""
+	foods = resolve_food_items(lines)
+
+	items_total = sum((foods[food_id].price * qty for food_id, qty in lines), Decimal('0'))
+	bill.room_charge = bill.room.price_per_night if bill.room else Decimal('0')
+	bill.discount_amount = discount_amount
+	bill.total_amount = items_total + bill.room_charge - discount_amount
+	set_totals(bill, items_total, payments)
+
+	with transaction.atomic():
+		bill.save()
+		SalesBillItem.objects.bulk_create([
+			SalesBillItem(sales_bill=bill, food_item=foods[food_id], quantity=qty, price=foods[food_id].price)
+			for food_id, qty in lines
+		])
+		PaymentDetail.objects.bulk_create([
+			PaymentDetail(sales_bill=bill, payment_method=method, amount=amount)
+			for method, amount in payments
+		])
+		# bulk_create skips post_save, so feed the lines and payments to the rollups here
+		day = rollups.bill_day(bill)
+		rollups.apply_to_day(day, **rollups.payment_deltas(payments))
+		rollups.apply_item_sales(day, rollups.item_deltas(
+			(food_id, qty, foods[food_id].price) for food_id, qty in lines
+		))
+		bill.stock_shortfalls = deplete_stock(bill, lines, user=user)
+		bump_on_commit(SalesBillItem, PaymentDetail)
+	return bill
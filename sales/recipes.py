@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from inventory.models import StockMovement
+from inventory.stock import issue_available, post_movements
+
+from .models import RecipeIngredient
+
+
+def bill_reference(bill):
+	"""Ledger reference tying stock movements to a sales bill"""
+	return f'Bill #{bill.pk}'
+
+
+def ingredient_totals(lines):
+	"""
+	Map inventory item id -> total quantity used by (food_id, portions) lines.
+
+	One query fetches every recipe on the bill; repeated ingredients are
+	summed here so each inventory item is touched once.
+	"""
+	portions = defaultdict(int)
+	for food_id, quantity in lines:
+		portions[food_id] += quantity
+	totals = defaultdict(int)
+	recipes = RecipeIngredient.objects.filter(food_item_id__in=portions).values_list(
+		'food_item_id', 'inventory_item_id', 'quantity',
+	)
+	for food_id, inventory_id, quantity in recipes:
+		totals[inventory_id] += quantity * portions[food_id]
+	return dict(totals)
+
+
+def deplete_stock(bill, lines, user=None):
+	"""
+	Issue the ingredients for a bill's lines; call inside the bill's transaction.
+
+	A sale is never refused over stock: an ingredient that has run out is
+	issued down to zero and the rest reported. Returns {item id: units short}.
+	"""
+	_movements, shortfalls = issue_available(
+		ingredient_totals(lines), reference=bill_reference(bill), note='Sold', user=user, sales_bill=bill,
+	)
+	return shortfalls
+
+
+def restore_stock(bill, user=None):
+	"""
+	Put back whatever is still issued against `bill`.
+
+	Works from the ledger rather than the current recipes, so a recipe
+	edited since the sale does not skew the reversal. Runs before the bill
+	is deleted, so the reversal itself is not linked to it.
+	"""
+	issued = (
+		StockMovement.objects.filter(sales_bill=bill)
+		.values('item')
+		.annotate(total=Sum('quantity'))
+		.order_by()
+	)
+	return post_movements(
+		StockMovement.ADJUSTMENT,
+		{row['item']: -row['total'] for row in issued if row['total']},
+		reference=bill_reference(bill),
+		note='Bill deleted',
+		user=user,
+	)
@@ -0,0 +1,137 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from dashboard.kpis import bump_on_commit
+
+from .models import DailyItemSales, DailySalesSummary, PaymentDetail, SalesBill, SalesBillItem
+
+
+def bill_day(bill):
+	"""Local calendar day a bill is reported under"""
+	return timezone.localdate(bill.created_at)
+
+
+def apply_to_day(day, **deltas):
+	"""Add `deltas` (field name -> amount) to the summary row for `day`"""
+	deltas = {field: value for field, value in deltas.items() if value}
+	if not deltas:
+		return
+	updates = {field: F(field) + value for field, value in deltas.items()}
+	bump_on_commit(DailySalesSummary)
+	with transaction.atomic():
+		# The row almost always exists already, so try the UPDATE first
+		if not DailySalesSummary.objects.filter(day=day).update(**updates):
+			DailySalesSummary.objects.get_or_create(day=day)
+			DailySalesSummary.objects.filter(day=day).update(**updates)
+
+
+def bill_deltas(bill, sign=1):
+	"""Summary deltas contributed by a bill's own columns"""
+	return {
+		'bill_count': sign,
+		'gross_amount': sign * (bill.total_amount + bill.discount_amount),
+		'discount_amount': sign * bill.discount_amount,
+		'net_amount': sign * bill.total_amount,
+	}
+
+
+def payment_deltas(payments, sign=1):
+	"""Summary deltas for an iterable of (payment_method, amount) pairs"""
+	deltas = defaultdict(Decimal)
+	for method, amount in payments:
+		deltas[DailySalesSummary.payment_field(method)] += sign * amount
+	return deltas
+
+
+def item_deltas(items, sign=1):
+	"""Map food_item_id -> (quantity, revenue) for an iterable of (food_item_id, quantity, price)"""
+	deltas = {}
+	for food_id, quantity, price in items:
+		old_quantity, old_revenue = deltas.get(food_id, (0, Decimal('0')))
+		deltas[food_id] = (old_quantity + sign * quantity, old_revenue + sign * quantity * price)
+	return deltas
+
+
+def apply_item_sales(day, deltas):
+	"""Add item_deltas() output to the (food_item, day) rollup rows"""
+	bump_on_commit(DailyItemSales)
+	with transaction.atomic():
+		for food_id, (quantity, revenue) in deltas.items():
+			if not (quantity or revenue):
+				continue
+			updates = {'quantity': F('quantity') + quantity, 'revenue': F('revenue') + revenue}
+			rows = DailyItemSales.objects.filter(food_item_id=food_id, day=day)
+			if not rows.update(**updates):
+				DailyItemSales.objects.get_or_create(food_item_id=food_id, day=day)
+				rows.update(**updates)
+
+
+@transaction.atomic
+def rebuild_daily_summaries():
+	"""Recompute every DailySalesSummary row from the raw bill and payment tables"""
+	rows = {}
+	bill_totals = (
+		SalesBill.objects.annotate(day=TruncDate('created_at'))
+		.values('day')
+		.annotate(
+			bill_count=Count('id'),
+			net_amount=Sum('total_amount'),
+			discount_amount=Sum('discount_amount'),
+		)
+		.order_by()
+	)
+	for row in bill_totals:
+		rows[row['day']] = DailySalesSummary(
+			day=row['day'],
+			bill_count=row['bill_count'],
+			gross_amount=row['net_amount'] + row['discount_amount'],
+			discount_amount=row['discount_amount'],
+			net_amount=row['net_amount'],
+		)
+
+	payment_totals = (
+		PaymentDetail.objects.annotate(day=TruncDate('sales_bill__created_at'))
+		.values('day', 'payment_method')
+		.annotate(total=Sum('amount'))
+		.order_by()
+	)
+	for row in payment_totals:
+		summary = rows.setdefault(row['day'], DailySalesSummary(day=row['day']))
+		setattr(summary, DailySalesSummary.payment_field(row['payment_method']), row['total'])
+
+	DailySalesSummary.objects.all().delete()
+	DailySalesSummary.objects.bulk_create(rows.values(), batch_size=500)
+	bump_on_commit(DailySalesSummary)
+	return len(rows)
+
+
+@transaction.atomic
+def rebuild_item_sales():
+	"""Recompute every DailyItemSales row from the raw bill line items"""
+	totals = (
+		SalesBillItem.objects.annotate(day=TruncDate('sales_bill__created_at'))
+		.values('food_item_id', 'day')
+		.annotate(
+			total_quantity=Sum('quantity'),
+			total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+		)
+		.order_by()
+	)
+	rows = [
+		DailyItemSales(
+			food_item_id=row['food_item_id'],
+			day=row['day'],
+			quantity=row['total_quantity'],
+			revenue=row['total_revenue'],
+		)
+		for row in totals
+	]
+	DailyItemSales.objects.all().delete()
+	DailyItemSales.objects.bulk_create(rows, batch_size=500)
+	bump_on_commit(DailyItemSales)
+	return len(rows)
@@ -0,0 +1,207 @@
+from django.db.models import QuerySet, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from finance.periods import check_period_open
+
+from . import recipes, rollups, totals
+from .models import FoodItem, PaymentDetail, SalesBill, SalesBillItem
+
+
+def _deleting_bill(origin):
+	"""True when a delete was started from a SalesBill (payments go with it)"""
+	if isinstance(origin, QuerySet):
+		return origin.model is SalesBill
+	return isinstance(origin, SalesBill)
+
+
+def _deleting_food_item(origin):
+	"""True when a delete was started from a FoodItem (its bill lines go with it)"""
+	if isinstance(origin, QuerySet):
+		return origin.model is FoodItem
+	return isinstance(origin, FoodItem)
+
+
+def _deleted_with_parent(origin):
+	"""
+	True when line items are going because their bill or menu item is.
+
+	A bill takes its own lines off the item rollup in pre_delete, and a
+	menu item's rollup rows are cascade-deleted along with it.
+	"""
+	if isinstance(origin, QuerySet):
+		return origin.model in (SalesBill, FoodItem)
+	return isinstance(origin, (SalesBill, FoodItem))
+
+
+# Registered before the rollup receivers, so a refused write changes nothing
+@receiver(pre_save, sender=SalesBill)
+def keep_closed_periods_on_save(sender, instance, raw, **kwargs):
+	if raw or not instance.pk:
+		return
+	days = [rollups.bill_day(bill) for bill in SalesBill.objects.filter(pk=instance.pk).only('created_at')]
+	if instance.created_at:
+		days.append(rollups.bill_day(instance))
+	check_period_open(days)
+
+
+@receiver(pre_delete, sender=SalesBill)
+def keep_closed_periods_on_delete(sender, instance, **kwargs):
+	check_period_open([rollups.bill_day(instance)])
+
+
+@receiver(pre_save, sender=SalesBill)
+def remember_previous_bill(sender, instance, raw, **kwargs):
+	# Edits re-post the bill, so keep what was counted before the save
+	instance._rollup_previous = None
+	if instance.pk and not raw:
+		instance._rollup_previous = (
+			SalesBill.objects.filter(pk=instance.pk)
+			.only('created_at', 'total_amount', 'discount_amount', *totals.TOTAL_FIELDS)
+			.first()
+		)
+
+
+@receiver(pre_save, sender=SalesBill)
+def keep_bill_totals(sender, instance, raw, **kwargs):
+	if raw:
+		return
+	# Line and payment totals are only ever written by sales.totals, so a
+	# stale in-memory copy must not overwrite them
+	previous = getattr(instance, '_rollup_previous', None)
+	if previous is not None:
+		instance.items_total = previous.items_total
+		instance.paid_total = previous.paid_total
+		instance.payment_summary = previous.payment_summary
+	instance.balance_due = instance.total_amount - instance.paid_total
+
+
+@receiver(post_save, sender=SalesBill)
+def rollup_bill_saved(sender, instance, created, raw, **kwargs):
+	if raw:
+		return
+	previous = getattr(instance, '_rollup_previous', None)
+	if previous is not None:
+		rollups.apply_to_day(rollups.bill_day(previous), **rollups.bill_deltas(previous, sign=-1))
+	if created or previous is not None:
+		rollups.apply_to_day(rollups.bill_day(instance), **rollups.bill_deltas(instance))
+
+
+@receiver(pre_delete, sender=SalesBill)
+def rollup_bill_deleted(sender, instance, **kwargs):
+	# Payments are removed by the cascade without touching the rollup
+	# themselves, so take them off here while they can still be summed
+	payments = (
+		instance.payments.values('payment_method')
+		.annotate(total=Sum('amount'))
+		.values_list('payment_method', 'total')
+		.order_by()
+	)
+	deltas = rollups.bill_deltas(instance, sign=-1)
+	deltas.update(rollups.payment_deltas(payments, sign=-1))
+	day = rollups.bill_day(instance)
+	rollups.apply_to_day(day, **deltas)
+	items = instance.salesbillitem_set.values_list('food_item_id', 'quantity', 'price')
+	rollups.apply_item_sales(day, rollups.item_deltas(items, sign=-1))
+
+
+@receiver(pre_delete, sender=SalesBill)
+def restore_bill_stock(sender, instance, **kwargs):
+	recipes.restore_stock(instance)
+
+
+@receiver(pre_save, sender=PaymentDetail)
+def remember_previous_payment(sender, instance, raw, **kwargs):
+	instance._rollup_previous = None
+	if instance.pk and not raw:
+		instance._rollup_previous = (
+			PaymentDetail.objects.filter(pk=instance.pk)
+			.values_list('sales_bill_id', 'payment_method', 'amount')
+			.first()
+		)
+
+
+@receiver(post_save, sender=PaymentDetail)
+def rollup_payment_saved(sender, instance, created, raw, **kwargs):
+	if raw:
+		return
+	previous = getattr(instance, '_rollup_previous', None)
+	if previous is not None:
+		# An edit takes the old row off its bill's day before adding the new one
+		bill_id, method, amount = previous
+		bill = instance.sales_bill if bill_id == instance.sales_bill_id else SalesBill.objects.only('created_at').get(pk=bill_id)
+		rollups.apply_to_day(rollups.bill_day(bill), **rollups.payment_deltas([(method, amount)], sign=-1))
+		if bill_id != instance.sales_bill_id:
+			totals.refresh_bill_totals(bill_id)
+	if created or previous is not None:
+		deltas = rollups.payment_deltas([(instance.payment_method, instance.amount)])
+		rollups.apply_to_day(rollups.bill_day(instance.sales_bill), **deltas)
+
+
+@receiver(post_delete, sender=PaymentDetail)
+def rollup_payment_deleted(sender, instance, origin=None, **kwargs):
+	if _deleting_bill(origin):
+		return
+	deltas = rollups.payment_deltas([(instance.payment_method, instance.amount)], sign=-1)
+	rollups.apply_to_day(rollups.bill_day(instance.sales_bill), **deltas)
+
+
+@receiver(pre_save, sender=SalesBillItem)
+def remember_previous_item(sender, instance, raw, **kwargs):
+	instance._rollup_previous = None
+	if instance.pk and not raw:
+		instance._rollup_previous = (
+			SalesBillItem.objects.filter(pk=instance.pk)
+			.values_list('food_item_id', 'quantity', 'price')
+			.first()
+		)
+
+
+@receiver(post_save, sender=SalesBillItem)
+def rollup_item_saved(sender, instance, created, raw, **kwargs):
+	if raw:
+		return
+	previous = getattr(instance, '_rollup_previous', None)
+	day = rollups.bill_day(instance.sales_bill)
+	if previous is not None:
+		rollups.apply_item_sales(day, rollups.item_deltas([previous], sign=-1))
+	if created or previous is not None:
+		item = (instance.food_item_id, instance.quantity, instance.price)
+		rollups.apply_item_sales(day, rollups.item_deltas([item]))
+
+
+@receiver(post_delete, sender=SalesBillItem)
+def rollup_item_deleted(sender, instance, origin=None, **kwargs):
+	if _deleted_with_parent(origin):
+		return
+	deltas = rollups.item_deltas([(instance.food_item_id, instance.quantity, instance.price)], sign=-1)
+	rollups.apply_item_sales(rollups.bill_day(instance.sales_bill), deltas)
+
+
+@receiver(post_save, sender=SalesBillItem)
+@receiver(post_save, sender=PaymentDetail)
+def refresh_totals_saved(sender, instance, raw, **kwargs):
+	if not raw:
+		totals.refresh_bill_totals(instance.sales_bill_id)
+
+
+@receiver(post_delete, sender=SalesBillItem)
+@receiver(post_delete, sender=PaymentDetail)
+def refresh_totals_deleted(sender, instance, origin=None, **kwargs):
+	# A deleted bill needs no totals; a deleted menu item's bills are
+	# refreshed together once its lines are gone (refresh_food_item_bills)
+	if not (_deleting_bill(origin) or _deleting_food_item(origin)):
+		totals.refresh_bill_totals(instance.sales_bill_id)
+
+
+@receiver(pre_delete, sender=FoodItem)
+def remember_food_item_bills(sender, instance, **kwargs):
+	# The cascade takes this item's lines off these bills
+	instance._bills_to_refresh = set(
+		SalesBillItem.objects.filter(food_item=instance).values_list('sales_bill_id', flat=True)
+	)
+
+
+@receiver(post_delete, sender=FoodItem)
+def refresh_food_item_bills(sender, instance, **kwargs):
+	totals.refresh_many_bill_totals(getattr(instance, '_bills_to_refresh', ()))
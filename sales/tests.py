@@ -1,3 +1,465 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.testing import QueryPlanAssertions
+from rooms.models import Room
+
+from dashboard.menu_analytics import menu_analytics
+from dashboard.search import starts_with
+from inventory.models import InventoryItem, StockMovement
+from inventory.stock import record_movement
+
+from .models import DailyItemSales, DailySalesSummary, FoodItem, PaymentDetail, RecipeIngredient, SalesBill, SalesBillItem
+from .posting import parse_lines, parse_payments, post_bill
+from .rollups import rebuild_daily_summaries, rebuild_item_sales
+from .totals import reconcile_bill_totals
+
+
+class SalesQueryPlanTests(QueryPlanAssertions, TestCase):
+	"""The sales bill pages must stay on indexes as the bill table grows"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('planner', password='secret')
+		room = Room.objects.create(number='101', room_type='single', price_per_night=Decimal('50'))
+		food = FoodItem.objects.create(name='Tea', price=Decimal('2'))
+		for i in range(60):
+			bill = SalesBill.objects.create(guest_name=f'Guest {i}', room=room, total_amount=Decimal('10'))
+			SalesBillItem.objects.create(sales_bill=bill, food_item=food, quantity=1, price=food.price)
+			PaymentDetail.objects.create(sales_bill=bill, payment_method='cash', amount=Decimal('10'))
+		cls.bill = bill
+
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(self.user)
+
+	def test_sales_bill_list(self):
+		# The first page walks salesbill_created_id_idx and stops after one page
+		self.assertViewUsesIndexes('/dashboard/sales-bills/', allow=['sales_salesbill'])
+
+	def test_sales_bill_list_filtered(self):
+		today = timezone.localdate()
+		since = today - timedelta(days=7)
+		self.assertViewUsesIndexes(f'/dashboard/sales-bills/?date_from={since}&date_to={today}&guest=Guest')
+
+	def test_guest_search_uses_lower_index(self):
+		self.assertViewUsesIndexes('/dashboard/sales-bills/?guest=guest 1')
+		plan = self.assertUsesIndex(SalesBill.objects.filter(starts_with('guest_name', 'guest 1')))
+		self.assertIn('salesbill_guest_lower_idx', plan)
+
+	def test_guest_search_matches_prefix_in_any_case(self):
+		SalesBill.objects.create(guest_name='100% Tours', total_amount=Decimal('10'))
+		SalesBill.objects.create(guest_name='1000 Lakes', total_amount=Decimal('10'))
+
+		def search(guest):
+			page = self.client.get('/dashboard/sales-bills/', {'guest': guest}).context['page']
+			return sorted(bill.guest_name for bill in page)
+
+		self.assertEqual(search('GUEST 5'), ['Guest 5', 'Guest 50', 'Guest 51', 'Guest 52', 'Guest 53', 'Guest 54', 'Guest 55', 'Guest 56', 'Guest 57', 'Guest 58', 'Guest 59'])
+		# The prefix is matched literally, not as a LIKE pattern
+		self.assertEqual(search('100%'), ['100% Tours'])
+		self.assertEqual(search('_'), [])
+
+	def test_guest_search_pages_through_matches(self):
+		url = '/dashboard/sales-bills/?guest=gUeSt'
+		first = self.client.get(url).context['page']
+		self.assertEqual(len(first), 50)
+		second = self.client.get(f'{url}&cursor={first.next_cursor}').context['page']
+		self.assertEqual(len(second), 10)
+		self.assertFalse(second.has_next)
+		names = {bill.guest_name for bill in first} | {bill.guest_name for bill in second}
+		self.assertEqual(names, {f'Guest {i}' for i in range(60)})
+		self.assertViewUsesIndexes(f'{url}&cursor={first.next_cursor}')
+
+	def test_sales_bill_list_next_page(self):
+		response = self.client.get('/dashboard/sales-bills/')
+		cursor = response.context['page'].next_cursor
+		self.assertViewUsesIndexes(f'/dashboard/sales-bills/?cursor={cursor}')
+
+	def test_sales_bill_list_skips_item_and_payment_tables(self):
+		with CaptureQueriesContext(connection) as context:
+			self.client.get('/dashboard/sales-bills/')
+		tables = ' '.join(query['sql'] for query in context.captured_queries)
+		self.assertNotIn('sales_paymentdetail', tables)
+		self.assertNotIn('sales_salesbillitem', tables)
+
+	def test_sales_bill_detail(self):
+		self.assertViewUsesIndexes(f'/dashboard/sales-bills/{self.bill.pk}/')
+
+
+class DailySalesSummaryTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.tea = FoodItem.objects.create(name='Tea', price=Decimal('2.50'))
+
+	def post(self, *payments, quantity=4):
+		return post_bill(SalesBill(guest_name='Guest'), [(self.tea.pk, quantity)], list(payments))
+
+	def summary(self):
+		return list(DailySalesSummary.objects.values_list(
+			'day', 'bill_count', 'gross_amount', 'discount_amount', 'net_amount',
+			'cash_amount', 'card_amount', 'online_amount', 'upi_amount',
+		))
+
+	def assertMatchesRebuild(self):
+		"""The signal-maintained rows equal a rebuild from the raw tables, apart from emptied days"""
+		kept = [row for row in self.summary() if any(row[1:])]
+		rebuild_daily_summaries()
+		self.assertEqual(kept, self.summary())
+
+	def test_bills_created_and_deleted(self):
+		bill = self.post(('cash', Decimal('6')), ('upi', Decimal('4')))
+		other = self.post(('card', Decimal('5')), quantity=2)
+		today = timezone.localdate()
+		self.assertEqual(self.summary(), [(today, 2, 15, 0, 15, 6, 5, 0, 4)])
+		self.assertMatchesRebuild()
+
+		bill.delete()
+		self.assertEqual(self.summary(), [(today, 1, 5, 0, 5, 0, 5, 0, 0)])
+		other.delete()
+		self.assertEqual(self.summary(), [(today, 0, 0, 0, 0, 0, 0, 0, 0)])
+		self.assertMatchesRebuild()
+
+	def test_payments_added_edited_and_deleted(self):
+		bill = self.post(('cash', Decimal('6')))
+		card = PaymentDetail.objects.create(sales_bill=bill, payment_method='card', amount=Decimal('4'))
+		self.assertEqual(self.summary()[0][5:], (6, 4, 0, 0))
+
+		card.amount = Decimal('3')
+		card.save()
+		self.assertEqual(self.summary()[0][5:], (6, 3, 0, 0))
+		card.payment_method = 'online'
+		card.amount = Decimal('2')
+		card.save()
+		self.assertEqual(self.summary()[0][5:], (6, 0, 2, 0))
+		self.assertMatchesRebuild()
+
+		card.delete()
+		bill.payments.get(payment_method='cash').delete()
+		self.assertEqual(self.summary()[0][5:], (0, 0, 0, 0))
+		self.assertMatchesRebuild()
+
+	def test_payment_moved_to_a_bill_on_another_day(self):
+		old = self.post(('cash', Decimal('10')))
+		SalesBill.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=3))
+		rebuild_daily_summaries()
+		new = self.post()
+		payment = old.payments.get()
+		payment.sales_bill = new
+		payment.save()
+		self.assertMatchesRebuild()
+		self.assertEqual(reconcile_bill_totals(fix=False), [])
+
+
+class ItemSalesRollupTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.tea = FoodItem.objects.create(name='Tea', price=Decimal('2.50'))
+		cls.soup = FoodItem.objects.create(name='Soup', price=Decimal('6'))
+		cls.cake = FoodItem.objects.create(name='Cake', price=Decimal('4'))
+
+	def rollup(self):
+		return {
+			(row.food_item_id, row.quantity, row.revenue)
+			for row in DailyItemSales.objects.all()
+		}
+
+	def post(self, *lines):
+		return post_bill(SalesBill(guest_name='Guest'), lines, [('cash', Decimal('100'))])
+
+	def test_posting_and_editing_lines(self):
+		bill = self.post((self.tea.pk, 2), (self.soup.pk, 1))
+		self.assertEqual(self.rollup(), {(self.tea.pk, 2, Decimal('5.00')), (self.soup.pk, 1, Decimal('6.00'))})
+
+		line = bill.salesbillitem_set.get(food_item=self.tea)
+		line.quantity = 3
+		line.save()
+		bill.salesbillitem_set.get(food_item=self.soup).delete()
+		SalesBillItem.objects.create(sales_bill=bill, food_item=self.cake, quantity=1, price=self.cake.price)
+		self.assertEqual(self.rollup(), {
+			(self.tea.pk, 3, Decimal('7.50')), (self.soup.pk, 0, Decimal('0.00')), (self.cake.pk, 1, Decimal('4.00')),
+		})
+
+	def test_deleting_bill_and_food_item(self):
+		bill = self.post((self.tea.pk, 2), (self.soup.pk, 1))
+		self.post((self.tea.pk, 1))
+		bill.delete()
+		self.assertEqual(self.rollup(), {(self.tea.pk, 1, Decimal('2.50')), (self.soup.pk, 0, Decimal('0.00'))})
+		self.tea.delete()
+		self.assertFalse(DailyItemSales.objects.filter(food_item_id=self.tea.pk).exists())
+
+	def test_rebuild_matches_incremental(self):
+		self.post((self.tea.pk, 2), (self.soup.pk, 1))
+		self.post((self.tea.pk, 4))
+		expected = self.rollup()
+		DailyItemSales.objects.all().delete()
+		self.assertEqual(rebuild_item_sales(), 2)
+		self.assertEqual(self.rollup(), expected)
+
+	def test_analytics_reads_only_the_rollup(self):
+		self.post((self.tea.pk, 2), (self.soup.pk, 1))
+		self.post((self.tea.pk, 2))
+		today = timezone.localdate()
+		with CaptureQueriesContext(connection) as context:
+			report = menu_analytics(today - timedelta(days=6), today, top=1)
+		self.assertEqual(len(context.captured_queries), 2)
+		self.assertFalse(any('sales_salesbillitem' in query['sql'] for query in context.captured_queries))
+
+		self.assertEqual([item['food_item'] for item in report['top']], [self.tea])
+		self.assertEqual([item['food_item'] for item in report['dead']], [self.cake])
+		tea = report['items'][0]
+		self.assertEqual((tea['quantity'], tea['revenue'], tea['share']), (4, Decimal('10.00'), Decimal('62.5')))
+		self.assertIsNone(tea['trend'])
+		self.assertEqual(report['total_revenue'], Decimal('16.00'))
+
+
+class BillTotalsTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.tea = FoodItem.objects.create(name='Tea', price=Decimal('2.50'))
+		cls.soup = FoodItem.objects.create(name='Soup', price=Decimal('6'))
+
+	def post(self):
+		bill = SalesBill(guest_name='Guest')
+		return post_bill(bill, [(self.tea.pk, 2), (self.soup.pk, 1)], [('cash', Decimal('5')), ('card', Decimal('3.5'))])
+
+	def assertTotals(self, bill, items_total, paid_total, balance_due):
+		bill.refresh_from_db()
+		self.assertEqual((bill.items_total, bill.paid_total, bill.balance_due), (items_total, paid_total, balance_due))
+
+	def test_posted_bill(self):
+		bill = self.post()
+		self.assertTotals(bill, Decimal('11.00'), Decimal('8.50'), Decimal('2.50'))
+		self.assertEqual(bill.get_payment_methods_display(), 'Cash (Rs5.00), Card (Rs3.50)')
+		self.assertEqual(reconcile_bill_totals(), [])
+
+	def test_line_and_payment_changes(self):
+		bill = self.post()
+		PaymentDetail.objects.create(sales_bill=bill, payment_method='upi', amount=Decimal('2.50'))
+		self.assertTotals(bill, Decimal('11.00'), Decimal('11.00'), Decimal('0.00'))
+		bill.salesbillitem_set.get(food_item=self.soup).delete()
+		bill.payments.get(payment_method='card').delete()
+		self.assertTotals(bill, Decimal('5.00'), Decimal('7.50'), Decimal('3.50'))
+		self.assertEqual(bill.payment_summary, 'Cash (Rs5.00), UPI (Rs2.50)')
+
+	def test_deleting_a_menu_item_refreshes_its_bills(self):
+		bill = self.post()
+		other = self.post()
+		self.soup.delete()
+		self.assertTotals(bill, Decimal('5.00'), Decimal('8.50'), Decimal('2.50'))
+		self.assertTotals(other, Decimal('5.00'), Decimal('8.50'), Decimal('2.50'))
+		self.assertEqual(reconcile_bill_totals(fix=False), [])
+
+	def test_stale_bill_save_keeps_totals(self):
+		bill = self.post()
+		stale = SalesBill.objects.get(pk=bill.pk)
+		PaymentDetail.objects.create(sales_bill=bill, payment_method='upi', amount=Decimal('2.50'))
+		stale.total_amount = Decimal('12.00')
+		stale.save()
+		self.assertTotals(bill, Decimal('11.00'), Decimal('11.00'), Decimal('1.00'))
+
+	def test_reconcile_reports_and_fixes_drift(self):
+		bill = self.post()
+		other = self.post()
+		SalesBill.objects.filter(pk=bill.pk).update(paid_total=0, payment_summary='')
+		drift = reconcile_bill_totals(fix=False, chunk_size=1)
+		self.assertEqual([pk for pk, _fields in drift], [bill.pk])
+		self.assertEqual(drift[0][1]['paid_total'], (Decimal('0.00'), Decimal('8.50')))
+		self.assertEqual(len(reconcile_bill_totals()), 1)
+		self.assertEqual(reconcile_bill_totals(), [])
+		self.assertTotals(bill, Decimal('11.00'), Decimal('8.50'), Decimal('2.50'))
+		self.assertTotals(other, Decimal('11.00'), Decimal('8.50'), Decimal('2.50'))
+
+
+class PostingTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.tea = FoodItem.objects.create(name='Tea', price=Decimal('2'))
+		cls.soup = FoodItem.objects.create(name='Soup', price=Decimal('6'), available=False)
+		cls.milk = InventoryItem.objects.create(name='Milk', unit='ml', price_per_unit=Decimal('0.01'))
+		record_movement(cls.milk, StockMovement.RECEIPT, 1000)
+		RecipeIngredient.objects.create(food_item=cls.tea, inventory_item=cls.milk, quantity=50)
+
+	def post(self, lines, payments=(('cash', Decimal('4')),)):
+		return post_bill(SalesBill(guest_name='Guest'), lines, list(payments))
+
+	def assertNothingWritten(self):
+		self.assertFalse(SalesBill.objects.exists())
+		self.assertFalse(SalesBillItem.objects.exists())
+		self.assertFalse(PaymentDetail.objects.exists())
+		self.assertFalse(DailySalesSummary.objects.exists())
+		self.assertFalse(DailyItemSales.objects.exists())
+		self.assertEqual(InventoryItem.objects.get(pk=self.milk.pk).quantity, 1000)
+
+	def test_parse_payments(self):
+		self.assertEqual(parse_payments(['cash', 'card', ''], ['5', '2.50', '9']), [('cash', Decimal('5')), ('card', Decimal('2.50'))])
+		for amount in ('NaN', 'sNaN', 'Infinity', '-inf', 'five'):
+			with self.assertRaisesMessage(ValidationError, 'Invalid payment amount'):
+				parse_payments(['cash'], [amount])
+		with self.assertRaisesMessage(ValidationError, 'Unknown payment method'):
+			parse_payments(['cheque'], ['5'])
+
+	def test_parse_lines_rejects_bad_quantities(self):
+		self.assertEqual(parse_lines(['1', '', '2'], ['3', '1', '1']), [(1, 3), (2, 1)])
+		with self.assertRaisesMessage(ValidationError, 'Invalid bill line'):
+			parse_lines(['1'], ['two'])
+		for quantity in ('0', '-1'):
+			with self.assertRaisesMessage(ValidationError, 'at least 1'):
+				parse_lines(['1'], [quantity])
+
+	def test_unknown_or_unavailable_items_are_refused(self):
+		with self.assertRaisesMessage(ValidationError, 'Unknown food item(s): 999'):
+			self.post([(self.tea.pk, 1), (999, 1)])
+		with self.assertRaisesMessage(ValidationError, 'Not available: Soup'):
+			self.post([(self.tea.pk, 1), (self.soup.pk, 1)])
+		self.assertNothingWritten()
+
+	def test_failed_insert_rolls_back_the_whole_bill(self):
+		with mock.patch.object(PaymentDetail.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+			with self.assertRaises(DatabaseError):
+				self.post([(self.tea.pk, 2)])
+		self.assertNothingWritten()
+
+	def test_failed_stock_depletion_rolls_back_the_whole_bill(self):
+		with mock.patch('sales.posting.deplete_stock', side_effect=DatabaseError('locked')):
+			with self.assertRaises(DatabaseError):
+				self.post([(self.tea.pk, 2)])
+		self.assertNothingWritten()
+
+	def test_non_finite_amounts_are_refused_by_the_view(self):
+		self.client.force_login(User.objects.create_user('cashier', password='secret'))
+		form = {
+			'guest_name': 'Guest',
+			'food_items[]': [self.tea.pk],
+			'quantities[]': [1],
+			'payment_methods[]': ['cash'],
+			'payment_amounts[]': ['2'],
+			'total_amount': '2',
+		}
+		for field, value in (('payment_amounts[]', 'NaN'), ('discount_amount', 'Infinity'), ('discount_percentage', 'NaN')):
+			response = self.client.post('/dashboard/sales-bills/create/', {**form, field: value})
+			self.assertContains(response, 'Invalid')
+		self.assertNothingWritten()
+
+
+class RecipeDepletionTests(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User.objects.create_user('chef', password='secret')
+		cls.milk = InventoryItem.objects.create(name='Milk', unit='ml', price_per_unit=Decimal('0.01'))
+		cls.leaves = InventoryItem.objects.create(name='Tea leaves', unit='g', price_per_unit=Decimal('0.05'))
+		cls.sugar = InventoryItem.objects.create(name='Sugar', unit='g', price_per_unit=Decimal('0.01'))
+		for item in (cls.milk, cls.leaves, cls.sugar):
+			record_movement(item, StockMovement.RECEIPT, 1000)
+		cls.tea = FoodItem.objects.create(name='Tea', price=Decimal('2'))
+		cls.latte = FoodItem.objects.create(name='Latte', price=Decimal('4'))
+		RecipeIngredient.objects.create(food_item=cls.tea, inventory_item=cls.milk, quantity=50)
+		RecipeIngredient.objects.create(food_item=cls.tea, inventory_item=cls.leaves, quantity=3)
+		RecipeIngredient.objects.create(food_item=cls.tea, inventory_item=cls.sugar, quantity=10)
+		RecipeIngredient.objects.create(food_item=cls.latte, inventory_item=cls.milk, quantity=200)
+		RecipeIngredient.objects.create(food_item=cls.latte, inventory_item=cls.sugar, quantity=5)
+
+	def stock(self):
+		return dict(InventoryItem.objects.values_list('name', 'quantity'))
+
+	def post(self, *lines):
+		return post_bill(SalesBill(guest_name='Guest'), list(lines), [('cash', Decimal('20'))], user=self.user)
+
+	def test_sale_depletes_each_ingredient_once(self):
+		with CaptureQueriesContext(connection) as context:
+			bill = self.post((self.tea.pk, 2), (self.latte.pk, 1), (self.tea.pk, 1))
+		stock_updates = [
+			query for query in context.captured_queries
+			if query['sql'].startswith('UPDATE "inventory_inventoryitem"')
+		]
+		self.assertEqual(len(stock_updates), 3)
+		self.assertEqual(self.stock(), {'Milk': 650, 'Tea leaves': 991, 'Sugar': 965})
+		issued = bill.stock_movements.filter(kind=StockMovement.ISSUE)
+		self.assertEqual(issued.count(), 3)
+		self.assertTrue(all(movement.reference == f'Bill #{bill.pk}' for movement in issued))
+		self.assertEqual(bill.stock_shortfalls, {})
+
+	def test_shortage_does_not_block_the_sale(self):
+		bill = self.post((self.latte.pk, 6))
+		self.assertEqual(bill.stock_shortfalls, {self.milk.pk: 200})
+		self.assertEqual(self.stock(), {'Milk': 0, 'Tea leaves': 1000, 'Sugar': 970})
+		milk = bill.stock_movements.get(item=self.milk)
+		self.assertEqual((milk.quantity, milk.note), (-1000, 'Sold (200 short)'))
+
+		# Only what was actually issued goes back
+		bill.delete()
+		self.assertEqual(self.stock(), {'Milk': 1000, 'Tea leaves': 1000, 'Sugar': 1000})
+
+	def test_shortage_is_reported_on_checkout(self):
+		self.client.force_login(self.user)
+		record_movement(self.sugar, StockMovement.WASTAGE, 1000)
+		response = self.client.post('/dashboard/sales-bills/create/', {
+			'guest_name': 'Guest',
+			'food_items[]': [self.tea.pk],
+			'quantities[]': [1],
+			'payment_methods[]': ['cash'],
+			'payment_amounts[]': ['2'],
+			'total_amount': '2',
+		}, follow=True)
+		self.assertContains(response, 'Sugar (10 g short)')
+		self.assertEqual(SalesBill.objects.count(), 1)
+
+	def test_restore_ignores_movements_of_other_bills(self):
+		bill = self.post((self.tea.pk, 1))
+		# Same reference text, but not this bill's movement
+		record_movement(self.milk, StockMovement.ISSUE, 100, reference=f'Bill #{bill.pk}')
+		bill.delete()
+		self.assertEqual(self.stock(), {'Milk': 900, 'Tea leaves': 1000, 'Sugar': 1000})
+
+	def test_deleting_bill_restores_stock(self):
+		bill = self.post((self.tea.pk, 2), (self.latte.pk, 1))
+		# Later recipe edits must not change what is put back
+		RecipeIngredient.objects.filter(food_item=self.latte, inventory_item=self.milk).update(quantity=999)
+		bill.delete()
+		self.assertEqual(self.stock(), {'Milk': 1000, 'Tea leaves': 1000, 'Sugar': 1000})
+
+	def test_recipe_page(self):
+		self.client.force_login(self.user)
+		response = self.client.get(f'/dashboard/food-items/{self.tea.pk}/recipe/')
+		self.assertContains(response, 'Recipe: Tea')
+
+
+class MigrationTests(TransactionTestCase):
+	"""sales 0002 fills the bill totals and rollups of data written before it"""
+
+	def test_totals_and_rollups_filled_for_existing_bills(self):
+		executor = MigrationExecutor(connection)
+		executor.migrate([('sales', '0001_initial')])
+		apps = executor.loader.project_state([('sales', '0001_initial')]).apps
+		food = apps.get_model('sales', 'FoodItem').objects.create(name='Tea', price=Decimal('10'))
+		bill = apps.get_model('sales', 'SalesBill').objects.create(guest_name='Ann', total_amount=Decimal('25'))
+		apps.get_model('sales', 'SalesBillItem').objects.create(sales_bill=bill, food_item=food, quantity=3, price=Decimal('10'))
+		payments = apps.get_model('sales', 'PaymentDetail').objects
+		payments.create(sales_bill=bill, payment_method='cash', amount=Decimal('15'))
+		payments.create(sales_bill=bill, payment_method='upi', amount=Decimal('5'))
+
+		executor = MigrationExecutor(connection)
+		executor.migrate(executor.loader.graph.leaf_nodes())
+
+		bill = SalesBill.objects.get(pk=bill.pk)
+		self.assertEqual((bill.items_total, bill.paid_total, bill.balance_due), (Decimal('30'), Decimal('20'), Decimal('5')))
+		self.assertEqual(bill.payment_summary, 'Cash (Rs15.00), UPI (Rs5.00)')
+		self.assertEqual(reconcile_bill_totals(fix=False), [])
+		summary = DailySalesSummary.objects.get()
+		self.assertEqual((summary.bill_count, summary.net_amount, summary.cash_amount, summary.upi_amount), (1, 25, 15, 5))
+		self.assertEqual(list(DailyItemSales.objects.values_list('quantity', 'revenue')), [(3, Decimal('30'))])
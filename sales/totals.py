@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from dashboard.kpis import bump_on_commit
+
+from .models import PaymentDetail, SalesBill, SalesBillItem
+
+CENTS = Decimal('0.01')
+TOTAL_FIELDS = ('items_total', 'paid_total', 'balance_due', 'payment_summary')
+RECONCILE_CHUNK_SIZE = 1000
+
+
+def payment_summary(payments):
+	"""'Cash (Rs50.00), Card (Rs20.00)' for an iterable of (payment_method, amount)"""
+	labels = dict(PaymentDetail.PAYMENT_METHODS)
+	return ', '.join(
+		f'{labels.get(method, method)} (Rs{Decimal(amount).quantize(CENTS)})' for method, amount in payments
+	)
+
+
+def set_totals(bill, items_total, payments):
+	"""Fill the denormalized total columns of `bill` (not saved)"""
+	payments = list(payments)
+	bill.items_total = items_total
+	bill.paid_total = sum((amount for _method, amount in payments), Decimal('0'))
+	bill.balance_due = bill.total_amount - bill.paid_total
+	bill.payment_summary = payment_summary(payments)
+
+
+def compute_totals(bill_ids):
+	"""
+	Map bill id -> (items_total, [(payment_method, amount), ...]).
+
+	Two grouped queries however many bills are asked for.
+	"""
+	totals = {pk: (Decimal('0'), []) for pk in bill_ids}
+	items = (
+		SalesBillItem.objects.filter(sales_bill_id__in=bill_ids)
+		.values('sales_bill_id')
+		.annotate(total=Sum(F('quantity') * F('price'), output_field=DecimalField()))
+		.order_by()
+	)
+	for row in items:
+		totals[row['sales_bill_id']] = (row['total'], [])
+	payments = (
+		PaymentDetail.objects.filter(sales_bill_id__in=bill_ids)
+		.order_by('sales_bill_id', 'pk')
+		.values_list('sales_bill_id', 'payment_method', 'amount')
+	)
+	for bill_id, method, amount in payments:
+		totals[bill_id][1].append((method, amount))
+	return totals
+
+
+def refresh_bill_totals(bill_id):
+	"""Recompute one bill's total columns after a line or payment changed"""
+	with transaction.atomic():
+		bill = SalesBill.objects.select_for_update().only('total_amount', *TOTAL_FIELDS).get(pk=bill_id)
+		items_total, payments = compute_totals([bill_id])[bill_id]
+		set_totals(bill, items_total, payments)
+		SalesBill.objects.filter(pk=bill_id).update(**{field: getattr(bill, field) for field in TOTAL_FIELDS})
+		bump_on_commit(SalesBill)
+
+
+def refresh_many_bill_totals(bill_ids):
+	"""Recompute the total columns of every bill in `bill_ids` with one bulk_update"""
+	bill_ids = list(bill_ids)
+	if not bill_ids:
+		return
+	with transaction.atomic():
+		bills = list(SalesBill.objects.select_for_update().filter(pk__in=bill_ids).only('total_amount', *TOTAL_FIELDS))
+		totals = compute_totals(bill_ids)
+		for bill in bills:
+			set_totals(bill, *totals[bill.pk])
+		SalesBill.objects.bulk_update(bills, TOTAL_FIELDS)
+		bump_on_commit(SalesBill)
+
+
+def reconcile_bill_totals(fix=True, chunk_size=RECONCILE_CHUNK_SIZE):
+	"""
+	Recompute every bill's total columns and return the bills that drifted.
+
+	Bills are walked in primary key chunks; each chunk costs three reads and,
+	with `fix`, one bulk_update of just the rows that were wrong. Returns a
+	list of (bill id, {field: (stored, expected)}).
+	"""
+	drift = []
+	last_pk = 0
+	while True:
+		bills = list(
+			SalesBill.objects.filter(pk__gt=last_pk)
+			.order_by('pk')
+			.only('total_amount', *TOTAL_FIELDS)[:chunk_size]
+		)
+		if not bills:
+			return drift
+		last_pk = bills[-1].pk
+		totals = compute_totals([bill.pk for bill in bills])
+		changed = []
+		for bill in bills:
+			stored = {field: getattr(bill, field) for field in TOTAL_FIELDS}
+			set_totals(bill, *totals[bill.pk])
+			diff = {
+				field: (stored[field], getattr(bill, field))
+				for field in TOTAL_FIELDS
+				if stored[field] != getattr(bill, field)
+			}
+			if diff:
+				drift.append((bill.pk, diff))
+				changed.append(bill)
+		if fix and changed:
+			with transaction.atomic():
+				SalesBill.objects.bulk_update(changed, TOTAL_FIELDS)
+				bump_on_commit(SalesBill)